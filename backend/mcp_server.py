@@ -5,10 +5,19 @@ Exposes PDF conversion and processing operations as tools
 """
 
 import os
+import re
 import sys
 import json
+import time
+import uuid
+import zipfile
+import hashlib
 import asyncio
 import logging
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Any
 import httpx
 
@@ -18,106 +27,222 @@ logger = logging.getLogger(__name__)
 
 # Import MCP SDK
 try:
-    from mcp.server.models import InitializationOptions
-    from mcp.types import Tool, TextContent, ToolResult
+    # CallToolResult returned from a call_tool handler needs mcp>=1.19 (see mcp_requirements.txt)
+    from mcp.types import Tool, TextContent, CallToolResult, Resource, ResourceTemplate
     from mcp.server import Server
+    from mcp.server.stdio import stdio_server
 except ImportError:
     print("Error: mcp package not found. Install with: pip install mcp")
     sys.exit(1)
 
 # Configuration
+# 'http' uploads files to the Node backend at BACKEND_URL; 'local' runs the
+# Python converters in a process pool on this machine, on the given paths
+BACKEND_MODE = os.getenv("MCP_BACKEND", "http").lower()
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:5000")
-API_TIMEOUT = 30
+PYTHON_DIR = os.getenv("PYTHON_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "python"))
+# Read timeout per request; large conversions can take minutes
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "600"))
+CONNECT_TIMEOUT = 10
+# Files processed at once by the *_many batch tools
+MAX_CONCURRENCY = int(os.getenv("MCP_MAX_CONCURRENCY", "4"))
+# Attempts for idempotent calls, with exponential backoff between them
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+# Seconds a finished job and its result stay available to the job tools
+JOB_RESULT_TTL = float(os.getenv("MCP_JOB_TTL", "3600"))
+# Output files are read through resources in chunks of this many bytes;
+# byte-range reads are capped at MAX_RANGE_SIZE
+OUTPUT_CHUNK_SIZE = int(os.getenv("MCP_CHUNK_SIZE", str(256 * 1024)))
+MAX_RANGE_SIZE = 4 * OUTPUT_CHUNK_SIZE
+# Extracted text longer than this is returned as a resource plus a preview
+INLINE_TEXT_LIMIT = int(os.getenv("MCP_INLINE_TEXT_LIMIT", "20000"))
+TEXT_PREVIEW_CHARS = 1000
+
+CONVERT_FORMATS = {"word": ".docx", "excel": ".xlsx", "ppt": ".pptx", "html": ".html", "text": ".txt"}
+
+OUTPUT_MIME_TYPES = {
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ".html": "text/html",
+    ".txt": "text/plain",
+    ".pdf": "application/pdf",
+}
+OUTPUT_URI_SCHEME = "pdf-output"
+
+# Converter modules for local mode; pool workers inherit sys.path
+if PYTHON_DIR not in sys.path:
+    sys.path.insert(0, PYTHON_DIR)
 
 # Initialize MCP Server
 server = Server("pdf-editor-pro-mcp")
 
-class PDFEditorClient:
+class BaseClient:
+    """Batch helpers shared by the HTTP and local clients"""
+    
+    async def _run_many(self, file_paths: list, operation, concurrency: int = None) -> dict:
+        """Run an async per-file operation over many files, bounded by a semaphore"""
+        semaphore = asyncio.Semaphore(max(1, concurrency or MAX_CONCURRENCY))
+        
+        async def run_one(file_path):
+            async with semaphore:
+                result = await operation(file_path)
+            return {"file_path": file_path, **result}
+        
+        results = await asyncio.gather(*(run_one(path) for path in file_paths))
+        failed = sum(1 for result in results if not result.get("success"))
+        return {
+            "success": failed == 0,
+            "total": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "results": list(results)
+        }
+    
+    async def convert_many(self, file_paths: list, format: str, output_dir: str = None,
+                           concurrency: int = None) -> dict:
+        """Convert many PDFs concurrently"""
+        return await self._run_many(
+            file_paths, lambda path: self.convert_file(path, format, output_dir), concurrency)
+    
+    async def compress_many(self, file_paths: list, quality: str = "medium",
+                            concurrency: int = None) -> dict:
+        """Compress many PDFs concurrently"""
+        return await self._run_many(
+            file_paths, lambda path: self.compress_pdf(path, quality), concurrency)
+    
+    async def extract_text_many(self, file_paths: list, concurrency: int = None) -> dict:
+        """Extract text from many PDFs concurrently"""
+        return await self._run_many(file_paths, self.extract_text, concurrency)
+    
+    def progress_sink(self, job_id: str):
+        """Object passed to a job as progress=..., or None if not supported"""
+        return None
+    
+    def read_progress(self, job_id: str):
+        """Latest progress reported by a job, if any"""
+        return None
+    
+    def request_cancel(self, job_id: str):
+        """Ask a running job to stop at its next progress report"""
+    
+    def forget_job(self, job_id: str):
+        """Drop progress state kept for a finished job"""
+    
+    async def close(self):
+        """Release pooled connections or worker processes"""
+
+class PDFEditorClient(BaseClient):
     """Client for PDF Editor Pro backend"""
     
     def __init__(self, base_url: str = BACKEND_URL):
         self.base_url = base_url
-        self.client = httpx.AsyncClient(timeout=API_TIMEOUT)
+        # One pooled keep-alive client shared by every tool call
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(API_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=MAX_CONCURRENCY * 2,
+                                max_keepalive_connections=MAX_CONCURRENCY,
+                                keepalive_expiry=60),
+        )
+    
+    async def _post_file(self, endpoint: str, file_path: str, data: dict = None) -> httpx.Response:
+        """
+        Upload a file as multipart form data, retrying transport errors and
+        overload responses with backoff. The file is reopened for every
+        attempt and httpx streams it in chunks, so it is never held in memory.
+        """
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                with open(file_path, 'rb') as f:
+                    files = {'file': (os.path.basename(file_path), f, 'application/pdf')}
+                    response = await self.client.post(
+                        f"{self.base_url}{endpoint}",
+                        files=files,
+                        data=data
+                    )
+                if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_ATTEMPTS:
+                    response.raise_for_status()
+                    return response
+            except httpx.TransportError:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+            delay = RETRY_BACKOFF * 2 ** (attempt - 1)
+            logger.warning(f"{endpoint} failed for {file_path} (attempt {attempt}), retrying in {delay}s")
+            await asyncio.sleep(delay)
     
     async def convert_pdf_to_word(self, file_path: str) -> dict:
         """Convert PDF to Word document"""
-        try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = await self.client.post(
-                    f"{self.base_url}/api/convert/pdf-to-word",
-                    files=files
-                )
-                response.raise_for_status()
-                return {
-                    "success": True,
-                    "data": response.json()
-                }
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        return await self.convert_file(file_path, "word")
     
     async def convert_pdf_to_excel(self, file_path: str) -> dict:
         """Convert PDF to Excel spreadsheet"""
+        return await self.convert_file(file_path, "excel")
+    
+    async def compress_pdf(self, file_path: str, quality: str = "medium") -> dict:
+        """Compress PDF file with /api/compress, saving it to '<name>_compressed.pdf'"""
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = await self.client.post(
-                    f"{self.base_url}/api/convert/pdf-to-excel",
-                    files=files
-                )
-                response.raise_for_status()
-                return {
-                    "success": True,
-                    "data": response.json()
-                }
+            response = await self._post_file("/api/compress", file_path, {'quality': str(quality)})
+            output_path = os.path.splitext(os.path.abspath(file_path))[0] + "_compressed.pdf"
+            with open(output_path, 'wb') as f:
+                f.write(response.content)
+            original_size = int(response.headers.get("X-Original-Size", 0))
+            return {
+                "success": True,
+                "output_path": output_path,
+                "size": len(response.content),
+                "original_size": original_size,
+                "ratio": round(len(response.content) / original_size, 4) if original_size else None
+            }
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    async def compress_pdf(self, file_path: str, quality: str = "medium") -> dict:
-        """Compress PDF file"""
+    async def extract_text(self, file_path: str) -> dict:
+        """Extract text from PDF using OCR, saving it to '<name>.txt'"""
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                data = {'quality': quality}
-                response = await self.client.post(
-                    f"{self.base_url}/api/compress",
-                    files=files,
-                    data=data
-                )
-                response.raise_for_status()
-                return {
-                    "success": True,
-                    "data": response.json()
-                }
+            response = await self._post_file("/api/ocr/extract", file_path)
+            data = response.json()
+            base_name = os.path.splitext(os.path.abspath(file_path))[0]
+            output_path = base_name + ".txt"
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(data.get("text", ""))
+            return {
+                "success": True,
+                "output_path": output_path,
+                "size": os.path.getsize(output_path),
+                **data
+            }
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    async def extract_text(self, file_path: str) -> dict:
-        """Extract text from PDF using OCR"""
+    async def convert_file(self, file_path: str, format: str, output_dir: str = None) -> dict:
+        """Convert a PDF with /api/convert and save the returned file"""
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = await self.client.post(
-                    f"{self.base_url}/api/ocr/extract",
-                    files=files
-                )
-                response.raise_for_status()
-                return {
-                    "success": True,
-                    "data": response.json()
-                }
+            response = await self._post_file("/api/convert", file_path, {'format': format})
+            output_dir = output_dir or os.path.dirname(os.path.abspath(file_path))
+            os.makedirs(output_dir, exist_ok=True)
+            base_name = os.path.splitext(os.path.basename(file_path))[0]
+            output_path = os.path.join(output_dir, base_name + CONVERT_FORMATS[format])
+            with open(output_path, 'wb') as f:
+                f.write(response.content)
+            return {
+                "success": True,
+                "output_path": output_path,
+                "size": len(response.content)
+            }
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     async def get_status(self) -> dict:
-        """Check backend API status"""
+        """Check that the backend answers on its root route"""
         try:
-            response = await self.client.get(f"{self.base_url}/api/status")
+            response = await self.client.get(f"{self.base_url}/")
             response.raise_for_status()
             return {
                 "success": True,
                 "status": "online",
-                "data": response.json()
+                "data": response.text
             }
         except Exception as e:
             return {
@@ -125,9 +250,445 @@ class PDFEditorClient:
                 "status": "offline",
                 "error": str(e)
             }
+    
+    async def close(self):
+        await self.client.aclose()
+
+class LocalPDFClient(BaseClient):
+    """
+    Runs the converters from backend/python in a pool of worker processes on
+    this machine, reading the given paths directly instead of uploading them.
+    Outputs are written next to each input (or into output_dir) and their
+    paths are returned.
+    """
+    
+    def __init__(self, workers: int = MAX_CONCURRENCY):
+        self.workers = max(1, workers)
+        # Cores left for the converters' own page/image pools in each job
+        self.job_workers = max(1, (os.cpu_count() or 1) // self.workers)
+        self._executor = None
+        self._manager = None
+        self._progress = None
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            from local_jobs import init_worker
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+        return self._executor
+    
+    def _get_progress(self):
+        """Dict shared with the workers through a Manager process"""
+        if self._progress is None:
+            self._manager = multiprocessing.Manager()
+            self._progress = self._manager.dict()
+        return self._progress
+    
+    def progress_sink(self, job_id: str):
+        from local_jobs import JobProgress
+        return JobProgress(self._get_progress(), job_id)
+    
+    def read_progress(self, job_id: str):
+        if self._progress is None:
+            return None
+        return self._progress.get(job_id)
+    
+    def request_cancel(self, job_id: str):
+        if self._progress is not None:
+            self._progress[job_id + ":cancel"] = True
+    
+    def forget_job(self, job_id: str):
+        if self._progress is not None:
+            self._progress.pop(job_id, None)
+            self._progress.pop(job_id + ":cancel", None)
+    
+    async def _run_job(self, job_name: str, *args, progress=None) -> dict:
+        """Run a local_jobs function in the pool and wrap its result"""
+        import local_jobs
+        try:
+            job = functools.partial(getattr(local_jobs, job_name), *args,
+                                    workers=self.job_workers, progress=progress)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), job)
+            return {"success": True, **result}
+        except local_jobs.JobCancelled:
+            return {"success": False, "error": "Job cancelled"}
+        except BrokenProcessPool as e:
+            # A converter crashed its worker; start a fresh pool for the next job
+            logger.error(f"Local worker pool broke during {job_name}: {e}")
+            self._executor = None
+            return {"success": False, "error": f"Worker process crashed: {e}"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def _output_path(self, file_path: str, suffix: str, output_dir: str = None) -> str:
+        from local_jobs import output_path_for
+        return output_path_for(file_path, suffix, output_dir)
+    
+    async def convert_file(self, file_path: str, format: str, output_dir: str = None,
+                           progress=None) -> dict:
+        """Convert a PDF locally and return the output path"""
+        if not os.path.isfile(file_path):
+            return {"success": False, "error": f"File not found: {file_path}"}
+        output_path = self._output_path(file_path, CONVERT_FORMATS[format], output_dir)
+        return await self._run_job("convert", file_path, format, output_path, progress=progress)
+    
+    async def convert_pdf_to_word(self, file_path: str) -> dict:
+        """Convert PDF to Word document"""
+        return await self.convert_file(file_path, "word")
+    
+    async def convert_pdf_to_excel(self, file_path: str) -> dict:
+        """Convert PDF to Excel spreadsheet"""
+        return await self.convert_file(file_path, "excel")
+    
+    async def compress_pdf(self, file_path: str, quality: str = "medium", progress=None) -> dict:
+        """Compress PDF file to '<name>_compressed.pdf'"""
+        if not os.path.isfile(file_path):
+            return {"success": False, "error": f"File not found: {file_path}"}
+        output_path = self._output_path(file_path, "_compressed.pdf")
+        return await self._run_job("compress", file_path, output_path, quality, progress=progress)
+    
+    async def extract_text(self, file_path: str, progress=None) -> dict:
+        """Extract text from PDF, with OCR only where needed, to '<name>.txt'"""
+        if not os.path.isfile(file_path):
+            return {"success": False, "error": f"File not found: {file_path}"}
+        output_path = self._output_path(file_path, ".txt")
+        return await self._run_job("extract_text", file_path, output_path, progress=progress)
+    
+    async def get_status(self) -> dict:
+        """Report local mode and the converter directory"""
+        available = os.path.isfile(os.path.join(PYTHON_DIR, "local_jobs.py"))
+        return {
+            "success": available,
+            "status": "local" if available else "unavailable",
+            "python_dir": PYTHON_DIR,
+            "workers": self.workers
+        }
+    
+    async def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = self._progress = None
 
 # Create client instance
-pdf_client = PDFEditorClient()
+if BACKEND_MODE == "local":
+    pdf_client = LocalPDFClient()
+else:
+    pdf_client = PDFEditorClient()
+
+JOB_OPERATIONS = ("convert", "compress", "extract_text")
+
+class Job:
+    """One submitted operation and its lifecycle"""
+    
+    def __init__(self, operation: str, file_path: str, options: dict, key: tuple):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.operation = operation
+        self.file_path = file_path
+        self.options = options
+        self.key = key
+        self.state = "queued"
+        self.result = None
+        self.task = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+    
+    @property
+    def finished(self) -> bool:
+        return self.state in ("succeeded", "failed", "cancelled")
+    
+    def summary(self, progress=None) -> dict:
+        end = self.finished_at or time.time()
+        summary = {
+            "job_id": self.job_id,
+            "operation": self.operation,
+            "file_path": self.file_path,
+            "options": self.options,
+            "state": self.state,
+            "elapsed_ms": int((end - (self.started_at or end)) * 1000),
+        }
+        if progress:
+            if progress.get("total"):
+                progress = {**progress, "percent": round(100 * progress["done"] / progress["total"], 1)}
+            summary["progress"] = progress
+        if self.finished_at:
+            summary["expires_in"] = max(0, int(self.finished_at + JOB_RESULT_TTL - time.time()))
+        return summary
+
+class JobManager:
+    """
+    Runs long operations in the background so tool calls return at once.
+    Jobs are kept in memory; finished ones are dropped after JOB_RESULT_TTL.
+    A submission matching a queued, running or succeeded job (same
+    operation, options and unchanged file) attaches to that job.
+    """
+    
+    def __init__(self, client: BaseClient, concurrency: int = MAX_CONCURRENCY):
+        self.client = client
+        self.concurrency = max(1, concurrency)
+        self.jobs = {}
+        self.by_key = {}
+        self._semaphore = None
+    
+    def _purge(self):
+        now = time.time()
+        for job in list(self.jobs.values()):
+            if job.finished and now - job.finished_at > JOB_RESULT_TTL:
+                del self.jobs[job.job_id]
+                if self.by_key.get(job.key) is job:
+                    del self.by_key[job.key]
+                self.client.forget_job(job.job_id)
+    
+    @staticmethod
+    def _job_key(operation: str, file_path: str, options: dict) -> tuple:
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        return (operation, path, stat.st_size, stat.st_mtime_ns, json.dumps(options, sort_keys=True))
+    
+    def get(self, job_id: str):
+        self._purge()
+        return self.jobs.get(job_id)
+    
+    def submit(self, operation: str, file_path: str, options: dict) -> dict:
+        """Start a job, or attach to an identical one; returns its summary"""
+        self._purge()
+        if not os.path.isfile(file_path):
+            return {"success": False, "error": f"File not found: {file_path}"}
+        key = self._job_key(operation, file_path, options)
+        existing = self.by_key.get(key)
+        if existing and existing.state in ("queued", "running", "succeeded"):
+            return {"success": True, "attached": True, **self.status(existing)}
+        
+        job = Job(operation, file_path, options, key)
+        self.jobs[job.job_id] = job
+        self.by_key[key] = job
+        job.task = asyncio.create_task(self._run(job))
+        return {"success": True, "attached": False, **self.status(job)}
+    
+    async def _run(self, job: Job):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        progress = self.client.progress_sink(job.job_id)
+        extra = {"progress": progress} if progress is not None else {}
+        try:
+            async with self._semaphore:
+                job.state = "running"
+                job.started_at = time.time()
+                if job.operation == "convert":
+                    result = await self.client.convert_file(
+                        job.file_path, job.options["format"], job.options.get("output_dir"), **extra)
+                elif job.operation == "compress":
+                    result = await self.client.compress_pdf(
+                        job.file_path, job.options.get("quality", "medium"), **extra)
+                else:
+                    result = await self.client.extract_text(job.file_path, **extra)
+            if job.state != "cancelled":
+                job.result = result
+                job.state = "succeeded" if result.get("success") else "failed"
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+        except Exception as e:
+            job.result = {"success": False, "error": str(e)}
+            job.state = "failed"
+        finally:
+            job.finished_at = time.time()
+            logger.info(f"Job {job.job_id} ({job.operation}) {job.state}")
+    
+    def status(self, job: Job) -> dict:
+        return job.summary(None if job.state == "queued" else self.client.read_progress(job.job_id))
+    
+    def result(self, job: Job) -> dict:
+        summary = self.status(job)
+        if not job.finished:
+            return {"success": True, "ready": False, **summary}
+        if job.state == "cancelled":
+            return {"success": False, "ready": True, "error": "Job was cancelled", **summary}
+        return {**job.result, "ready": True, **summary}
+    
+    def cancel(self, job: Job) -> dict:
+        if not job.finished:
+            job.state = "cancelled"
+            # Stops a local worker at its next page; queued jobs never start
+            self.client.request_cancel(job.job_id)
+            job.task.cancel()
+        return {"success": job.state == "cancelled", **self.status(job)}
+
+job_manager = JobManager(pdf_client)
+
+def _utf8_boundary(data: bytes, index: int) -> int:
+    """Move index forward past UTF-8 continuation bytes"""
+    while index < len(data) and (data[index] & 0xC0) == 0x80:
+        index += 1
+    return index
+
+def _count_pages(path: str):
+    """Page (or slide) count of an output file, when it can be read cheaply"""
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == ".pdf":
+            import pymupdf
+            with pymupdf.open(path) as doc:
+                return len(doc)
+        if extension == ".pptx":
+            with zipfile.ZipFile(path) as archive:
+                return sum(1 for name in archive.namelist()
+                           if re.fullmatch(r"ppt/slides/slide\d+\.xml", name))
+        if extension == ".docx":
+            # Word stores the page count from its last layout; converters may not
+            with zipfile.ZipFile(path) as archive:
+                app = archive.read("docProps/app.xml").decode("utf-8", "replace")
+            match = re.search(r"<Pages>(\d+)</Pages>", app)
+            return int(match.group(1)) if match else None
+        if extension == ".txt":
+            # Page headers written by pdf_to_text._format_page
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                count = sum(1 for line in f if re.fullmatch(r"PAGE \d+\n?", line))
+            return count or None
+    except Exception as e:
+        logger.warning(f"Could not count pages of {path}: {e}")
+    return None
+
+class OutputRegistry:
+    """
+    Conversion outputs exposed as MCP resources. Tools return a URI instead
+    of the file, and agents read metadata, fixed-size chunks or byte ranges:
+        pdf-output://<id>                  metadata (JSON)
+        pdf-output://<id>/chunk/<n>        n-th chunk of OUTPUT_CHUNK_SIZE bytes
+        pdf-output://<id>/bytes/<a>-<b>    bytes a..b inclusive (capped)
+    Text outputs are returned as text, cut at UTF-8 character boundaries;
+    everything else as binary. Only registered files can be read.
+    """
+    
+    _URI_RE = re.compile(rf"^{OUTPUT_URI_SCHEME}://([0-9a-f]+)(?:/chunk/(\d+)|/bytes/(\d+)-(\d+))?$")
+    
+    def __init__(self):
+        self.outputs = {}
+        self._digests = {}
+    
+    def register(self, path: str, page_count: int = None) -> dict:
+        """Register an output file and return its resource descriptor"""
+        path = os.path.abspath(path)
+        output_id = hashlib.sha256(path.encode("utf-8")).hexdigest()[:16]
+        self.outputs[output_id] = {"path": path, "page_count": page_count}
+        size = os.path.getsize(path)
+        uri = f"{OUTPUT_URI_SCHEME}://{output_id}"
+        return {
+            "uri": uri,
+            "chunk_uri": uri + "/chunk/{index}",
+            "mime_type": self._mime_type(path),
+            "size": size,
+            "chunks": max(1, -(-size // OUTPUT_CHUNK_SIZE))
+        }
+    
+    @staticmethod
+    def _mime_type(path: str) -> str:
+        return OUTPUT_MIME_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+    
+    def _entry(self, output_id: str) -> dict:
+        entry = self.outputs.get(output_id)
+        if entry is None or not os.path.isfile(entry["path"]):
+            raise ValueError(f"Unknown or deleted output: {output_id}")
+        return entry
+    
+    def _sha256(self, path: str) -> str:
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        if key not in self._digests:
+            sha = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(block)
+            self._digests[key] = sha.hexdigest()
+        return self._digests[key]
+    
+    def metadata(self, output_id: str) -> dict:
+        entry = self._entry(output_id)
+        path = entry["path"]
+        if entry["page_count"] is None:
+            entry["page_count"] = _count_pages(path)
+        size = os.path.getsize(path)
+        uri = f"{OUTPUT_URI_SCHEME}://{output_id}"
+        return {
+            "uri": uri,
+            "path": path,
+            "name": os.path.basename(path),
+            "mime_type": self._mime_type(path),
+            "size": size,
+            "sha256": self._sha256(path),
+            "page_count": entry["page_count"],
+            "chunk_size": OUTPUT_CHUNK_SIZE,
+            "chunks": max(1, -(-size // OUTPUT_CHUNK_SIZE)),
+            "chunk_uri": uri + "/chunk/{index}",
+            "range_uri": uri + "/bytes/{start}-{end}"
+        }
+    
+    def _read(self, path: str, start: int, end: int):
+        """Bytes [start, end) as bytes, or as text aligned to characters"""
+        is_text = self._mime_type(path).startswith("text/")
+        with open(path, 'rb') as f:
+            # Read a few bytes either side so the cut can move to a boundary
+            f.seek(max(0, start))
+            data = f.read(end - start + 4)
+        if not is_text:
+            return data[:end - start]
+        first = _utf8_boundary(data, 0) if start else 0
+        last = _utf8_boundary(data, end - start)
+        return data[first:last].decode("utf-8", "replace")
+    
+    def read(self, uri: str):
+        """Read a resource URI: metadata JSON, a chunk or a byte range"""
+        match = self._URI_RE.match(uri)
+        if not match:
+            raise ValueError(f"Unsupported resource URI: {uri}")
+        output_id, chunk, start, end = match.groups()
+        if chunk is None and start is None:
+            return json.dumps(self.metadata(output_id), indent=2)
+        path = self._entry(output_id)["path"]
+        size = os.path.getsize(path)
+        if chunk is not None:
+            start = int(chunk) * OUTPUT_CHUNK_SIZE
+            end = min(size, start + OUTPUT_CHUNK_SIZE)
+        else:
+            start, end = int(start), min(size, int(end) + 1, int(start) + MAX_RANGE_SIZE)
+        if start >= size or start >= end:
+            raise ValueError(f"Range outside the file ({size} bytes)")
+        return self._read(path, start, end)
+    
+    def resources(self) -> list:
+        listed = []
+        for output_id, entry in self.outputs.items():
+            if os.path.isfile(entry["path"]):
+                listed.append(Resource(
+                    uri=f"{OUTPUT_URI_SCHEME}://{output_id}",
+                    name=os.path.basename(entry["path"]),
+                    description=f"Conversion output, {os.path.getsize(entry['path'])} bytes",
+                    mimeType="application/json"
+                ))
+        return listed
+    
+    def publish(self, result: dict) -> dict:
+        """
+        Replace file contents in a tool result with resource descriptors:
+        outputs get a 'resource' entry and long extracted text is cut to a
+        preview. Applies to batch 'results' entries as well.
+        """
+        if "results" in result:
+            result["results"] = [self.publish(item) for item in result["results"]]
+        output_path = result.get("output_path")
+        if result.get("success") and output_path and os.path.isfile(output_path):
+            result["resource"] = self.register(output_path, result.get("total_pages"))
+            text = result.get("text")
+            if text is not None and len(text) > INLINE_TEXT_LIMIT:
+                result["text_preview"] = text[:TEXT_PREVIEW_CHARS]
+                result["text_truncated"] = True
+                del result["text"]
+                result.pop("pages", None)
+        return result
+
+output_registry = OutputRegistry()
 
 # Register tools
 @server.list_tools()
@@ -196,6 +757,173 @@ async def handle_list_tools() -> list[Tool]:
                 "required": ["file_path"]
             }
         ),
+        Tool(
+            name="convert_many",
+            description="Convert several PDF files concurrently; outputs are saved next to each input or in output_dir",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "file_paths": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Paths to the PDF files"
+                    },
+                    "format": {
+                        "type": "string",
+                        "description": "Target format",
+                        "enum": list(CONVERT_FORMATS)
+                    },
+                    "output_dir": {
+                        "type": "string",
+                        "description": "Directory for converted files (optional)"
+                    },
+                    "concurrency": {
+                        "type": "integer",
+                        "description": f"Files processed at once (default {MAX_CONCURRENCY})"
+                    }
+                },
+                "required": ["file_paths", "format"]
+            }
+        ),
+        Tool(
+            name="compress_many",
+            description="Compress several PDF files concurrently",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "file_paths": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Paths to the PDF files"
+                    },
+                    "quality": {
+                        "type": "string",
+                        "description": "Compression quality: low, medium, high",
+                        "enum": ["low", "medium", "high"],
+                        "default": "medium"
+                    },
+                    "concurrency": {
+                        "type": "integer",
+                        "description": f"Files processed at once (default {MAX_CONCURRENCY})"
+                    }
+                },
+                "required": ["file_paths"]
+            }
+        ),
+        Tool(
+            name="get_text_chunks",
+            description="Read a PDF as structure-aware text chunks within a token budget, with page and bbox references; pass next_cursor back to continue",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "file_path": {
+                        "type": "string",
+                        "description": "Path to the PDF file"
+                    },
+                    "max_tokens": {
+                        "type": "integer",
+                        "description": "Estimated tokens per chunk (default 800)",
+                        "default": 800
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "next_cursor from the previous call (omit to start at the beginning)"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Chunks to return in this call (default 10)",
+                        "default": 10
+                    }
+                },
+                "required": ["file_path"]
+            }
+        ),
+        Tool(
+            name="extract_text_many",
+            description="Extract text from several PDF files concurrently (OCR only where needed)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "file_paths": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Paths to the PDF files"
+                    },
+                    "concurrency": {
+                        "type": "integer",
+                        "description": f"Files processed at once (default {MAX_CONCURRENCY})"
+                    }
+                },
+                "required": ["file_paths"]
+            }
+        ),
+        Tool(
+            name="submit_job",
+            description="Start a conversion, compression or text extraction in the background and return a job_id at once; poll it with get_job_status",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "operation": {
+                        "type": "string",
+                        "description": "Operation to run",
+                        "enum": list(JOB_OPERATIONS)
+                    },
+                    "file_path": {
+                        "type": "string",
+                        "description": "Path to the PDF file"
+                    },
+                    "format": {
+                        "type": "string",
+                        "description": "Target format (convert only)",
+                        "enum": list(CONVERT_FORMATS)
+                    },
+                    "output_dir": {
+                        "type": "string",
+                        "description": "Directory for the converted file (convert only, optional)"
+                    },
+                    "quality": {
+                        "type": "string",
+                        "description": "Compression quality (compress only)",
+                        "enum": ["low", "medium", "high"],
+                        "default": "medium"
+                    }
+                },
+                "required": ["operation", "file_path"]
+            }
+        ),
+        Tool(
+            name="get_job_status",
+            description="Get the state (queued, running, succeeded, failed, cancelled) and per-page progress of a job",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {"type": "string", "description": "Job id from submit_job"}
+                },
+                "required": ["job_id"]
+            }
+        ),
+        Tool(
+            name="get_job_result",
+            description="Get the result of a finished job; 'ready' is false while it is still running",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {"type": "string", "description": "Job id from submit_job"}
+                },
+                "required": ["job_id"]
+            }
+        ),
+        Tool(
+            name="cancel_job",
+            description="Cancel a queued or running job",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {"type": "string", "description": "Job id from submit_job"}
+                },
+                "required": ["job_id"]
+            }
+        ),
         Tool(
             name="check_backend_status",
             description="Check if PDF Editor Pro backend API is online",
@@ -207,13 +935,13 @@ async def handle_list_tools() -> list[Tool]:
     ]
 
 @server.call_tool()
-async def handle_call_tool(name: str, arguments: dict) -> ToolResult:
+async def handle_call_tool(name: str, arguments: dict) -> CallToolResult:
     """Handle tool calls"""
     try:
         if name == "convert_pdf_to_word":
             file_path = arguments.get("file_path")
             if not file_path:
-                return ToolResult(
+                return CallToolResult(
                     content=[TextContent(type="text", text="Error: file_path is required")],
                     isError=True
                 )
@@ -222,7 +950,7 @@ async def handle_call_tool(name: str, arguments: dict) -> ToolResult:
         elif name == "convert_pdf_to_excel":
             file_path = arguments.get("file_path")
             if not file_path:
-                return ToolResult(
+                return CallToolResult(
                     content=[TextContent(type="text", text="Error: file_path is required")],
                     isError=True
                 )
@@ -232,7 +960,7 @@ async def handle_call_tool(name: str, arguments: dict) -> ToolResult:
             file_path = arguments.get("file_path")
             quality = arguments.get("quality", "medium")
             if not file_path:
-                return ToolResult(
+                return CallToolResult(
                     content=[TextContent(type="text", text="Error: file_path is required")],
                     isError=True
                 )
@@ -241,43 +969,155 @@ async def handle_call_tool(name: str, arguments: dict) -> ToolResult:
         elif name == "extract_text":
             file_path = arguments.get("file_path")
             if not file_path:
-                return ToolResult(
+                return CallToolResult(
                     content=[TextContent(type="text", text="Error: file_path is required")],
                     isError=True
                 )
             result = await pdf_client.extract_text(file_path)
             
+        elif name == "get_text_chunks":
+            file_path = arguments.get("file_path")
+            if not file_path or not os.path.isfile(file_path):
+                return CallToolResult(
+                    content=[TextContent(type="text", text="Error: file_path must be an existing PDF")],
+                    isError=True
+                )
+            import text_chunks
+            chunks = await asyncio.to_thread(
+                text_chunks.read_chunks, file_path,
+                arguments.get("max_tokens") or text_chunks.DEFAULT_MAX_TOKENS,
+                arguments.get("cursor"), max(1, int(arguments.get("limit") or 10)))
+            result = {"success": True, **chunks}
+
+        elif name in ("convert_many", "compress_many", "extract_text_many"):
+            file_paths = arguments.get("file_paths")
+            if not file_paths or not isinstance(file_paths, list):
+                return CallToolResult(
+                    content=[TextContent(type="text", text="Error: file_paths must be a non-empty list")],
+                    isError=True
+                )
+            concurrency = arguments.get("concurrency")
+            if name == "convert_many":
+                format = arguments.get("format")
+                if format not in CONVERT_FORMATS:
+                    return CallToolResult(
+                        content=[TextContent(type="text", text=f"Error: format must be one of {', '.join(CONVERT_FORMATS)}")],
+                        isError=True
+                    )
+                result = await pdf_client.convert_many(file_paths, format,
+                                                       arguments.get("output_dir"), concurrency)
+            elif name == "compress_many":
+                result = await pdf_client.compress_many(file_paths, arguments.get("quality", "medium"),
+                                                        concurrency)
+            else:
+                result = await pdf_client.extract_text_many(file_paths, concurrency)
+            
+        elif name == "submit_job":
+            operation = arguments.get("operation")
+            file_path = arguments.get("file_path")
+            if operation not in JOB_OPERATIONS or not file_path:
+                return CallToolResult(
+                    content=[TextContent(type="text", text=f"Error: operation ({', '.join(JOB_OPERATIONS)}) and file_path are required")],
+                    isError=True
+                )
+            options = {}
+            if operation == "convert":
+                if arguments.get("format") not in CONVERT_FORMATS:
+                    return CallToolResult(
+                        content=[TextContent(type="text", text=f"Error: format must be one of {', '.join(CONVERT_FORMATS)}")],
+                        isError=True
+                    )
+                options["format"] = arguments["format"]
+                if arguments.get("output_dir"):
+                    options["output_dir"] = arguments["output_dir"]
+            elif operation == "compress":
+                options["quality"] = arguments.get("quality", "medium")
+            result = job_manager.submit(operation, file_path, options)
+
+        elif name in ("get_job_status", "get_job_result", "cancel_job"):
+            job = job_manager.get(arguments.get("job_id", ""))
+            if job is None:
+                return CallToolResult(
+                    content=[TextContent(type="text", text="Error: unknown or expired job_id")],
+                    isError=True
+                )
+            if name == "get_job_status":
+                result = {"success": True, **job_manager.status(job)}
+            elif name == "get_job_result":
+                result = job_manager.result(job)
+            else:
+                result = job_manager.cancel(job)
+
         elif name == "check_backend_status":
             result = await pdf_client.get_status()
             
         else:
-            return ToolResult(
+            return CallToolResult(
                 content=[TextContent(type="text", text=f"Unknown tool: {name}")],
                 isError=True
             )
         
-        # Return result
+        # Return result; produced files are referenced as resources
+        result = output_registry.publish(result)
         content_text = json.dumps(result, indent=2)
-        return ToolResult(
+        return CallToolResult(
             content=[TextContent(type="text", text=content_text)],
             isError=not result.get("success", False)
         )
         
     except Exception as e:
         logger.error(f"Error calling tool {name}: {str(e)}")
-        return ToolResult(
+        return CallToolResult(
             content=[TextContent(type="text", text=f"Error: {str(e)}")],
             isError=True
         )
 
+@server.list_resources()
+async def handle_list_resources() -> list[Resource]:
+    """List conversion outputs produced in this session"""
+    return output_registry.resources()
+
+@server.list_resource_templates()
+async def handle_list_resource_templates() -> list[ResourceTemplate]:
+    """Describe the chunk and byte-range URIs of conversion outputs"""
+    return [
+        ResourceTemplate(
+            uriTemplate=f"{OUTPUT_URI_SCHEME}://{{output_id}}",
+            name="Conversion output metadata",
+            description="Size, sha256, page count and chunk layout of an output file",
+            mimeType="application/json"
+        ),
+        ResourceTemplate(
+            uriTemplate=f"{OUTPUT_URI_SCHEME}://{{output_id}}/chunk/{{index}}",
+            name="Conversion output chunk",
+            description=f"Chunk of {OUTPUT_CHUNK_SIZE} bytes (text outputs cut at character boundaries)"
+        ),
+        ResourceTemplate(
+            uriTemplate=f"{OUTPUT_URI_SCHEME}://{{output_id}}/bytes/{{start}}-{{end}}",
+            name="Conversion output byte range",
+            description=f"Inclusive byte range, at most {MAX_RANGE_SIZE} bytes"
+        )
+    ]
+
+@server.read_resource()
+async def handle_read_resource(uri) -> str | bytes:
+    """Read output metadata, a chunk or a byte range"""
+    return await asyncio.to_thread(output_registry.read, str(uri))
+
 async def main():
     """Main entry point"""
     logger.info("Starting PDF Editor Pro MCP Server")
-    logger.info(f"Backend URL: {BACKEND_URL}")
+    if BACKEND_MODE == "local":
+        logger.info(f"Backend: local converters in {PYTHON_DIR}")
+    else:
+        logger.info(f"Backend URL: {BACKEND_URL}")
     
-    async with server:
-        logger.info("MCP Server running")
-        await asyncio.Future()  # Run forever
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            logger.info("MCP Server running")
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+    finally:
+        await pdf_client.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Parallel Batch Converter
+Converts every PDF in the given directories, files and zip archives to one
+or more target formats in a pool of worker processes, using the same
+converters as the web API (local_jobs.py).
+
+Outputs keep the layout of their inputs under the name of the directory
+or archive they came from (docs/a/x.pdf -> <output-dir>/docs/a/x.docx);
+inputs that would write the same output are rejected.
+
+Each finished conversion is appended to a manifest in the output directory
+with the input hash, options, output hash and duration. A later run skips
+every conversion whose manifest entry is still valid (same input content
+and options, output still in place), so an interrupted run resumes where it
+stopped and a nightly run only converts new or changed files.
+
+Usage:
+    python batch_convert.py <input> [<input> ...] --formats word,excel
+        [--output-dir DIR] [--workers N] [--quality medium] [--pages 1-3]
+        [--recursive] [--verify] [--force]
+
+Formats: word, excel, ppt, html, text, compress and excel-via-word (the
+pdf_to_excel_via_word_pipeline.py conversion). Inputs may be directories,
+PDF files or .zip archives containing PDFs.
+"""
+
+import sys
+import os
+import json
+import time
+import zlib
+import shutil
+import hashlib
+import zipfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from local_jobs import CONVERT_FORMATS, init_worker, convert, compress
+
+MANIFEST_NAME = ".batch_manifest.jsonl"
+# Zip members are extracted here (inside the output directory) before conversion
+STAGING_DIR_NAME = ".batch_inputs"
+
+# excel-via-word is the PDF -> Word -> Excel pipeline of pdf_to_excel_via_word_pipeline.py
+VIA_WORD_FORMAT = "excel-via-word"
+BATCH_FORMATS = list(CONVERT_FORMATS) + ["compress", VIA_WORD_FORMAT]
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _file_crc(path):
+    crc = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def _output_suffix(fmt):
+    if fmt == "compress":
+        return "_compressed.pdf"
+    return CONVERT_FORMATS["excel" if fmt == VIA_WORD_FORMAT else fmt]
+
+
+def collect_inputs(inputs, staging_dir, recursive=False):
+    """
+    Resolve input paths to (key, pdf_path) pairs. The key is the path
+    relative to the input it was found in, under the name of that directory
+    or archive, and also names the outputs; zip members are extracted to
+    staging_dir first.
+
+    Raises:
+        ValueError: If two inputs map to the same key (and so the same outputs)
+    """
+    found = []
+    for source in inputs:
+        if os.path.isdir(source):
+            source_name = os.path.basename(os.path.abspath(source))
+            for root, dirs, files in os.walk(source):
+                if not recursive:
+                    dirs.clear()
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                for name in sorted(files):
+                    if name.lower().endswith(".pdf"):
+                        path = os.path.join(root, name)
+                        found.append((os.path.join(source_name, os.path.relpath(path, source)), path))
+        elif zipfile.is_zipfile(source):
+            archive_name = os.path.splitext(os.path.basename(source))[0]
+            with zipfile.ZipFile(source) as archive:
+                for member in archive.infolist():
+                    if member.is_dir() or not member.filename.lower().endswith(".pdf"):
+                        continue
+                    key = os.path.join(archive_name, os.path.normpath(member.filename).lstrip("./\\"))
+                    target = os.path.join(staging_dir, key)
+                    # Re-extract only members that changed since the last run; the
+                    # new mtime then makes the input hash be recomputed
+                    if not (os.path.exists(target) and os.path.getsize(target) == member.file_size
+                            and _file_crc(target) == member.CRC):
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        with archive.open(member) as src, open(target, 'wb') as dst:
+                            shutil.copyfileobj(src, dst)
+                    found.append((key, target))
+        elif os.path.isfile(source) and source.lower().endswith(".pdf"):
+            found.append((os.path.basename(source), source))
+        else:
+            print(f"⚠️ Skipping {source}: not a directory, PDF or zip archive", file=sys.stderr)
+
+    sources = {}
+    for key, path in found:
+        sources.setdefault(key, []).append(path)
+    clashes = {key: paths for key, paths in sources.items() if len(paths) > 1}
+    if clashes:
+        raise ValueError("inputs would write the same outputs: " + "; ".join(
+            f"{key} <- {', '.join(paths)}" for key, paths in sorted(clashes.items())))
+    return found
+
+
+def load_manifest(path):
+    """Latest entry per (input key, format); a torn last line is ignored."""
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[(entry["input"], entry["format"])] = entry
+    return entries
+
+
+def append_manifest(f, entry):
+    f.write(json.dumps(entry) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _input_hash(path, previous, hashes):
+    """Hash an input, reusing the manifest hash if it is for this file and size and mtime match."""
+    if path in hashes:
+        return hashes[path]
+    stat = os.stat(path)
+    if previous and previous.get("input_path") == os.path.abspath(path) \
+            and previous.get("input_size") == stat.st_size \
+            and previous.get("input_mtime_ns") == stat.st_mtime_ns:
+        hashes[path] = previous["input_sha256"]
+    else:
+        hashes[path] = file_digest(path)
+    return hashes[path]
+
+
+def entry_is_valid(entry, input_sha256, options, verify=False):
+    """True if a manifest entry still describes an up-to-date output."""
+    if not entry or entry.get("status") != "ok":
+        return False
+    if entry["input_sha256"] != input_sha256 or entry["options"] != options:
+        return False
+    output = entry["output"]
+    if not os.path.exists(output):
+        return False
+    stat = os.stat(output)
+    if stat.st_size != entry["output_size"]:
+        return False
+    if verify or stat.st_mtime_ns != entry["output_mtime_ns"]:
+        return file_digest(output) == entry["output_sha256"]
+    return True
+
+
+def run_task(pdf_path, fmt, output_path, options):
+    """Convert one file in a worker; returns the result or raises."""
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    if fmt == "compress":
+        result = compress(pdf_path, output_path, options["quality"], workers=1)
+    elif fmt == VIA_WORD_FORMAT:
+        from pdf_to_excel_via_word_pipeline import convert_pdf_to_excel
+        if not convert_pdf_to_excel(pdf_path, output_path):
+            raise RuntimeError("excel conversion via Word failed")
+        result = {"output_path": output_path, "size": os.path.getsize(output_path)}
+    else:
+        result = convert(pdf_path, fmt, output_path, workers=1, pages=options.get("pages"))
+    pages = 0
+    try:
+        from page_selection import page_count, parse_pages
+        pages = len(parse_pages(options.get("pages"), page_count(pdf_path)))
+    except Exception:
+        pass
+    stat = os.stat(output_path)
+    return {
+        "output_sha256": file_digest(output_path),
+        "output_size": stat.st_size,
+        "output_mtime_ns": stat.st_mtime_ns,
+        "pages": pages,
+        "duration_ms": int((time.perf_counter() - started) * 1000),
+        "result": result,
+    }
+
+
+def batch_convert(inputs, formats, output_dir, workers=None, quality="medium",
+                  recursive=False, verify=False, force=False, pages=None):
+    """
+    Convert all inputs to every format, skipping conversions the manifest
+    shows are up to date. pages ("1-3,10,40-") applies to every format
+    except compress and excel-via-word.
+
+    Returns:
+        Dict with total, converted, skipped, failed, pages, seconds and
+        throughput figures
+    """
+    if "excel" in formats and VIA_WORD_FORMAT in formats:
+        raise ValueError(f"excel and {VIA_WORD_FORMAT} would write the same .xlsx outputs")
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    sources = collect_inputs(inputs, os.path.join(output_dir, STAGING_DIR_NAME), recursive)
+
+    # Plan: every (input, format) whose manifest entry is missing or stale
+    tasks = []
+    skipped = 0
+    hashes = {}
+    for key, pdf_path in sources:
+        for fmt in formats:
+            if fmt == "compress":
+                options = {"quality": quality}
+            elif fmt == VIA_WORD_FORMAT:
+                options = {}
+            else:
+                options = {"pages": pages} if pages else {}
+            previous = manifest.get((key, fmt))
+            input_sha256 = _input_hash(pdf_path, previous, hashes)
+            if not force and entry_is_valid(previous, input_sha256, options, verify):
+                skipped += 1
+                continue
+            output_path = os.path.join(output_dir, os.path.splitext(key)[0] + _output_suffix(fmt))
+            tasks.append((key, pdf_path, fmt, output_path, options, input_sha256))
+
+    total = len(sources) * len(formats)
+    print(f"📦 {len(sources)} PDF(s) x {len(formats)} format(s): {len(tasks)} to convert, "
+          f"{skipped} up to date", file=sys.stderr)
+
+    converted = failed = pages = input_bytes = 0
+    started = time.perf_counter()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks) or 1))
+    with open(manifest_path, 'a', encoding='utf-8') as manifest_file, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        futures = {executor.submit(run_task, *task[1:5]): task for task in tasks}
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                key, pdf_path, fmt, output_path, options, input_sha256 = futures[future]
+                stat = os.stat(pdf_path)
+                entry = {
+                    "input": key,
+                    "input_path": os.path.abspath(pdf_path),
+                    "format": fmt,
+                    "options": options,
+                    "input_sha256": input_sha256,
+                    "input_size": stat.st_size,
+                    "input_mtime_ns": stat.st_mtime_ns,
+                    "output": output_path,
+                    "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                }
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    failed += 1
+                    append_manifest(manifest_file, {**entry, "status": "failed", "error": str(e)})
+                    print(f"   ✗ [{done}/{len(tasks)}] {key} -> {fmt}: {e}", file=sys.stderr)
+                    continue
+                converted += 1
+                pages += outcome["pages"]
+                input_bytes += stat.st_size
+                append_manifest(manifest_file, {
+                    **entry,
+                    "status": "ok",
+                    "output_sha256": outcome["output_sha256"],
+                    "output_size": outcome["output_size"],
+                    "output_mtime_ns": outcome["output_mtime_ns"],
+                    "pages": outcome["pages"],
+                    "duration_ms": outcome["duration_ms"],
+                })
+                print(f"   ✓ [{done}/{len(tasks)}] {key} -> {fmt} "
+                      f"({outcome['duration_ms'] / 1000:.1f}s)", file=sys.stderr)
+        except KeyboardInterrupt:
+            # Finished conversions are already in the manifest; rerun to resume
+            for future in futures:
+                future.cancel()
+            print(f"⚠️ Interrupted - rerun the same command to resume", file=sys.stderr)
+            raise
+
+    seconds = time.perf_counter() - started
+    return {
+        "total": total,
+        "converted": converted,
+        "skipped": skipped,
+        "failed": failed,
+        "pages": pages,
+        "seconds": round(seconds, 2),
+        "files_per_second": round(converted / seconds, 2) if seconds else 0.0,
+        "pages_per_second": round(pages / seconds, 2) if seconds else 0.0,
+        "mb_per_second": round(input_bytes / 1e6 / seconds, 2) if seconds else 0.0,
+        "workers": workers,
+        "manifest": manifest_path,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert many PDFs in parallel, resumably")
+    parser.add_argument("inputs", nargs="+", help="Directories, PDF files or zip archives")
+    parser.add_argument("--formats", required=True,
+                        help=f"Comma-separated target formats: {', '.join(BATCH_FORMATS)}")
+    parser.add_argument("--output-dir", default="converted", help="Output directory (holds the manifest)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (CPU count if omitted)")
+    parser.add_argument("--quality", default="medium", help="Compression quality for 'compress'")
+    parser.add_argument("--pages", default=None, help="Page selection, e.g. 1-3,10,40- (not for compress)")
+    parser.add_argument("--recursive", action="store_true", help="Include subdirectories")
+    parser.add_argument("--verify", action="store_true",
+                        help="Re-hash existing outputs instead of trusting size and mtime")
+    parser.add_argument("--force", action="store_true", help="Convert everything, ignoring the manifest")
+    args = parser.parse_args()
+
+    formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in BATCH_FORMATS]
+    if not formats or unknown:
+        parser.error(f"unknown format(s) {', '.join(unknown)}; choose from {', '.join(BATCH_FORMATS)}")
+
+    try:
+        summary = batch_convert(args.inputs, formats, args.output_dir, args.workers, args.quality,
+                                args.recursive, args.verify, args.force, args.pages)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(2)
+
+    print("=" * 80)
+    print("Batch Conversion Summary")
+    print("=" * 80)
+    print(f"Conversions:    {summary['total']}")
+    print(f"Converted:      {summary['converted']}")
+    print(f"Up to date:     {summary['skipped']}")
+    print(f"Failed:         {summary['failed']}")
+    print(f"Elapsed:        {summary['seconds']}s with {summary['workers']} worker(s)")
+    print(f"Throughput:     {summary['files_per_second']} files/s, "
+          f"{summary['pages_per_second']} pages/s, {summary['mb_per_second']} MB/s")
+    print(f"Manifest:       {summary['manifest']}")
+    print("=" * 80)
+    sys.exit(0 if summary["failed"] == 0 else 1)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark: separate PyPDF2 scripts vs the one-pass secure_pdf.py engine
+
+The legacy flow runs the PyPDF2 paths of compress_pdf.py, set_permissions.py
+and encrypt_pdf.py, each doing its own full read/copy/write. The engine does
+lossless compression, permissions and AES-256 encryption in one PyMuPDF
+open/save. Each step runs in a fresh process so peak memory is per step.
+
+Usage:
+    python benchmark_secure_pdf.py <input_pdf> [--repeat N]
+    python benchmark_secure_pdf.py --generate-mb 1024 [--keep]
+"""
+
+import sys
+import os
+import io
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:
+    HAS_RESOURCE = False
+
+try:
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+    print("Warning: PyMuPDF not available", file=sys.stderr)
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+    print("Warning: Pillow not available", file=sys.stderr)
+
+OWNER_PASSWORD = "owner-benchmark"
+USER_PASSWORD = "user-benchmark"
+
+# Side of the noise images used to build synthetic inputs (~1.5 MB JPEG each)
+NOISE_IMAGE_SIDE = 1000
+
+
+def generate_pdf(path, size_mb):
+    """Write a PDF of roughly size_mb megabytes made of distinct noise images."""
+    if not (HAS_PYMUPDF and HAS_PIL):
+        raise RuntimeError("PyMuPDF and Pillow are required to generate inputs")
+    target = size_mb * 1024 * 1024
+    doc = fitz.open()
+    written = 0
+    while written < target:
+        noise = Image.frombytes("RGB", (NOISE_IMAGE_SIDE, NOISE_IMAGE_SIDE),
+                                os.urandom(NOISE_IMAGE_SIDE * NOISE_IMAGE_SIDE * 3))
+        buffer = io.BytesIO()
+        noise.save(buffer, format="JPEG", quality=90)
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Benchmark page {len(doc)}")
+        page.insert_image(fitz.Rect(72, 100, 540, 568), stream=buffer.getvalue())
+        written += len(buffer.getvalue())
+    pages = len(doc)
+    doc.save(path)
+    doc.close()
+    print(f"[Benchmark] Generated {path}: {os.path.getsize(path)} bytes, {pages} pages")
+
+
+def _timed(step, *args):
+    """Run one step in this (worker) process and report time and peak memory."""
+    started = time.perf_counter()
+    result = step(*args)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if HAS_RESOURCE else 0
+    return result, elapsed, peak_kb
+
+
+def _legacy_compress(input_path, output_path):
+    from compress_pdf import _compress_with_pypdf2
+    _compress_with_pypdf2(input_path, output_path)
+    return os.path.exists(output_path)
+
+
+def _legacy_permissions(input_path, output_path):
+    from set_permissions import _set_permissions_with_pypdf2
+    return _set_permissions_with_pypdf2(input_path, output_path, OWNER_PASSWORD, True, False, False)
+
+
+def _legacy_encrypt(input_path, output_path):
+    from encrypt_pdf import _encrypt_with_pypdf2
+    return _encrypt_with_pypdf2(input_path, output_path, USER_PASSWORD, OWNER_PASSWORD)
+
+
+def _engine(input_path, output_path):
+    from secure_pdf import secure_pdf, permission_flags
+    success, _, _ = secure_pdf(input_path, output_path, quality=75, mode="structure",
+                               user_password=USER_PASSWORD, owner_password=OWNER_PASSWORD,
+                               permissions=permission_flags(True, False, False),
+                               encryption="aes-256")
+    return success
+
+
+def _run_step(step, *args):
+    # A fresh single-worker pool per step keeps ru_maxrss per step
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(_timed, step, *args).result()
+
+
+def run_benchmark(input_path, work_dir, repeat=1):
+    """
+    Time the legacy three-script flow against the one-pass engine
+
+    Returns:
+        Dict with per-step and total seconds, peak memory and output sizes
+    """
+    compressed = os.path.join(work_dir, "legacy_compressed.pdf")
+    restricted = os.path.join(work_dir, "legacy_restricted.pdf")
+    encrypted = os.path.join(work_dir, "legacy_encrypted.pdf")
+    engine_out = os.path.join(work_dir, "engine.pdf")
+
+    # PyPDF2 cannot re-read its own restricted output without decrypting it
+    # first, so the legacy encrypt step starts from the compressed file as the
+    # frontend's separate encrypt action would
+    legacy_steps = (
+        ("compress", _legacy_compress, input_path, compressed),
+        ("permissions", _legacy_permissions, compressed, restricted),
+        ("encrypt", _legacy_encrypt, compressed, encrypted),
+    )
+
+    results = {"input_bytes": os.path.getsize(input_path), "runs": []}
+    for run in range(repeat):
+        legacy = {}
+        for name, step, step_input, output in legacy_steps:
+            ok, elapsed, peak_kb = _run_step(step, step_input, output)
+            legacy[name] = {"ok": bool(ok), "seconds": round(elapsed, 3), "peak_rss_kb": peak_kb,
+                            "output_bytes": os.path.getsize(output) if os.path.exists(output) else 0}
+            print(f"[Benchmark] run {run + 1} legacy {name}: {elapsed:.2f}s")
+        ok, elapsed, peak_kb = _run_step(_engine, input_path, engine_out)
+        engine = {"ok": bool(ok), "seconds": round(elapsed, 3), "peak_rss_kb": peak_kb,
+                  "output_bytes": os.path.getsize(engine_out) if os.path.exists(engine_out) else 0}
+        print(f"[Benchmark] run {run + 1} engine: {elapsed:.2f}s")
+
+        legacy_total = sum(step["seconds"] for step in legacy.values())
+        results["runs"].append({
+            "legacy": legacy,
+            "legacy_total_seconds": round(legacy_total, 3),
+            "engine": engine,
+            "speedup": round(legacy_total / engine["seconds"], 2) if engine["seconds"] else None,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the one-pass secure output engine")
+    parser.add_argument("input_pdf", nargs="?", help="Input PDF file")
+    parser.add_argument("--generate-mb", type=int, default=None,
+                        help="Generate a synthetic input of this many megabytes (e.g. 1024)")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of runs")
+    parser.add_argument("--keep", action="store_true", help="Keep generated and output files")
+    args = parser.parse_args()
+
+    if not args.input_pdf and not args.generate_mb:
+        parser.error("an input_pdf or --generate-mb is required")
+
+    work_dir = tempfile.mkdtemp(prefix="secure_pdf_bench_")
+    input_pdf = args.input_pdf
+    if args.generate_mb:
+        input_pdf = os.path.join(work_dir, "input.pdf")
+        generate_pdf(input_pdf, args.generate_mb)
+
+    try:
+        report = run_benchmark(input_pdf, work_dir, args.repeat)
+        print(f"BENCHMARK:{json.dumps(report)}")
+    finally:
+        if not args.keep:
+            for name in os.listdir(work_dir):
+                os.remove(os.path.join(work_dir, name))
+            os.rmdir(work_dir)
+        else:
+            print(f"[Benchmark] Files kept in {work_dir}")
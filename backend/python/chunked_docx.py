@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Chunked pdf2docx Conversion
+Parses the selected pages in chunks of CHUNK_PAGES, each chunk in its own
+worker process (at most `workers` at a time, each with a timeout), and
+keeps every finished chunk in the layout cache (layout_cache.py) as its
+checkpoint. A chunk that fails or times out is retried, then split into
+single pages, so a bad page costs only itself; pages that still fail are
+left out of the document and reported.
+
+The finished chunk layouts are restored into one Converter and written with
+a single make_docx(), the same way pdf2docx merges its own multiprocessing
+results. With the layout cache on (LAYOUT_CACHE_DIR or --cache-dir), a
+rerun after a crash re-parses only the chunks that never finished; once the
+merged layout is cached, the checkpoints are removed so a document is not
+stored twice. With the cache off the checkpoints live in the job's scratch
+directory: they still spare retries the finished chunks, but are gone with
+the job, so a rerun starts over. Given a stop time (a conversion deadline),
+chunks still running then are stopped and their pages reported as skipped,
+not retried.
+
+Usage:
+    python chunked_docx.py <input_pdf> <output_docx> [--pages 1-3,10]
+        [--chunk-pages 10] [--workers N] [--timeout 300]
+"""
+
+import sys
+import os
+import time
+import argparse
+import multiprocessing
+from contextlib import ExitStack
+from multiprocessing.connection import wait
+
+from layout_cache import (DEFAULT_CACHE_DIR, file_digest, layout_key, has_layout, load_layout,
+                          save_layout, drop_layout, parse_layout, pdf2docx_converter)
+from page_selection import select_pages, page_count, page_runs, pdf2docx_page_args
+from scratch import job_scratch
+
+# Pages per chunk: small enough that a failure wastes little work
+CHUNK_PAGES = 10
+# Seconds a single chunk may take before its worker is killed
+CHUNK_TIMEOUT = 300
+# Attempts at a whole chunk before it is split into single pages
+CHUNK_RETRIES = 1
+
+# Chunks parse with page errors raised, so a bad page fails its chunk
+# instead of silently disappearing from the document
+CHUNK_SETTINGS = {"ignore_page_error": False}
+
+
+def make_chunks(indexes, chunk_pages=CHUNK_PAGES):
+    """Split sorted page indexes into contiguous (start, stop) chunks."""
+    chunks = []
+    for start, stop in page_runs(indexes):
+        for first in range(start, stop, chunk_pages):
+            chunks.append((first, min(first + chunk_pages, stop)))
+    return chunks
+
+
+def _chunk_args(chunk):
+    return {"start": chunk[0], "end": chunk[1]}
+
+
+def _label(chunk):
+    start, stop = chunk
+    return f"Page {stop}" if stop - start == 1 else f"Pages {start + 1}-{stop}"
+
+
+def _parse_chunk(pdf_path, chunk, cache_dir, digest):
+    """Worker process: parse one chunk into the cache; the exit code reports success."""
+    try:
+        parse_layout(pdf_path, _chunk_args(chunk), cache_dir, digest, prune=False, **CHUNK_SETTINGS)
+    except Exception as e:
+        print(f"   ✗ {_label(chunk)}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def parse_chunked(pdf_path, indexes=None, chunk_pages=CHUNK_PAGES, workers=None,
+                  timeout=CHUNK_TIMEOUT, retries=CHUNK_RETRIES, cache_dir=DEFAULT_CACHE_DIR,
+                  stop_at=None):
+    """
+    The pdf2docx layout of the selected pages (None for all), parsed chunk
+    by chunk in worker processes; finished chunks are read back from the
+    cache on a rerun. Chunks not finished by stop_at (time.monotonic()) are
+    stopped and their pages skipped.
+
+    Returns:
+        Tuple of (merged Converter.store() dict, summary dict with chunks,
+        cached, parsed, retried, failed_pages, skipped_pages and seconds)
+    """
+    started = time.perf_counter()
+    digest = file_digest(pdf_path)
+    full_key = layout_key(pdf_path, pdf2docx_page_args(indexes), digest=digest)
+    summary = {"chunks": 0, "cached": 0, "parsed": 0, "retried": 0, "failed_pages": [],
+               "skipped_pages": []}
+
+    layout = load_layout(full_key, cache_dir)
+    if layout is not None:
+        summary["seconds"] = round(time.perf_counter() - started, 2)
+        return layout, summary
+
+    # Checkpoints need a directory even when caching is turned off; the job's
+    # scratch directory holds them for this run only
+    scratch = not cache_dir
+    with ExitStack() as stack:
+        if scratch:
+            cache_dir = stack.enter_context(job_scratch("pdf2docx-chunks"))
+
+        if indexes is None:
+            indexes = list(range(page_count(pdf_path)))
+        chunks = make_chunks(indexes, chunk_pages)
+        summary["chunks"] = len(chunks)
+
+        def chunk_key(chunk):
+            return layout_key(pdf_path, _chunk_args(chunk), CHUNK_SETTINGS, digest)
+
+        pending = []
+        for chunk in chunks:
+            if has_layout(chunk_key(chunk), cache_dir):
+                summary["cached"] += 1
+                continue
+            singles = [(index, index + 1) for index in range(*chunk)]
+            done = [single for single in singles if has_layout(chunk_key(single), cache_dir)]
+            if done and chunk[1] - chunk[0] > 1:
+                # Split on an earlier run: only its unfinished pages are left
+                summary["cached"] += 1
+                pending.extend(single for single in singles if single not in done)
+            else:
+                pending.append(chunk)
+        print(f"📚 {len(chunks)} chunk(s) of up to {chunk_pages} page(s): "
+              f"{summary['cached']} already parsed, {len(pending)} to parse", file=sys.stderr)
+
+        attempts = {}
+        running = {}
+        workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+        context = multiprocessing.get_context()
+
+        def failed(chunk, reason):
+            attempts[chunk] = attempts.get(chunk, 0) + 1
+            if attempts[chunk] <= retries:
+                summary["retried"] += 1
+                print(f"   ↻ {_label(chunk)} {reason}, retrying", file=sys.stderr)
+                pending.append(chunk)
+            elif chunk[1] - chunk[0] > 1:
+                print(f"   ↻ {_label(chunk)} {reason}, splitting into single pages", file=sys.stderr)
+                pending.extend((index, index + 1) for index in range(*chunk))
+            else:
+                print(f"   ✗ {_label(chunk)} {reason}, leaving it out", file=sys.stderr)
+                summary["failed_pages"].append(chunk[0] + 1)
+
+        def out_of_time(chunk):
+            print(f"   ⏱ {_label(chunk)} not parsed before the deadline", file=sys.stderr)
+            summary["skipped_pages"].extend(range(chunk[0] + 1, chunk[1] + 1))
+
+        while pending or running:
+            if stop_at is not None and time.monotonic() >= stop_at:
+                for process, chunk, _ in running.values():
+                    process.terminate()
+                    process.join()
+                    out_of_time(chunk)
+                for chunk in pending:
+                    out_of_time(chunk)
+                running.clear()
+                pending.clear()
+                break
+
+            while pending and len(running) < workers:
+                chunk = pending.pop(0)
+                process = context.Process(target=_parse_chunk, args=(pdf_path, chunk, cache_dir, digest))
+                process.start()
+                deadline = time.monotonic() + timeout
+                running[process.sentinel] = (process, chunk, deadline if stop_at is None else min(deadline, stop_at))
+
+            next_deadline = min(deadline for _, _, deadline in running.values())
+            ready = wait(list(running), timeout=max(0.0, next_deadline - time.monotonic()))
+
+            for sentinel in ready:
+                process, chunk, _ = running.pop(sentinel)
+                process.join()
+                if process.exitcode == 0 and has_layout(chunk_key(chunk), cache_dir):
+                    summary["parsed"] += 1
+                    print(f"   ✓ {_label(chunk)}", file=sys.stderr)
+                else:
+                    failed(chunk, f"failed (exit code {process.exitcode})")
+
+            now = time.monotonic()
+            for sentinel, (process, chunk, deadline) in list(running.items()):
+                if now >= deadline and not (stop_at is not None and now >= stop_at):
+                    process.terminate()
+                    process.join()
+                    del running[sentinel]
+                    failed(chunk, f"timed out after {timeout}s")
+
+        # Merge in page order; split chunks are stored under their own keys
+        merged = {"filename": os.path.basename(pdf_path), "page_cnt": page_count(pdf_path), "pages": []}
+        failed_pages = set(summary["failed_pages"]) | set(summary["skipped_pages"])
+        for chunk in chunks:
+            layout = load_layout(chunk_key(chunk), cache_dir)
+            if layout is None and chunk[1] - chunk[0] > 1:
+                layouts = [load_layout(chunk_key((index, index + 1)), cache_dir)
+                           for index in range(*chunk) if index + 1 not in failed_pages]
+            else:
+                layouts = [layout]
+            for part in layouts:
+                if part is not None:
+                    merged["pages"].extend(part.get("pages", []))
+
+        if not merged["pages"]:
+            raise RuntimeError("pdf2docx could not parse any of the selected pages")
+
+        # Only a complete layout is shared with other conversions; it
+        # replaces the checkpoints it was merged from
+        if not failed_pages and not scratch:
+            save_layout(full_key, merged, cache_dir)
+            if has_layout(full_key, cache_dir):
+                for chunk in chunks:
+                    drop_layout(chunk_key(chunk), cache_dir)
+                    if chunk[1] - chunk[0] > 1:
+                        for index in range(*chunk):
+                            drop_layout(chunk_key((index, index + 1)), cache_dir)
+
+    summary["failed_pages"].sort()
+    summary["skipped_pages"].sort()
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    return merged, summary
+
+
+def convert_chunked(pdf_path, output_docx, indexes=None, chunk_pages=CHUNK_PAGES, workers=None,
+                    timeout=CHUNK_TIMEOUT, retries=CHUNK_RETRIES, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Convert the selected pages to .docx with chunked, checkpointed parsing
+
+    Returns:
+        Summary dict from parse_chunked()
+    """
+    Converter = pdf2docx_converter()
+
+    layout, summary = parse_chunked(pdf_path, indexes, chunk_pages, workers, timeout, retries, cache_dir)
+    cv = Converter(pdf_path)
+    try:
+        cv.restore(layout)
+        cv.make_docx(output_docx)
+    finally:
+        cv.close()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a PDF to Word in checkpointed page chunks")
+    parser.add_argument("input_pdf", help="Input PDF")
+    parser.add_argument("output_docx", help="Output .docx")
+    parser.add_argument("--pages", default=None, help="Page selection, e.g. 1-3,10,40-")
+    parser.add_argument("--chunk-pages", type=int, default=CHUNK_PAGES, help="Pages per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (CPU count if omitted)")
+    parser.add_argument("--timeout", type=float, default=CHUNK_TIMEOUT, help="Seconds allowed per chunk")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Layout cache / checkpoint directory; reruns resume only with one "
+                             "(default LAYOUT_CACHE_DIR)")
+    args = parser.parse_args()
+
+    try:
+        summary = convert_chunked(args.input_pdf, args.output_docx, select_pages(args.input_pdf, args.pages),
+                                  max(1, args.chunk_pages), args.workers, args.timeout, cache_dir=args.cache_dir)
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ {args.output_docx}: {summary['chunks']} chunk(s), {summary['cached']} from cache, "
+          f"{summary['parsed']} parsed, {summary['retried']} retried in {summary['seconds']}s", file=sys.stderr)
+    if summary["failed_pages"]:
+        print(f"⚠️ Pages left out: {', '.join(map(str, summary['failed_pages']))}", file=sys.stderr)
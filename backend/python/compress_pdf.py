@@ -1,71 +1,1004 @@
 #!/usr/bin/env python3
 """
-PDF Compression Script using PyPDF2
-Compresses PDF by removing duplicate objects and optimizing content streams
+PDF Compression Script
+Two independently selectable passes built on PyMuPDF:
+- images:    lossy downsampling and JPEG recompression of embedded images
+- structure: lossless object deduplication, garbage collection, font
+             subsetting and compressed object/xref streams
+Falls back to PyPDF2 content stream compression when PyMuPDF is not available.
+With --deadline SECONDS, repeated deduplication rounds, images not
+recompressed in time and font subsetting are skipped; the '[Deadline]' line
+reports what was left out.
 """
 
 import sys
 import os
-from PyPDF2 import PdfReader, PdfWriter
+import io
+import re
+import math
+import json
+import time
+import zlib
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def compress_pdf(input_path, output_path, quality):
+from deadline import as_deadline
+
+try:
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+    print("Warning: PyMuPDF not available - image compression disabled", file=sys.stderr)
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+    print("Warning: Pillow not available - image compression disabled", file=sys.stderr)
+
+try:
+    from PyPDF2 import PdfReader, PdfWriter
+    HAS_PYPDF2 = True
+except ImportError:
+    HAS_PYPDF2 = False
+
+# Images whose effective resolution is within this factor of the target are
+# re-encoded at their current size instead of being resampled
+DOWNSAMPLE_THRESHOLD = 1.2
+
+# Filters that already compress bilevel scans better than JPEG would
+SKIP_FILTERS = ("/JBIG2Decode", "/CCITTFaxDecode")
+
+# Below this many images the process pool costs more than it saves
+MIN_IMAGES_FOR_POOL = 3
+
+# 'auto' picks one of the others from the pdf_anatomy.py report
+COMPRESSION_MODES = ("all", "images", "structure", "auto")
+
+# Merging one set of duplicates can make their parents identical (e.g. images
+# sharing a deduplicated ICC profile), so deduplication runs a few rounds
+MAX_DEDUP_ROUNDS = 3
+
+# Quality levels the estimator projects sizes for
+ESTIMATE_QUALITIES = (25, 50, 75, 90)
+
+# How far (percent of the actual size) an estimate may be off before
+# 'compress_pdf.py --estimate --check' reports it as wrong; small files are
+# dominated by fixed overhead, so a few KB off is always accepted
+ESTIMATE_TOLERANCE = 25
+ESTIMATE_SLACK_BYTES = 4096
+
+# The estimator trial-encodes a tile of at most this many pixels - for
+# larger images a TRIAL_GRID x TRIAL_GRID mosaic of patches from all over the
+# image - and scales the encoded size by area, which keeps sampling of huge
+# scans cheap
+TRIAL_TILE_AREA = 512 * 512
+TRIAL_GRID = 4
+
+# Page tree nodes and annotations must stay distinct objects per page
+UNMERGEABLE_TYPES = ("/Page", "/Pages", "/Catalog", "/Annot")
+
+# Structure estimate: objects sampled to trial-deflate object streams, and
+# the bytes a stream object and an xref stream entry add around the data
+OBJECT_SAMPLE = 2000
+STREAM_OBJECT_OVERHEAD = 40
+XREF_ENTRY_BYTES = 3
+
+_REF_RE = re.compile(r"(?<![\d.])(\d+) (\d+) R\b")
+_SUBSET_NAME_RE = re.compile(r"/FontName /[A-Z]{6}\+")
+_LENGTH_RE = re.compile(r"/Length \d+( \d+ R)?")
+
+_worker_doc = None
+
+
+def target_dpi_for_quality(quality):
+    """Map the 1-100 quality setting to a target effective image DPI."""
+    if quality >= 90:
+        return 300
+    if quality >= 75:
+        return 200
+    if quality >= 50:
+        return 150
+    return 96
+
+
+def jpeg_quality_for_quality(quality):
+    """Clamp the 1-100 quality setting to a sensible JPEG quality."""
+    return max(10, min(95, int(quality)))
+
+
+def collect_image_placements(doc):
+    """
+    Find every image xref once together with its largest on-page placement
+
+    Placements are matched to xrefs by pixel size, because asking PyMuPDF for
+    xrefs directly decodes and hashes every image. Images sharing a size on
+    one page all get the largest placement, which never over-downsamples.
+
+    Returns:
+        Dict of xref -> (width_pt, height_pt) of the largest placement
+    """
+    placements = {}
+    for page in doc:
+        xrefs_by_size = {}
+        for item in page.get_images(full=True):
+            xrefs_by_size.setdefault((item[2], item[3]), []).append(item[0])
+        for info in page.get_image_info():
+            a, b, c, d = info["transform"][:4]
+            width_pt = math.hypot(a, b)
+            height_pt = math.hypot(c, d)
+            # Inline images have no xref and cannot be rewritten in place
+            for xref in xrefs_by_size.get((info["width"], info["height"]), ()):
+                prev_w, prev_h = placements.get(xref, (0.0, 0.0))
+                placements[xref] = (max(prev_w, width_pt), max(prev_h, height_pt))
+    return placements
+
+
+def stream_length(doc, xref):
+    """Read a stream's raw length from its /Length entry without loading it."""
+    kind, value = doc.xref_get_key(xref, "Length")
+    try:
+        if kind == "int":
+            return int(value)
+        if kind == "xref":
+            return int(doc.xref_object(int(value.split()[0]), compressed=True))
+    except ValueError:
+        pass
+    return len(doc.xref_stream_raw(xref) or b"")
+
+
+def _is_recompressible(doc, xref):
+    """Check whether an image xref can safely be re-encoded as JPEG."""
+    if doc.xref_get_key(xref, "ImageMask")[1] == "true":
+        return False
+    if doc.xref_get_key(xref, "BitsPerComponent")[1] == "1":
+        return False
+    image_filter = doc.xref_get_key(xref, "Filter")[1]
+    if any(name in image_filter for name in SKIP_FILTERS):
+        return False
+    # Decode arrays and colour-key masks do not survive a colour space change
+    if doc.xref_get_key(xref, "Decode")[0] != "null":
+        return False
+    if doc.xref_get_key(xref, "Mask")[0] == "array":
+        return False
+    return True
+
+
+def plan_image_jobs(doc, target_dpi, placements=None):
+    """
+    Build one recompression job per image xref
+
+    Args:
+        doc: Open PyMuPDF document
+        target_dpi: Target effective resolution at the largest placement
+        placements: Result of collect_image_placements, computed if None
+
+    Returns:
+        List of job dicts with xref, target pixel size and original stream size
+    """
+    if placements is None:
+        placements = collect_image_placements(doc)
+    jobs = []
+    for xref, (width_pt, height_pt) in placements.items():
+        if not _is_recompressible(doc, xref):
+            continue
+        try:
+            width_px = int(doc.xref_get_key(xref, "Width")[1])
+            height_px = int(doc.xref_get_key(xref, "Height")[1])
+        except ValueError:
+            continue
+        if width_px <= 0 or height_px <= 0 or width_pt <= 0 or height_pt <= 0:
+            continue
+
+        effective_dpi = min(width_px / (width_pt / 72.0), height_px / (height_pt / 72.0))
+        if effective_dpi > target_dpi * DOWNSAMPLE_THRESHOLD:
+            scale = target_dpi / effective_dpi
+            target_w = max(1, int(round(width_px * scale)))
+            target_h = max(1, int(round(height_px * scale)))
+        else:
+            target_w, target_h = width_px, height_px
+
+        jobs.append({
+            "xref": xref,
+            "width": width_px,
+            "height": height_px,
+            "target_width": target_w,
+            "target_height": target_h,
+            "effective_dpi": effective_dpi,
+            "original_bytes": stream_length(doc, xref),
+            "filter": doc.xref_get_key(xref, "Filter")[1],
+        })
+    return jobs
+
+
+def _init_worker(input_path):
+    """Open the source PDF once per worker process."""
+    global _worker_doc
+    _worker_doc = fitz.open(input_path)
+
+
+def _decode_image(doc, job):
+    """Decode an image xref to an RGB or grayscale PIL image."""
+    xref = job["xref"]
+    target_size = (job["target_width"], job["target_height"])
+
+    # Plain RGB/gray JPEGs can be decoded at reduced scale by libjpeg directly
+    if job["filter"] == "/DCTDecode":
+        try:
+            img = Image.open(io.BytesIO(doc.xref_stream_raw(xref)))
+            if img.mode in ("RGB", "L"):
+                img.draft(img.mode, target_size)
+                img.load()
+                return img
+        except Exception:
+            pass
+
+    pix = fitz.Pixmap(doc, xref)
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    mode = "L" if pix.n == 1 else "RGB"
+    return Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+
+
+def recompress_image(job, jpeg_quality, doc=None):
+    """
+    Downsample and JPEG-encode a single image
+
+    Args:
+        job: Job dict from plan_image_jobs
+        jpeg_quality: JPEG quality (1-95)
+        doc: Open document, defaults to the worker's document
+
+    Returns:
+        Job dict extended with the encoded bytes and new dimensions,
+        or with an 'error' entry if the image could not be processed
+    """
+    result = dict(job)
+    try:
+        img = _decode_image(doc if doc is not None else _worker_doc, job)
+        target_size = (job["target_width"], job["target_height"])
+        if img.size != target_size:
+            img = img.resize(target_size, Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=jpeg_quality, optimize=True)
+        result.update({
+            "data": buffer.getvalue(),
+            "new_width": img.size[0],
+            "new_height": img.size[1],
+            "colorspace": "/DeviceGray" if img.mode == "L" else "/DeviceRGB",
+        })
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def _write_image(doc, result):
+    """Replace an image stream in place so every page using it benefits."""
+    xref = result["xref"]
+    doc.update_stream(xref, result["data"], compress=False)
+    doc.xref_set_key(xref, "Filter", "/DCTDecode")
+    doc.xref_set_key(xref, "DecodeParms", "null")
+    doc.xref_set_key(xref, "Width", str(result["new_width"]))
+    doc.xref_set_key(xref, "Height", str(result["new_height"]))
+    doc.xref_set_key(xref, "ColorSpace", result["colorspace"])
+    doc.xref_set_key(xref, "BitsPerComponent", "8")
+
+
+def _run_jobs(input_path, jobs, jpeg_quality, workers, doc):
+    """Yield recompression results, using a process pool for larger batches."""
+    if len(jobs) < MIN_IMAGES_FOR_POOL or workers == 1:
+        for job in jobs:
+            yield recompress_image(job, jpeg_quality, doc)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(input_path,)) as executor:
+        futures = [executor.submit(recompress_image, job, jpeg_quality) for job in jobs]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Stopped at the deadline: the images not started are left alone
+            for future in futures:
+                future.cancel()
+
+
+def compress_images(doc, input_path, quality, target_dpi=None, workers=None, deadline=None):
+    """
+    Downsample and recompress every image xref of an open document in place
+
+    Args:
+        doc: Open PyMuPDF document loaded from input_path
+        input_path: Path of the document, re-opened by pool workers
+        quality: Quality level 1-100
+        target_dpi: Target effective DPI (derived from quality if None)
+        workers: Number of worker processes (CPU count if None)
+        deadline: deadline.Deadline (or seconds); images not done by then
+            keep their original data
+
+    Returns:
+        List of per-image savings dicts
+    """
+    deadline = as_deadline(deadline)
+    if target_dpi is None:
+        target_dpi = target_dpi_for_quality(quality)
+    jpeg_quality = jpeg_quality_for_quality(quality)
+    workers = workers or os.cpu_count() or 1
+
+    jobs = plan_image_jobs(doc, target_dpi)
+    print(f"[Compress] Found {len(jobs)} recompressible image(s), target {target_dpi} DPI, JPEG quality {jpeg_quality}")
+
+    savings = []
+    results = _run_jobs(input_path, jobs, jpeg_quality, workers, doc)
+    for done, result in enumerate(results):
+        if deadline.expired():
+            results.close()
+            deadline.skip(f"recompressing {len(jobs) - done} image(s)")
+            break
+        xref = result["xref"]
+        if "error" in result:
+            print(f"[Compress] Image {xref}: skipped ({result['error']})")
+            continue
+
+        new_bytes = len(result["data"])
+        if new_bytes >= result["original_bytes"]:
+            print(f"[Compress] Image {xref}: kept original ({result['original_bytes']} bytes)")
+            continue
+
+        _write_image(doc, result)
+        saved = result["original_bytes"] - new_bytes
+        savings.append({
+            "xref": xref,
+            "original_bytes": result["original_bytes"],
+            "compressed_bytes": new_bytes,
+            "saved_bytes": saved,
+            "original_size": [result["width"], result["height"]],
+            "new_size": [result["new_width"], result["new_height"]],
+            "effective_dpi": round(result["effective_dpi"], 1),
+        })
+        print(f"[Compress] Image {xref}: {result['width']}x{result['height']} -> "
+              f"{result['new_width']}x{result['new_height']}, "
+              f"{result['original_bytes']} -> {new_bytes} bytes "
+              f"(-{saved * 100 / result['original_bytes']:.1f}%)")
+
+    total_saved = sum(item["saved_bytes"] for item in savings)
+    print(f"[Compress] Recompressed {len(savings)} image(s), saved {total_saved} bytes")
+    return savings
+
+
+def count_live_objects(doc):
+    """Count xref entries that hold an object (free entries read as null)."""
+    return sum(1 for xref in range(1, doc.xref_length()) if doc.xref_object(xref, compressed=True) != "null")
+
+
+def _read_object(doc, xref):
+    """
+    Source, raw stream length (None for other objects) and whether the
+    object may be merged at all
+    """
+    source = doc.xref_object(xref, compressed=True)
+    if doc.xref_is_stream(xref):
+        length = _LENGTH_RE.search(source)
+        # A direct /Length is in the source already; indirect ones are looked up
+        if length and not length.group(1):
+            return source, int(length.group(0).split()[1]), True
+        return source, stream_length(doc, xref), True
+    return source, None, source != "null" and doc.xref_get_key(xref, "Type")[1] not in UNMERGEABLE_TYPES
+
+
+def find_duplicate_objects(doc, exclude=(), merged=None, objects=None):
+    """
+    Group identical objects, hashing stream contents
+
+    Streams are first bucketed by their dictionary (minus /Length) and raw
+    length, so only candidates that can be identical have their raw bytes
+    read and hashed.
+    Small non-stream objects (colour space arrays, font descriptors, ...) are
+    compared by their source; page tree nodes are never merged.
+
+    Args:
+        doc: Open PyMuPDF document
+        exclude: Xrefs already merged in an earlier round
+        merged: Duplicate -> canonical xrefs of earlier rounds whose
+            references are not rewritten in the document; sources are
+            compared as if they were
+        objects: Cache of _read_object() results and stream digests for a
+            document that is not changed between rounds
+
+    Returns:
+        Dict of duplicate xref -> canonical xref
+    """
+    stream_buckets = {}
+    canonical_objects = {}
+    duplicates = {}
+    for xref in range(1, doc.xref_length()):
+        if xref in exclude:
+            continue
+        entry = objects.get(xref) if objects is not None else None
+        if entry is None:
+            entry = _read_object(doc, xref)
+            if objects is not None:
+                objects[xref] = entry
+        source, size, mergeable = entry
+        if merged:
+            source = _rewrite_refs(source, merged)
+        if size is not None:
+            stream_buckets.setdefault((_LENGTH_RE.sub("", source), size), []).append(xref)
+        elif mergeable:
+            canonical = canonical_objects.setdefault(source, xref)
+            if canonical != xref:
+                duplicates[xref] = canonical
+
+    for xrefs in stream_buckets.values():
+        if len(xrefs) < 2:
+            continue
+        canonical_by_hash = {}
+        for xref in xrefs:
+            digest = objects.get(("digest", xref)) if objects is not None else None
+            if digest is None:
+                digest = hashlib.sha256(doc.xref_stream_raw(xref) or b"").digest()
+                if objects is not None:
+                    objects[("digest", xref)] = digest
+            canonical = canonical_by_hash.setdefault(digest, xref)
+            if canonical != xref:
+                duplicates[xref] = canonical
+    return duplicates
+
+
+def _replay_deduplication(doc, objects):
+    """
+    The deduplication rounds of the structure pass, replayed without
+    changing the document: references are rewritten in memory only
+
+    Args:
+        doc: Open PyMuPDF document
+        objects: Dict filled with the _read_object() result of every xref
+
+    Returns:
+        Dict of duplicate xref -> canonical xref over all rounds
+    """
+    merged = {}
+    for _ in range(MAX_DEDUP_ROUNDS):
+        duplicates = find_duplicate_objects(doc, exclude=merged, merged=merged, objects=objects)
+        if not duplicates:
+            break
+        # A canonical object of an earlier round may be a duplicate now
+        for xref, canonical in merged.items():
+            merged[xref] = duplicates.get(canonical, canonical)
+        merged.update(duplicates)
+    return merged
+
+
+def find_duplicate_streams(doc):
+    """
+    Streams the structure pass would merge, every match confirmed by
+    hashing the raw stream bytes
+
+    Returns:
+        Dict of duplicate stream xref -> canonical xref
+    """
+    objects = {}
+    merged = _replay_deduplication(doc, objects)
+    return {xref: canonical for xref, canonical in merged.items() if objects[xref][1] is not None}
+
+
+def _rewrite_refs(text, mapping):
+    """Point indirect references at their canonical objects."""
+    def replace(match):
+        target = mapping.get(int(match.group(1)))
+        return f"{target} 0 R" if target else match.group(0)
+    return _REF_RE.sub(replace, text)
+
+
+def redirect_references(doc, mapping):
+    """
+    Replace every reference to a duplicate object with its canonical xref
+
+    Stream objects are updated key by key so their stream data is kept;
+    other objects are rewritten whole.
+    """
+    for xref in range(1, doc.xref_length()):
+        if xref in mapping:
+            continue
+        source = doc.xref_object(xref, compressed=True)
+        if " R" not in source:
+            continue
+        if doc.xref_is_stream(xref):
+            for key in doc.xref_get_keys(xref):
+                value = doc.xref_get_key(xref, key)[1]
+                new_value = _rewrite_refs(value, mapping)
+                if new_value != value:
+                    doc.xref_set_key(xref, key, new_value)
+        else:
+            new_source = _rewrite_refs(source, mapping)
+            if new_source != source:
+                doc.update_object(xref, new_source)
+
+
+def deduplicate_objects(doc, deadline=None):
+    """
+    Merge identical objects and byte-identical streams (fonts, ICC profiles,
+    images, ...); rounds after the first are skipped when behind the deadline
+
+    Returns:
+        Tuple of (merged object count, bytes of merged stream data)
+    """
+    deadline = as_deadline(deadline)
+    merged = set()
+    merged_bytes = 0
+    for round_number in range(MAX_DEDUP_ROUNDS):
+        if round_number and not deadline.optional("further deduplication rounds"):
+            break
+        duplicates = find_duplicate_objects(doc, exclude=merged)
+        if not duplicates:
+            break
+        merged_bytes += sum(len(doc.xref_stream_raw(xref) or b"") for xref in duplicates)
+        redirect_references(doc, duplicates)
+        # The duplicates are unreachable now and get dropped by garbage collection
+        merged.update(duplicates)
+    return len(merged), merged_bytes
+
+
+def optimize_structure(doc, deadline=None):
+    """
+    Deduplicate objects of an open document in place
+
+    Runs before the image pass so shared images are only recompressed once.
+
+    Returns:
+        Report dict with the object count and merged duplicates
+    """
+    objects_before = count_live_objects(doc)
+    merged, merged_bytes = deduplicate_objects(doc, deadline)
+    print(f"[Compress] Merged {merged} duplicate object(s) ({merged_bytes} stream bytes)")
+    return {
+        "objects_before": objects_before,
+        "duplicates_merged": merged,
+        "duplicate_bytes_merged": merged_bytes,
+    }
+
+
+def subset_fonts(doc):
+    """Subset embedded fonts to the glyphs actually used."""
+    try:
+        doc.subset_fonts()
+        print(f"[Compress] Subset embedded fonts")
+    except Exception as e:
+        print(f"[Compress] Font subsetting skipped: {e}")
+
+
+def save_document(doc, output_path, structure, **save_options):
+    """
+    Save with content stream deflate, plus garbage collection and compressed
+    object/xref streams when the structural pass is enabled
+
+    Extra save_options (encryption, permissions, passwords) are passed
+    straight to Document.save so they are applied in the same write.
+    """
+    if not structure:
+        doc.save(output_path, deflate=True, **save_options)
+        return
+    try:
+        doc.save(output_path, garbage=2, deflate=True, use_objstms=1, **save_options)
+    except TypeError:
+        # PyMuPDF before 1.22 cannot write object streams
+        doc.save(output_path, garbage=2, deflate=True, **save_options)
+
+
+def apply_compression(doc, input_path, quality, mode, target_dpi=None, workers=None, deadline=None):
+    """
+    Run the selected image and structural passes on an open document; behind
+    the deadline images are left alone and fonts are not subset
+
+    Returns:
+        Structure report dict, or None when the structural pass did not run
+    """
+    deadline = as_deadline(deadline)
+    structure_report = None
+    print(f"[Compress] Processing {len(doc)} pages (mode: {mode})")
+    if mode in ("all", "structure"):
+        structure_report = optimize_structure(doc, deadline)
+    if mode in ("all", "images"):
+        if deadline.expired():
+            deadline.skip("image recompression")
+        elif HAS_PIL:
+            compress_images(doc, input_path, quality, target_dpi, workers, deadline)
+        else:
+            print(f"[Compress] Pillow unavailable, skipping image recompression")
+    if structure_report and deadline.optional("font subsetting"):
+        subset_fonts(doc)
+    return structure_report
+
+
+def print_structure_report(structure_report, output_path, password=None):
+    """Print the object count change between the input and the saved output."""
+    with fitz.open(output_path) as compressed:
+        if compressed.needs_pass:
+            compressed.authenticate(password or "")
+        objects_after = count_live_objects(compressed)
+    removed = structure_report["objects_before"] - objects_after - structure_report["duplicates_merged"]
+    print(f"[Compress] Objects: {structure_report['objects_before']} -> {objects_after}")
+    print(f"[Compress]   Duplicate objects merged: {structure_report['duplicates_merged']}")
+    print(f"[Compress]   Unreferenced objects removed: {max(0, removed)}")
+
+
+def _compress_with_pymupdf(input_path, output_path, quality, mode, target_dpi, workers, deadline=None):
+    """Run the selected image and structural passes with a single save."""
+    doc = fitz.open(input_path)
+    try:
+        structure_report = apply_compression(doc, input_path, quality, mode, target_dpi, workers, deadline)
+        print(f"[Compress] Writing compressed PDF to: {output_path}")
+        save_document(doc, output_path, structure_report is not None)
+    finally:
+        doc.close()
+
+    if structure_report:
+        print_structure_report(structure_report, output_path)
+
+
+def _sample_evenly(items, count):
+    """Pick up to count items spread evenly over an already sorted list."""
+    if len(items) <= count:
+        return list(items)
+    step = len(items) / count
+    return [items[int(i * step)] for i in range(count)]
+
+
+def _trial_encode(decoded, job, jpeg_quality):
+    """
+    Estimate the JPEG size of an image at its target size; images larger
+    than the trial tile are sampled as a mosaic of patches spread over the
+    whole image, so empty margins count as much as dense centres
+    """
+    target_w, target_h = job["target_width"], job["target_height"]
+    src_w, src_h = decoded.size
+    if target_w * target_h <= TRIAL_TILE_AREA:
+        tile = decoded.resize((target_w, target_h), Image.BILINEAR) if decoded.size != (target_w, target_h) \
+            else decoded
+    else:
+        patch = max(8, int(math.sqrt(TRIAL_TILE_AREA)) // TRIAL_GRID // 8 * 8)
+        # Source pixels per target pixel, and the source area one patch covers
+        scale_x, scale_y = src_w / float(target_w), src_h / float(target_h)
+        crop_w, crop_h = max(1, int(patch * scale_x)), max(1, int(patch * scale_y))
+        tile = Image.new(decoded.mode, (patch * TRIAL_GRID, patch * TRIAL_GRID))
+        for row in range(TRIAL_GRID):
+            for col in range(TRIAL_GRID):
+                # Centre of each grid cell
+                left = max(0, int(src_w * (col + 0.5) / TRIAL_GRID - crop_w / 2))
+                top = max(0, int(src_h * (row + 0.5) / TRIAL_GRID - crop_h / 2))
+                piece = decoded.crop((left, top, left + crop_w, top + crop_h))
+                tile.paste(piece.resize((patch, patch), Image.BILINEAR), (col * patch, row * patch))
+
+    buffer = io.BytesIO()
+    # Same encoder settings as recompress_image()
+    tile.save(buffer, format="JPEG", quality=jpeg_quality, optimize=True)
+    return int(len(buffer.getvalue()) * (target_w * target_h) / float(tile.size[0] * tile.size[1]))
+
+
+def resolve_mode(input_path, mode):
+    """
+    Turn 'auto' into a concrete mode using the size anatomy of the file
+
+    Falls back to the lossless 'structure' pass when the analyzer finds
+    nothing worth compressing or cannot run.
+    """
+    if mode != "auto":
+        return mode
+    try:
+        from pdf_anatomy import analyze_pdf
+        recommendation = analyze_pdf(input_path)["recommendation"]
+    except Exception as e:
+        print(f"[Compress] Anatomy analysis failed ({e}), using structure mode")
+        return "structure"
+    for reason in recommendation["reasons"]:
+        print(f"[Compress] Anatomy: {reason}")
+    return recommendation["mode"] or "structure"
+
+
+def _reachable_xrefs(doc, sources):
+    """Xrefs reachable from the trailer through the given object sources."""
+    roots = []
+    for key in ("Root", "Info", "Encrypt"):
+        kind, value = doc.xref_get_key(-1, key)
+        if kind in ("xref", "dict"):
+            roots.extend(int(match.group(1)) for match in _REF_RE.finditer(value))
+    reached = set()
+    pending = [root for root in roots if root in sources]
+    while pending:
+        xref = pending.pop()
+        if xref in reached:
+            continue
+        reached.add(xref)
+        pending.extend(ref for ref in (int(match.group(1)) for match in _REF_RE.finditer(sources[xref]))
+                       if ref in sources and ref not in reached)
+    return reached
+
+
+def _font_program_bytes(doc, sources, skip=()):
+    """Raw bytes of the font programs the font descriptors point at."""
+    total = 0
+    for xref, source in sources.items():
+        if "/FontDescriptor" not in source:
+            continue
+        for key in ("FontFile", "FontFile2", "FontFile3"):
+            kind, value = doc.xref_get_key(xref, key)
+            if kind == "xref" and int(value.split()[0]) not in skip:
+                total += stream_length(doc, int(value.split()[0]))
+    return total
+
+
+def _font_subset_savings(input_path, doc, sources, duplicates):
+    """
+    Bytes font subsetting would save, measured by subsetting a second copy
+    of the document; 0 when every embedded font is a subset already
+    """
+    descriptors = {xref: source for xref, source in sources.items() if "/FontDescriptor" in source}
+    if not descriptors or all(_SUBSET_NAME_RE.search(source) for source in descriptors.values()):
+        return 0
+    before = _font_program_bytes(doc, descriptors, duplicates)
+    trial = fitz.open(input_path)
+    try:
+        trial.subset_fonts()
+        after = _font_program_bytes(trial, descriptors, duplicates)
+    except Exception:
+        return 0
+    finally:
+        trial.close()
+    return max(0, before - after)
+
+
+def estimate_compression(input_path, qualities=ESTIMATE_QUALITIES, mode="all",
+                         sample_images=6, sample_streams=24, time_budget=0.8):
+    """
+    Predict the compressed size for each quality level without compressing
+
+    A sample of image xrefs is decoded once and trial-encoded at every
+    quality level; a sample of unfiltered streams is trial-deflated. The
+    observed ratios are extrapolated over the whole document. For the
+    structure pass the duplicates it would merge are found the same way it
+    finds them, the objects it packs into object streams are trial-deflated
+    and fonts are trial-subset on a copy.
+
+    Args:
+        input_path: Path to the input PDF file
+        qualities: Quality levels (1-100) to project
+        mode: Compression mode the projection is for ('images', 'structure', 'all', 'auto')
+        sample_images: Maximum number of images to trial-encode
+        sample_streams: Maximum number of unfiltered streams to trial-deflate
+        time_budget: Seconds after which image sampling stops
+
+    Returns:
+        Dict with the original size and a projection per quality level
+    """
+    started = time.perf_counter()
+    original_size = os.path.getsize(input_path)
+    mode = resolve_mode(input_path, mode)
+    doc = fitz.open(input_path)
+    try:
+        structure = mode in ("all", "structure")
+        images = mode in ("all", "images") and HAS_PIL
+        objects = {}
+        if structure:
+            merged = _replay_deduplication(doc, objects)
+        else:
+            merged = {}
+            for xref in range(1, doc.xref_length()):
+                objects[xref] = _read_object(doc, xref)
+        duplicates = {xref for xref in merged if objects[xref][1] is not None}
+        duplicate_bytes = sum(objects[xref][1] for xref in duplicates)
+
+        # Garbage collection drops what the trailer no longer reaches once
+        # references point at the merged objects
+        if structure:
+            sources = {xref: _rewrite_refs(objects[xref][0], merged) for xref in range(1, doc.xref_length())
+                       if xref not in merged and objects[xref][0] != "null"}
+            live = _reachable_xrefs(doc, sources)
+        else:
+            live = set(range(1, doc.xref_length()))
+        garbage_bytes = sum(objects[xref][1] for xref in range(1, doc.xref_length())
+                            if xref not in live and xref not in duplicates and objects[xref][1] is not None)
+
+        # Image jobs per quality level; images left alone are only deflated
+        placements = collect_image_placements(doc)
+        jobs_by_quality = {}
+        for quality in qualities:
+            jobs = plan_image_jobs(doc, target_dpi_for_quality(quality), placements) if images else []
+            jobs_by_quality[quality] = {job["xref"]: job for job in jobs if job["xref"] not in duplicates}
+        all_jobs = {}
+        for jobs in jobs_by_quality.values():
+            all_jobs.update(jobs)
+        image_total = sum(job["original_bytes"] for job in all_jobs.values())
+
+        # Unfiltered streams are deflated on save in every mode
+        raw_streams = sorted((objects[xref][1], xref) for xref in live
+                             if objects[xref][1] is not None and xref not in all_jobs
+                             and "/Filter" not in objects[xref][0])
+        raw_total = sum(length for length, _ in raw_streams)
+        sampled_raw = 0
+        sampled_deflated = 0
+        for length, xref in _sample_evenly(raw_streams, sample_streams):
+            data = doc.xref_stream_raw(xref) or b""
+            sampled_raw += len(data)
+            sampled_deflated += min(len(data), len(zlib.compress(data, 6)))
+        deflate_ratio = sampled_deflated / sampled_raw if sampled_raw else 1.0
+        stream_savings = raw_total * (1.0 - deflate_ratio)
+
+        # Object streams: what is not stream data is rebuilt as stream
+        # dictionaries plus deflated object streams
+        container_savings = 0
+        font_savings = 0
+        if structure:
+            stream_data = sum(entry[1] for key, entry in objects.items()
+                              if isinstance(key, int) and entry[1] is not None)
+            packed = [sources[xref] for xref in live if objects[xref][1] is None]
+            sample = "\n".join(_sample_evenly(packed, OBJECT_SAMPLE)).encode("latin-1", "replace")
+            packed_ratio = len(zlib.compress(sample, 6)) / len(sample) if sample else 1.0
+            container_after = (sum(len(sources[xref]) + STREAM_OBJECT_OVERHEAD for xref in live
+                                   if objects[xref][1] is not None)
+                               + sum(len(source) + 1 for source in packed) * packed_ratio
+                               + XREF_ENTRY_BYTES * len(live))
+            container_savings = max(0, (original_size - stream_data) - container_after)
+            font_savings = _font_subset_savings(
+                input_path, doc, {xref: sources[xref] for xref in live}, duplicates)
+
+        # Trial-encode sampled images at every requested quality level
+        candidates = sorted(all_jobs.values(), key=lambda job: job["original_bytes"])
+        sampled = {quality: [0, 0] for quality in qualities}
+        sampled_count = 0
+        for job in _sample_evenly(candidates, sample_images):
+            if sampled_count and time.perf_counter() - started > time_budget:
+                break
+            largest = max((jobs_by_quality[q][job["xref"]] for q in qualities if job["xref"] in jobs_by_quality[q]),
+                          key=lambda j: j["target_width"] * j["target_height"])
+            try:
+                decoded = _decode_image(doc, largest)
+            except Exception:
+                continue
+            sampled_count += 1
+            for quality in qualities:
+                quality_job = jobs_by_quality[quality].get(job["xref"])
+                if quality_job is None:
+                    continue
+                encoded = _trial_encode(decoded, quality_job, jpeg_quality_for_quality(quality))
+                sampled[quality][0] += quality_job["original_bytes"]
+                sampled[quality][1] += min(quality_job["original_bytes"], encoded)
+
+        projections = {}
+        for quality in qualities:
+            sampled_orig, sampled_new = sampled[quality]
+            image_ratio = sampled_new / sampled_orig if sampled_orig else 1.0
+            image_savings = image_total * (1.0 - image_ratio)
+            projected = max(0, int(original_size - duplicate_bytes - garbage_bytes - stream_savings
+                                   - image_savings - container_savings - font_savings))
+            projections[str(quality)] = {
+                "projected_size": projected,
+                "reduction_percent": round((original_size - projected) * 100 / original_size, 1) if original_size else 0,
+                "target_dpi": target_dpi_for_quality(quality),
+            }
+    finally:
+        doc.close()
+
+    return {
+        "original_size": original_size,
+        "mode": mode,
+        "qualities": projections,
+        "sampled_images": sampled_count,
+        "image_bytes": image_total,
+        "duplicate_bytes": duplicate_bytes,
+        "garbage_bytes": garbage_bytes,
+        "container_bytes_saved": int(container_savings),
+        "font_bytes_saved": font_savings,
+        "elapsed_ms": int((time.perf_counter() - started) * 1000),
+    }
+
+
+def check_estimate(input_path, estimate, quality, workers=None, tolerance=ESTIMATE_TOLERANCE):
+    """
+    Compress for real (into a job scratch directory) and compare the size
+    with the estimate's projection for the same quality and mode
+
+    Returns:
+        Dict with the projected and actual sizes, the error in percent of the
+        actual size and whether it is within tolerance
+    """
+    from scratch import job_scratch
+
+    projected = estimate["qualities"][str(quality)]["projected_size"]
+    with job_scratch("compress-check", estimate["original_size"] * 2) as scratch_dir:
+        output_path = os.path.join(scratch_dir, "compressed.pdf")
+        _compress_with_pymupdf(input_path, output_path, quality, estimate["mode"], None, workers)
+        actual = os.path.getsize(output_path)
+    error = (projected - actual) * 100.0 / actual if actual else 0.0
+    return {
+        "quality": quality,
+        "mode": estimate["mode"],
+        "projected_size": projected,
+        "actual_size": actual,
+        "error_percent": round(error, 1),
+        "within_tolerance": abs(error) <= tolerance or abs(projected - actual) <= ESTIMATE_SLACK_BYTES,
+    }
+
+
+def _compress_with_pypdf2(input_path, output_path):
+    """Content stream compression only, used when PyMuPDF is unavailable."""
+    reader = PdfReader(input_path)
+    writer = PdfWriter()
+
+    print(f"[Compress] Processing {len(reader.pages)} pages")
+    print(f"[Compress] Note: PyMuPDF unavailable, compressing content streams only")
+
+    for page in reader.pages:
+        # PyPDF2's compress_content_streams applies deflate compression
+        page.compress_content_streams()
+        writer.add_page(page)
+
+    if reader.metadata:
+        writer.add_metadata(reader.metadata)
+
+    print(f"[Compress] Writing compressed PDF to: {output_path}")
+    with open(output_path, 'wb') as output_file:
+        writer.write(output_file)
+
+
+def compress_pdf(input_path, output_path, quality, mode="all", target_dpi=None, workers=None,
+                 deadline=None):
     """
     Compress a PDF file
-    
+
     Args:
         input_path: Path to the input PDF file
         output_path: Path to save the compressed PDF
         quality: Quality level 1-100 (higher = better quality, larger file)
-    
+        mode: 'images' (lossy), 'structure' (lossless), 'all' or 'auto'
+        target_dpi: Target effective image DPI (derived from quality if None)
+        workers: Number of image worker processes (CPU count if None)
+        deadline: deadline.Deadline (or seconds) the compression must finish by
+
     Returns:
         Tuple of (success, original_size, compressed_size)
     """
     try:
         print(f"[Compress] Reading PDF from: {input_path}")
-        
+
         if not os.path.exists(input_path):
             print(f"[Compress] Error: Input file not found: {input_path}")
             return False, 0, 0
-        
+
         original_size = os.path.getsize(input_path)
         print(f"[Compress] Original size: {original_size} bytes")
-        
-        reader = PdfReader(input_path)
-        writer = PdfWriter()
-        
-        print(f"[Compress] Processing {len(reader.pages)} pages")
-        print(f"[Compress] Note: Using content stream compression (quality param saved for future image optimization)")
-        
-        for page in reader.pages:
-            # PyPDF2's compress_content_streams applies deflate compression
-            # Quality parameter is reserved for future image-based compression
-            page.compress_content_streams()
-            writer.add_page(page)
-        
-        if reader.metadata:
-            writer.add_metadata(reader.metadata)
-        
-        print(f"[Compress] Writing compressed PDF to: {output_path}")
-        with open(output_path, 'wb') as output_file:
-            writer.write(output_file)
-        
+
+        if HAS_PYMUPDF:
+            mode = resolve_mode(input_path, mode)
+            _compress_with_pymupdf(input_path, output_path, quality, mode, target_dpi, workers, deadline)
+        elif HAS_PYPDF2:
+            _compress_with_pypdf2(input_path, output_path)
+        else:
+            print("[Compress] Error: PyMuPDF or PyPDF2 is required")
+            return False, original_size, 0
+
         if not os.path.exists(output_path):
             print(f"[Compress] Error: Output file was not created")
             return False, original_size, 0
-        
+
         compressed_size = os.path.getsize(output_path)
         reduction = ((original_size - compressed_size) / original_size) * 100 if original_size > 0 else 0
-        
+
         print(f"[Compress] Success!")
         print(f"[Compress] Original: {original_size} bytes")
         print(f"[Compress] Compressed: {compressed_size} bytes")
         print(f"[Compress] Reduction: {reduction:.1f}%")
-        
+
         return True, original_size, compressed_size
-        
-    except ImportError:
-        print("[Compress] Error: PyPDF2 not installed")
-        return False, 0, 0
+
     except Exception as e:
         print(f"[Compress] Error: {str(e)}")
         import traceback
@@ -73,19 +1006,50 @@ def compress_pdf(input_path, output_path, quality):
         return False, 0, 0
 
 if __name__ == "__main__":
-    if len(sys.argv) < 4:
-        print("Usage: python compress_pdf.py <input_pdf> <output_pdf> <quality>")
-        sys.exit(1)
-    
-    input_pdf = sys.argv[1]
-    output_pdf = sys.argv[2]
-    quality = int(sys.argv[3])
-    
+    parser = argparse.ArgumentParser(description="Compress a PDF file")
+    parser.add_argument("input_pdf", help="Input PDF file")
+    parser.add_argument("output_pdf", nargs="?", help="Output PDF file (not needed with --estimate)")
+    parser.add_argument("quality", type=int, nargs="?", default=75, help="Quality level 1-100")
+    parser.add_argument("--mode", choices=COMPRESSION_MODES, default="all",
+                        help="images = lossy image pass, structure = lossless pass, all = both, "
+                             "auto = choose from the file's size anatomy")
+    parser.add_argument("--dpi", type=int, default=None, help="Target effective image DPI")
+    parser.add_argument("--workers", type=int, default=None, help="Image worker processes")
+    parser.add_argument("--estimate", action="store_true",
+                        help="Print projected sizes per quality level instead of compressing")
+    parser.add_argument("--check", action="store_true",
+                        help="With --estimate, also compress at the given quality and compare")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="Seconds the compression may take; images not done by then are left alone")
+    args = parser.parse_args()
+
+    if args.estimate:
+        if not HAS_PYMUPDF:
+            print("[Compress] Error: PyMuPDF is required for estimation")
+            sys.exit(1)
+        # No output file is written, so 'input.pdf 50 --estimate' means quality 50
+        if args.output_pdf and args.output_pdf.isdigit():
+            args.quality = int(args.output_pdf)
+        qualities = tuple(sorted(set(ESTIMATE_QUALITIES) | {args.quality}))
+        estimate = estimate_compression(args.input_pdf, qualities, mode=args.mode)
+        print(f"ESTIMATE:{json.dumps(estimate)}")
+        if args.check:
+            check = check_estimate(args.input_pdf, estimate, args.quality, args.workers)
+            print(f"CHECK:{json.dumps(check)}")
+            sys.exit(0 if check["within_tolerance"] else 1)
+        sys.exit(0)
+    if not args.output_pdf:
+        parser.error("output_pdf is required")
+
     print(f"[Compress] Starting PDF compression")
-    
-    success, orig, comp = compress_pdf(input_pdf, output_pdf, quality)
-    
+
+    deadline = as_deadline(args.deadline)
+    success, orig, comp = compress_pdf(args.input_pdf, args.output_pdf, args.quality,
+                                       mode=args.mode, target_dpi=args.dpi, workers=args.workers,
+                                       deadline=deadline)
+    deadline.log_report(sys.stdout)
+
     if success:
         print(f"RESULT:{orig}:{comp}")
-    
+
     sys.exit(0 if success else 1)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Conversion Deadlines
+A latency budget for one conversion. Converters check it page by page and
+step down to cheaper strategies when they fall behind, so one pathological
+upload still produces a valid (if plainer) file in time:
+
+    full     -> the converter's normal strategy
+    reduced  -> the projected finish is past the budget: lower DPI, pictures
+                instead of layout reconstruction, images and slow engines
+                skipped
+    minimal  -> only the reserve is left: the remaining pages are left out
+                (a one-line note in their place), so saving the output is
+                all that is left to do
+
+Batch stages (pdf2docx chunks, OCR) get a share of the remaining budget and
+hand the pages they did not finish to a cheaper engine. A reserve is kept
+back for writing the output. Every step-down is recorded and reported at
+the end as one '[Deadline] {...}' JSON line.
+
+Usage:
+    python py_word_excel_html_ppt.py <format> <input_pdf> <output_file> --deadline 60
+    python pdf_to_images.py <pdf_path> <format> [output_dir] [pages] --deadline 60
+"""
+
+import sys
+import json
+import time
+
+from page_selection import format_pages
+
+FULL = "full"
+REDUCED = "reduced"
+MINIMAL = "minimal"
+
+# Share of the budget kept back for saving the output (at least MIN_RESERVE
+# seconds, at most half the budget)
+RESERVE_SHARE = 0.1
+MIN_RESERVE = 1.0
+# Optional work (post-processing, clean-up) runs only while less than this
+# share of the working budget is spent
+OPTIONAL_SHARE = 0.6
+
+# How a page left out at the deadline is reported, and noted in the output
+LEFT_OUT = "left out at the deadline"
+LEFT_OUT_NOTE = "Page {page} was not converted within the time limit."
+LEFT_OUT_PAGES_NOTE = "Pages {pages} were not converted within the time limit."
+
+
+class Deadline:
+    """Latency budget of one conversion; seconds=None means no limit."""
+
+    def __init__(self, seconds=None):
+        self.seconds = float(seconds) if seconds and float(seconds) > 0 else None
+        self.started = time.monotonic()
+        self.reserve = (min(self.seconds / 2, max(MIN_RESERVE, self.seconds * RESERVE_SHARE))
+                        if self.seconds else 0.0)
+        self.degraded = {}
+        self.skipped = []
+
+    @property
+    def limited(self):
+        return self.seconds is not None
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def work_left(self):
+        """Seconds left before the reserve; None without a limit."""
+        if not self.limited:
+            return None
+        return self.seconds - self.reserve - self.elapsed()
+
+    def expired(self):
+        return self.limited and self.work_left() <= 0
+
+    def stop_at(self, share=1.0):
+        """
+        time.monotonic() by which a batch stage given `share` of the work
+        left must stop; None without a limit
+        """
+        if not self.limited:
+            return None
+        return time.monotonic() + max(0.0, self.work_left()) * share
+
+    def step(self, done, total, started=None, stop_at=None):
+        """
+        Strategy for the next page after `done` of `total`, the first of
+        which began at `started` (time.monotonic(); the deadline's start if
+        None): FULL while the projected finish fits the budget, REDUCED when
+        it does not, MINIMAL once only the reserve is left. A stage given a
+        share of the budget passes its stop_at() as stop_at.
+        """
+        if not self.limited:
+            return FULL
+        left = self.work_left() if stop_at is None else stop_at - time.monotonic()
+        if left <= 0:
+            return MINIMAL
+        if done:
+            per_page = (time.monotonic() - (started or self.started)) / done
+            if per_page * (total - done) > left:
+                return REDUCED
+        return FULL
+
+    def optional(self, work):
+        """
+        Whether optional work still fits; once OPTIONAL_SHARE of the working
+        budget is spent it is recorded as skipped instead
+        """
+        if not self.limited or self.elapsed() < (self.seconds - self.reserve) * OPTIONAL_SHARE:
+            return True
+        self.skip(work)
+        return False
+
+    def skip(self, work):
+        """Record optional work left out because of the deadline."""
+        self.skipped.append(work)
+        print(f"   ⏱ Skipped {work} to meet the deadline", file=sys.stderr)
+
+    def degrade(self, page, how):
+        """Record that a page (1-based) was converted the cheaper way `how`."""
+        self.degraded[page] = how
+        print(f"   ⏱ Page {page}: {how}", file=sys.stderr)
+
+    def report(self):
+        """
+        Dict with "budget", "seconds", "met", "degraded" (how -> pages, e.g.
+        {"rendered at 72 DPI": "4-9,12"}) and "skipped" optional work
+        """
+        elapsed = self.elapsed()
+        degraded = {}
+        for page, how in sorted(self.degraded.items()):
+            degraded.setdefault(how, []).append(page - 1)
+        return {
+            "budget": self.seconds,
+            "seconds": round(elapsed, 2),
+            "met": not self.limited or elapsed <= self.seconds,
+            "degraded": {how: format_pages(indexes) for how, indexes in degraded.items()},
+            "skipped": self.skipped,
+        }
+
+    def log_report(self, stream=None):
+        """Print the report as one '[Deadline] {...}' line (stderr by default)."""
+        if self.limited:
+            print(f"[Deadline] {json.dumps(self.report())}", file=stream or sys.stderr)
+
+
+def left_out_note(indexes):
+    """The note standing in for the given 0-based pages left out."""
+    if len(indexes) == 1:
+        return LEFT_OUT_NOTE.format(page=indexes[0] + 1)
+    return LEFT_OUT_PAGES_NOTE.format(pages=format_pages(indexes))
+
+
+def as_deadline(value):
+    """A Deadline from a Deadline, a number of seconds or None (no limit)."""
+    return value if isinstance(value, Deadline) else Deadline(value)
+
+
+def pop_deadline_argument(argv):
+    """
+    Remove '--deadline N' / '--deadline=N' from a positional argv list
+
+    Returns:
+        Tuple of (seconds or None, remaining argv)
+    """
+    seconds = None
+    remaining = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--deadline":
+            seconds = next(args, None)
+        elif arg.startswith("--deadline="):
+            seconds = arg.split("=", 1)[1]
+        else:
+            remaining.append(arg)
+    if seconds is not None:
+        try:
+            seconds = float(seconds)
+        except ValueError:
+            raise ValueError(f"Invalid deadline '{seconds}': expected seconds")
+    return seconds, remaining
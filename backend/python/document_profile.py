@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Document Profiler
+Classifies every page of a PDF from cheap PyMuPDF statistics - text spans
+and characters, fonts, image coverage, vector drawings and table rulings -
+so converters can pick the cheapest adequate engine per page up front
+instead of discovering it by failing:
+
+    blank    -> pymupdf   (nothing to lay out)
+    text     -> pymupdf   (single-column text, no tables or images)
+    layout   -> pdf2docx  (tables, rulings, images, columns, many fonts)
+    graphic  -> raster    (vector art or images with little text)
+    scanned  -> ocr       (image-only page; raster if Tesseract is missing)
+
+Profiling reads no pixels and takes a few milliseconds per page. Given a
+stop time (a conversion deadline), pages not reached by then are listed as
+unprofiled and planned for the cheapest engine, pymupdf.
+
+Usage:
+    python document_profile.py <input_pdf> [--pages 1-3,10]
+"""
+
+import sys
+import json
+import time
+import argparse
+import importlib.util
+
+try:
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+from page_selection import parse_pages, format_pages
+
+# Fewer characters than this and a page has no usable text layer
+MIN_TEXT_CHARS = 20
+# Image area / page area above which a page without text is a scan
+SCANNED_IMAGE_COVERAGE = 0.5
+# Horizontal/vertical rulings that indicate a table grid
+TABLE_RULINGS = 6
+# More fonts than this and plain-text extraction loses too much styling
+MAX_PLAIN_FONTS = 4
+
+PAGE_ENGINES = {
+    "blank": "pymupdf",
+    "text": "pymupdf",
+    "layout": "pdf2docx",
+    "graphic": "raster",
+    "scanned": "ocr",
+}
+
+# What an engine degrades to when its library is not installed
+ENGINE_FALLBACKS = {
+    "pdf2docx": "pymupdf",
+    "ocr": "raster",
+}
+
+
+def _rulings(drawings):
+    """Count thin horizontal/vertical strokes and rectangles (table borders)."""
+    count = 0
+    for drawing in drawings:
+        for item in drawing.get("items", []):
+            if item[0] == "l":
+                p1, p2 = item[1], item[2]
+                if abs(p1[0] - p2[0]) < 1 or abs(p1[1] - p2[1]) < 1:
+                    count += 1
+            elif item[0] == "re":
+                rect = fitz.Rect(item[1])
+                if min(rect.width, rect.height) < 2:
+                    count += 1
+                elif drawing.get("type") in ("s", "fs"):
+                    # A stroked cell box is four rulings
+                    count += 4
+    return count
+
+
+def profile_page(page):
+    """Statistics and class of one fitz page."""
+    started = time.perf_counter()
+    area = abs(page.rect) or 1.0
+
+    spans = chars = 0
+    fonts = set()
+    right_column = False
+    # No image payloads: only text spans are needed here
+    for block in page.get_text("dict", flags=fitz.TEXT_MEDIABOX_CLIP)["blocks"]:
+        if block["type"] != 0:
+            continue
+        x0, _, x1, _ = block["bbox"]
+        # A narrow block starting right of the centre means several columns
+        if x0 > page.rect.width * 0.5 and (x1 - x0) < page.rect.width * 0.45:
+            right_column = True
+        for line in block["lines"]:
+            for span in line["spans"]:
+                text = span["text"].strip()
+                if text:
+                    spans += 1
+                    chars += len(text)
+                    fonts.add(span["font"])
+
+    image_area = 0.0
+    images = 0
+    for info in page.get_image_info():
+        rect = fitz.Rect(info["bbox"]) & page.rect
+        if not rect.is_empty:
+            images += 1
+            image_area += abs(rect)
+
+    drawings = page.get_cdrawings() if hasattr(page, "get_cdrawings") else page.get_drawings()
+    stats = {
+        "page": page.number + 1,
+        "chars": chars,
+        "spans": spans,
+        "fonts": len(fonts),
+        "images": images,
+        "image_coverage": round(min(1.0, image_area / area), 3),
+        "drawings": len(drawings),
+        "rulings": _rulings(drawings),
+        "columns": 2 if right_column else 1,
+    }
+    stats["class"] = classify(stats)
+    stats["ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return stats
+
+
+def classify(stats):
+    if stats["chars"] < MIN_TEXT_CHARS:
+        if stats["image_coverage"] >= SCANNED_IMAGE_COVERAGE:
+            return "scanned"
+        if stats["images"] or stats["drawings"]:
+            return "graphic"
+        return "blank"
+    if (stats["rulings"] >= TABLE_RULINGS or stats["images"] or stats["columns"] > 1
+            or stats["fonts"] > MAX_PLAIN_FONTS):
+        return "layout"
+    return "text"
+
+
+def profile_document(pdf_path, pages=None, stop_at=None):
+    """
+    Profile the selected pages (all if pages is None); pages not reached by
+    stop_at (time.monotonic()) are left unprofiled
+
+    Returns:
+        Dict with "pages" (per-page stats and class), "classes" (page count
+        per class), "class" (the document's dominant class), "unprofiled"
+        (1-based pages left out) and "ms"
+    """
+    if not HAS_PYMUPDF:
+        raise RuntimeError("PyMuPDF not available for document profiling")
+    started = time.perf_counter()
+    page_stats = []
+    unprofiled = []
+    with fitz.open(pdf_path) as doc:
+        for index in parse_pages(pages, len(doc)):
+            if unprofiled or (stop_at is not None and time.monotonic() >= stop_at):
+                unprofiled.append(index + 1)
+            else:
+                page_stats.append(profile_page(doc[index]))
+
+    classes = {}
+    for stats in page_stats:
+        classes[stats["class"]] = classes.get(stats["class"], 0) + 1
+    return {
+        "pages": page_stats,
+        "classes": classes,
+        "class": max(classes, key=classes.get) if classes else "blank",
+        "unprofiled": unprofiled,
+        "ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def available_engines():
+    """Engines whose libraries are installed here."""
+    engines = {"pymupdf", "raster"}
+    # find_spec, not import: pdf2docx's 'import fitz' prints to stdout
+    if importlib.util.find_spec("pdf2docx"):
+        engines.add("pdf2docx")
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        engines.add("ocr")
+    except Exception:
+        pass
+    return engines
+
+
+def plan_engines(profile, overrides=None, available=None):
+    """
+    Pick one engine per profiled page. overrides maps a class to another
+    engine for converters with other priorities (e.g. {"text": "pdf2docx"}
+    where exact layout matters more than speed). Unprofiled pages get
+    pymupdf whatever the overrides.
+
+    Returns:
+        Dict of 0-based page index -> engine
+    """
+    mapping = {**PAGE_ENGINES, **(overrides or {})}
+    available = available_engines() if available is None else available
+    plan = {}
+    for stats in profile["pages"]:
+        engine = mapping[stats["class"]]
+        while engine not in available and engine in ENGINE_FALLBACKS:
+            engine = ENGINE_FALLBACKS[engine]
+        plan[stats["page"] - 1] = engine
+    for page in profile.get("unprofiled", []):
+        plan[page - 1] = "pymupdf"
+    return plan
+
+
+def engine_pages(plan):
+    """Group a plan into engine -> sorted 0-based page indexes."""
+    groups = {}
+    for index in sorted(plan):
+        groups.setdefault(plan[index], []).append(index)
+    return groups
+
+
+def describe_plan(plan):
+    """One-line summary such as 'pdf2docx: 1-3,9; ocr: 4-8'."""
+    return "; ".join(f"{engine}: {format_pages(indexes)}" for engine, indexes in engine_pages(plan).items())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify PDF pages and pick a conversion engine per page")
+    parser.add_argument("input_pdf", help="Input PDF")
+    parser.add_argument("--pages", default=None, help="Page selection, e.g. 1-3,10,40-")
+    args = parser.parse_args()
+
+    try:
+        profile = profile_document(args.input_pdf, args.pages)
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    plan = plan_engines(profile)
+    for stats in profile["pages"]:
+        stats["engine"] = plan[stats["page"] - 1]
+    print(json.dumps(profile, indent=2))
+    print(f"📊 {profile['class']} document in {profile['ms']} ms - {describe_plan(plan)}", file=sys.stderr)
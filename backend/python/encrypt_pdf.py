@@ -1,27 +1,54 @@
 #!/usr/bin/env python3
 """
-PDF Encryption Script using PyPDF2
-Supports both user and owner passwords with AES-128 encryption
+PDF Encryption Script
+Supports both user and owner passwords with AES encryption. Uses the
+one-pass PyMuPDF engine in secure_pdf.py (AES-256 by default) and falls
+back to PyPDF2 (AES-128) when PyMuPDF is not installed.
 """
 
 import sys
 import os
-from PyPDF2 import PdfReader, PdfWriter
 
-def encrypt_pdf(input_path, output_path, user_password, owner_password):
+try:
+    from PyPDF2 import PdfReader, PdfWriter
+    HAS_PYPDF2 = True
+except ImportError:
+    HAS_PYPDF2 = False
+
+from secure_pdf import HAS_PYMUPDF, ENCRYPTION_METHODS, secure_pdf
+
+def encrypt_pdf(input_path, output_path, user_password, owner_password, encryption="aes-256"):
     """
-    Encrypt a PDF file with AES-256 encryption
+    Encrypt a PDF file with AES encryption
     
     Args:
         input_path: Path to the input PDF file
         output_path: Path to save the encrypted PDF
         user_password: Password for opening the PDF (can be empty)
         owner_password: Password for restrictions (required)
+        encryption: 'aes-128' or 'aes-256' (PyMuPDF only; PyPDF2 uses AES-128)
     
     Returns:
         True if successful, False otherwise
     """
+    if HAS_PYMUPDF:
+        success, _, _ = secure_pdf(input_path, output_path, user_password=user_password,
+                                   owner_password=owner_password, encryption=encryption,
+                                   log_prefix="[Encryption]")
+        if success:
+            print(f"[Encryption] Encryption Details:")
+            print(f"  - Algorithm: {encryption.upper()}")
+            print(f"  - User Password: {'Set' if user_password else 'Not set'}")
+            print(f"  - Owner Password: Set")
+        return success
+    return _encrypt_with_pypdf2(input_path, output_path, user_password, owner_password)
+
+def _encrypt_with_pypdf2(input_path, output_path, user_password, owner_password):
+    """Fallback: full PyPDF2 read, page copy and encrypted write (AES-128)."""
     try:
+        if not HAS_PYPDF2:
+            raise ImportError("PyPDF2")
+
         print(f"[Encryption] Reading PDF from: {input_path}")
         
         # Check if input file exists
@@ -84,13 +111,17 @@ def encrypt_pdf(input_path, output_path, user_password, owner_password):
 if __name__ == "__main__":
     # Parse command line arguments
     if len(sys.argv) < 5:
-        print("Usage: python encrypt_pdf.py <input_pdf> <output_pdf> <user_password> <owner_password>")
+        print("Usage: python encrypt_pdf.py <input_pdf> <output_pdf> <user_password> <owner_password> [aes-128|aes-256]")
         sys.exit(1)
     
     input_pdf = sys.argv[1]
     output_pdf = sys.argv[2]
     user_password = sys.argv[3] if sys.argv[3] != "None" else ""
     owner_password = sys.argv[4]
+    encryption = sys.argv[5] if len(sys.argv) > 5 else "aes-256"
+    if encryption not in ENCRYPTION_METHODS:
+        print(f"[Encryption] Error: Unknown encryption method: {encryption}")
+        sys.exit(1)
     
     print(f"[Encryption] Starting PDF encryption process")
     print(f"[Encryption] Input: {input_pdf}")
@@ -99,7 +130,7 @@ if __name__ == "__main__":
     print(f"[Encryption] Owner Password: Set")
     
     # Perform encryption
-    success = encrypt_pdf(input_pdf, output_pdf, user_password, owner_password)
+    success = encrypt_pdf(input_pdf, output_pdf, user_password, owner_password, encryption)
     
     # Exit with appropriate code
     sys.exit(0 if success else 1)
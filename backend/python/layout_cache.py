@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+pdf2docx Layout Cache
+Keeps the pdf2docx parse result (pages, sections, blocks, tables - what
+Converter.store() returns after parse() and before make_docx()) as gzipped
+JSON, keyed by the document hash, the page selection, the pdf2docx version
+and the parse settings.
+
+The Word converter restores a cached layout and only runs make_docx(); the
+Excel converter reads paragraphs and tables straight from the layout
+instead of generating a .docx and opening it again. Whichever runs first
+pays for the layout analysis once.
+
+Layouts carry every page's text and images, so the cache is off unless
+LAYOUT_CACHE_DIR (or --cache-dir) names a directory. It is kept private to
+the user (0700 directory, 0600 files) and within LAYOUT_CACHE_MAX_MB:
+after each write, entries unused for LAYOUT_CACHE_MAX_AGE_DAYS are removed,
+then the least recently used ones until the cache fits.
+
+Usage:
+    python layout_cache.py <input_pdf> [--pages 1-3,10] [--cache-dir DIR]
+    python layout_cache.py --prune [--cache-dir DIR]
+"""
+
+import sys
+import os
+import gzip
+import json
+import time
+import hashlib
+import argparse
+
+# None turns caching off; the server opts in by setting LAYOUT_CACHE_DIR
+DEFAULT_CACHE_DIR = os.environ.get("LAYOUT_CACHE_DIR") or None
+# A 6 MB PDF can take 35 MB of layout, so the cache gets a budget and a lifetime
+MAX_CACHE_BYTES = int(float(os.environ.get("LAYOUT_CACHE_MAX_MB", 1024)) * 1024 * 1024)
+MAX_AGE_SECONDS = float(os.environ.get("LAYOUT_CACHE_MAX_AGE_DAYS", 7)) * 24 * 3600
+
+# Settings that change how pages run, not what the parse produces
+_EXECUTION_SETTINGS = {"multi_processing", "cpu_count", "debug", "raw_exceptions"}
+
+# pdf2docx BlockType values
+TEXT_BLOCK = 0
+TABLE_BLOCKS = (2, 3)
+
+
+def _pdf2docx_version():
+    try:
+        from importlib.metadata import version
+        return version("pdf2docx")
+    except Exception:
+        return "unknown"
+
+
+def pdf2docx_converter():
+    """
+    pdf2docx's Converter class. pdf2docx still imports 'fitz', whose
+    deprecation notice PyMuPDF writes to stdout, where the converters send
+    their output; PyMuPDF's messages are moved to stderr before it loads.
+    """
+    try:
+        import pymupdf
+        pymupdf.set_messages(fd=2)
+    except (ImportError, AttributeError):
+        pass
+    from pdf2docx import Converter
+    return Converter
+
+
+def file_digest(pdf_path):
+    sha = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def layout_key(pdf_path, page_args=None, settings=None, digest=None):
+    """
+    Hash of the document content and everything that shapes its layout;
+    pass digest (file_digest()) to avoid re-reading the file per key.
+    """
+    sha = hashlib.sha256((digest or file_digest(pdf_path)).encode())
+    parse_settings = {k: v for k, v in (settings or {}).items() if k not in _EXECUTION_SETTINGS}
+    sha.update(json.dumps({"pdf2docx": _pdf2docx_version(),
+                           "pages": page_args or {},
+                           "settings": parse_settings}, sort_keys=True).encode())
+    return sha.hexdigest()
+
+
+def _cache_file(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], key + ".json.gz")
+
+
+def _private_dir(path, label="Layout cache"):
+    """
+    Create path (mode 0700) or tighten an existing one of ours; False if it
+    belongs to another user, whose directory we must not write a cache to
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.stat(path)
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        print(f"⚠️ {label} {path} belongs to another user, not caching", file=sys.stderr)
+        return False
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return True
+
+
+def has_layout(key, cache_dir=DEFAULT_CACHE_DIR):
+    return bool(cache_dir) and os.path.exists(_cache_file(cache_dir, key))
+
+
+def load_layout(key, cache_dir=DEFAULT_CACHE_DIR):
+    """The cached Converter.store() dict for key, or None."""
+    if not cache_dir:
+        return None
+    path = _cache_file(cache_dir, key)
+    try:
+        if time.time() - os.path.getmtime(path) > MAX_AGE_SECONDS:
+            os.remove(path)
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            layout = json.load(f)
+        # The modification time doubles as the last use for eviction
+        os.utime(path)
+        return layout
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable layout cache {path}: {e}", file=sys.stderr)
+        return None
+
+
+def drop_layout(key, cache_dir=DEFAULT_CACHE_DIR):
+    """Remove a cached layout, if there is one."""
+    if cache_dir:
+        _remove(_cache_file(cache_dir, key))
+
+
+def prune_cache(cache_dir=DEFAULT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES, max_age=MAX_AGE_SECONDS,
+                label="Layout cache"):
+    """
+    Remove entries unused for max_age seconds, then the least recently used
+    until the rest fit in max_bytes
+
+    Returns:
+        Tuple of (entries removed, bytes left)
+    """
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return 0, 0
+    now = time.time()
+    entries = []
+    removed = 0
+    for root, _, names in os.walk(cache_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if now - info.st_mtime > max_age:
+                removed += _remove(path)
+            elif not name.endswith(".tmp"):
+                # A temporary file is another writer's until it is abandoned
+                entries.append((info.st_mtime, info.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        removed += _remove(path)
+        total -= size
+    if removed:
+        print(f"🧹 {label}: removed {removed} entr{'y' if removed == 1 else 'ies'}, "
+              f"{total / 1024 / 1024:.1f} MB left", file=sys.stderr)
+    return removed, total
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return 1
+    except FileNotFoundError:
+        return 0
+
+
+def save_layout(key, layout, cache_dir=DEFAULT_CACHE_DIR, prune=True):
+    """
+    Write a layout atomically, so readers never see a partial file, then
+    prune the cache back into its budget (unless prune is False, for
+    checkpoints that must survive until they are merged)
+    """
+    if not cache_dir or not _private_dir(cache_dir):
+        return
+    path = _cache_file(cache_dir, key)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8', compresslevel=6) as f:
+        json.dump(layout, f, separators=(",", ":"))
+    os.replace(temp_path, path)
+    if prune:
+        prune_cache(cache_dir)
+
+
+def parse_layout(pdf_path, page_args=None, cache_dir=DEFAULT_CACHE_DIR, digest=None, prune=True,
+                 **settings):
+    """
+    The pdf2docx layout for the selected pages, parsed only on a cache miss
+    (single process, no .docx is generated); prune is passed to save_layout()
+
+    Returns:
+        Tuple of (layout dict, True if it came from the cache)
+    """
+    key = layout_key(pdf_path, page_args, settings, digest)
+    layout = load_layout(key, cache_dir)
+    if layout is not None:
+        return layout, True
+
+    Converter = pdf2docx_converter()
+    cv = Converter(pdf_path)
+    try:
+        # parse() expects the full settings that convert() would merge in
+        parse_settings = cv.default_settings
+        parse_settings.update(settings)
+        cv.parse(**(page_args or {}), **parse_settings)
+        layout = cv.store()
+    finally:
+        cv.close()
+    save_layout(key, layout, cache_dir, prune)
+    return layout, False
+
+
+# ---- Reading the stored layout ----
+
+def _line_text(line):
+    text = "".join(span.get("text", "") for span in line.get("spans", []))
+    return text + "\n" if line.get("line_break") else text
+
+
+def _block_text(block):
+    if block.get("type") == TEXT_BLOCK:
+        return "".join(_line_text(line) for line in block.get("lines", [])).strip()
+    if block.get("type") in TABLE_BLOCKS:
+        return "\n".join(" ".join(_cell_text(cell) for cell in row.get("cells", []))
+                         for row in block.get("rows", []))
+    return ""
+
+
+def _cell_text(cell):
+    # Cells swallowed by a merge are stored as None
+    if not cell:
+        return ""
+    return "\n".join(text for text in map(_block_text, cell.get("blocks", [])) if text)
+
+
+def iter_blocks(layout):
+    """
+    Top-level content of a stored layout in document order: pages, then
+    sections, columns and blocks
+
+    Yields:
+        ("text", text, bold) for paragraphs and ("table", rows) for tables,
+        rows being lists of cell strings
+    """
+    for page in layout.get("pages", []):
+        for section in page.get("sections", []):
+            for column in section.get("columns", []):
+                for block in column.get("blocks", []):
+                    if block.get("type") == TEXT_BLOCK:
+                        text = _block_text(block)
+                        if text:
+                            bold = any(span.get("flags", 0) & 16
+                                       for line in block.get("lines", [])
+                                       for span in line.get("spans", []))
+                            yield "text", text, bold
+                    elif block.get("type") in TABLE_BLOCKS:
+                        rows = [[_cell_text(cell) for cell in row.get("cells", [])]
+                                for row in block.get("rows", [])]
+                        if rows:
+                            yield "table", rows
+
+
+if __name__ == "__main__":
+    from page_selection import select_pages, pdf2docx_page_args
+
+    parser = argparse.ArgumentParser(description="Parse a PDF with pdf2docx into the layout cache")
+    parser.add_argument("input_pdf", nargs="?", help="Input PDF")
+    parser.add_argument("--pages", default=None, help="Page selection, e.g. 1-3,10,40-")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Layout cache directory (default LAYOUT_CACHE_DIR, unset disables caching)")
+    parser.add_argument("--prune", action="store_true", help="Only apply the size and age limits")
+    args = parser.parse_args()
+
+    if args.prune:
+        removed, left = prune_cache(args.cache_dir)
+        print(f"{removed} removed, {left / 1024 / 1024:.1f} MB in {args.cache_dir or '(no cache)'}")
+        sys.exit(0)
+    if not args.input_pdf:
+        parser.error("input_pdf is required unless --prune is given")
+
+    page_args = pdf2docx_page_args(select_pages(args.input_pdf, args.pages))
+    layout, cached = parse_layout(args.input_pdf, page_args, args.cache_dir)
+    blocks = list(iter_blocks(layout))
+    tables = sum(1 for block in blocks if block[0] == "table")
+    print(f"{'cached' if cached else 'parsed'}: {len(layout.get('pages', []))} page(s), "
+          f"{len(blocks) - tables} paragraph(s), {tables} table(s)")
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Local Conversion Jobs
+Entry points that run the converters in this directory directly on a file
+path, for callers that already live on the same machine as the files (the
+MCP server in 'local' mode). They mirror what server.ts does for the
+matching HTTP routes, but write the result next to the input (or into a
+given directory) and return a small JSON-able dict instead of streaming
+the file back.
+
+The functions are meant to run inside a process pool created with
+init_worker as initializer: the converters log progress to stdout, which
+in the MCP server is the protocol channel, so the worker points stdout at
+stderr before anything is imported. Each accepts an optional JobProgress,
+which publishes per-page progress to the caller and carries its cancel flag.
+
+Usage (one job in the current process, result printed as JSON):
+    python local_jobs.py convert <format> <input_pdf> <output_file>
+    python local_jobs.py compress <input_pdf> <output_pdf> [--quality 60]
+    python local_jobs.py extract-text <input_pdf> <output_txt>
+"""
+
+import sys
+import os
+import json
+import re
+import time
+import logging
+import argparse
+
+# Output extension per conversion format, as in server.ts
+CONVERT_FORMATS = {"word": ".docx", "excel": ".xlsx", "ppt": ".pptx", "html": ".html", "text": ".txt"}
+
+# The MCP tools take a named compression level; compress_pdf.py takes 1-100
+COMPRESS_QUALITIES = {"low": 40, "medium": 60, "high": 85}
+
+# pdf2docx logs '[3/4] Parsing pages...' per step and '(i/n) Page p' per page
+_PDF2DOCX_STEP_RE = re.compile(r"\[\d+/\d+\] ([^.\x1b]+)")
+_PDF2DOCX_PAGE_RE = re.compile(r"\((\d+)/(\d+)\) Page \d+")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once its cancel flag is set."""
+
+
+class JobProgress:
+    """
+    Progress sink for one job: writes {"stage", "done", "total"} into a
+    mapping shared with the caller (a multiprocessing Manager dict) and
+    raises JobCancelled when the caller has set '<key>:cancel'. Picklable,
+    so it can be passed to a pool worker along with the job arguments.
+    """
+
+    def __init__(self, shared=None, key=""):
+        self.shared = {} if shared is None else shared
+        self.key = key
+
+    def __call__(self, stage, done=0, total=None):
+        self.shared[self.key] = {"stage": stage, "done": done, "total": total}
+        self.check()
+
+    def check(self):
+        if self.shared.get(self.key + ":cancel"):
+            raise JobCancelled("Job cancelled")
+
+
+class _Pdf2docxProgress(logging.Handler):
+    """Turn pdf2docx's per-page log lines into JobProgress calls."""
+
+    def __init__(self, progress):
+        super().__init__(logging.INFO)
+        self.progress = progress
+        self.stage = "converting"
+
+    def emit(self, record):
+        message = record.getMessage()
+        step = _PDF2DOCX_STEP_RE.search(message)
+        if step:
+            self.stage = step.group(1).strip().lower()
+            return
+        page = _PDF2DOCX_PAGE_RE.search(message)
+        if page:
+            # JobCancelled propagates into pdf2docx, which fails the remaining
+            # pages quickly; convert() re-checks the flag afterwards
+            self.progress(self.stage, int(page.group(1)), int(page.group(2)))
+
+
+def init_worker():
+    """Send everything written to stdout in this process to stderr."""
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), 1)
+    sys.stdout = sys.stderr
+
+
+def output_path_for(input_path, suffix, output_dir=None):
+    """Build '<output_dir or input dir>/<input name><suffix>'."""
+    output_dir = output_dir or os.path.dirname(os.path.abspath(input_path))
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, base_name + suffix)
+
+
+def _result(output_path, started, **extra):
+    if not os.path.exists(output_path) or not os.path.getsize(output_path):
+        raise RuntimeError(f"Converter produced no output: {output_path}")
+    return {
+        "output_path": output_path,
+        "size": os.path.getsize(output_path),
+        "elapsed_ms": int((time.perf_counter() - started) * 1000),
+        **extra,
+    }
+
+
+def convert(input_path, format, output_path, workers=None, progress=None, pages=None):
+    """
+    Convert a PDF (or the selected pages, e.g. "1-3,10,40-") with the same
+    converter the /api/convert route uses
+
+    Returns:
+        Dict with output_path, size and elapsed_ms
+    """
+    if format not in CONVERT_FORMATS:
+        raise ValueError(f"Unknown format: {format}")
+    progress = progress or JobProgress()
+    started = time.perf_counter()
+    progress("converting")
+
+    # Converters are imported on first use; each pulls in heavy libraries
+    if format == "text":
+        from pdf_to_text import pdf_to_text
+        success = pdf_to_text(input_path, output_path, workers,
+                              lambda page, total: progress("extracting", page, total), pages)
+    elif format == "excel":
+        from py_word_excel_html_ppt import pdf_to_excel
+        success = pdf_to_excel(input_path, output_path, pages)
+    else:
+        import simple_pdf_converter
+        converter = {
+            "word": simple_pdf_converter.pdf_to_word_simple,
+            "ppt": simple_pdf_converter.pdf_to_ppt_simple,
+            "html": simple_pdf_converter.pdf_to_html_simple,
+        }[format]
+        root = logging.getLogger()
+        handler = _Pdf2docxProgress(progress)
+        level = root.level
+        root.addHandler(handler)
+        root.setLevel(min(level, logging.INFO))
+        try:
+            success = converter(input_path, output_path, pages)
+        finally:
+            root.removeHandler(handler)
+            root.setLevel(level)
+
+    # Converters catch their own errors, including a cancellation
+    progress.check()
+    if success is False:
+        raise RuntimeError(f"{format} conversion failed")
+    return _result(output_path, started, format=format)
+
+
+def compress(input_path, output_path, quality="medium", workers=None, progress=None):
+    """
+    Compress a PDF with compress_pdf.py
+
+    Args:
+        quality: 'low', 'medium', 'high' or a 1-100 number
+
+    Returns:
+        Dict with output_path, size, original_size, ratio and elapsed_ms
+    """
+    from compress_pdf import compress_pdf
+
+    progress = progress or JobProgress()
+    started = time.perf_counter()
+    progress("compressing")
+    level = COMPRESS_QUALITIES.get(quality, quality)
+    success, original_size, compressed_size = compress_pdf(input_path, output_path, int(level),
+                                                           workers=workers)
+    progress.check()
+    if not success:
+        raise RuntimeError("Compression failed")
+    return _result(output_path, started, original_size=original_size,
+                   ratio=round(compressed_size / original_size, 4) if original_size else None)
+
+
+def extract_text(input_path, output_path, workers=None, progress=None, pages=None):
+    """
+    Extract text with OCR only where needed (ocr_pdf.py), writing the text
+    file and returning the same fields as /api/ocr/extract. pages limits
+    extraction to a selection such as "1-3,10,40-".
+
+    Returns:
+        Dict with output_path, size, elapsed_ms, total_pages, engines, text and pages
+    """
+    from ocr_pdf import iter_pages
+    from page_selection import parse_pages
+
+    progress = progress or JobProgress()
+    started = time.perf_counter()
+    progress("extracting")
+    engines = {}
+    texts = []
+    records = []
+    selected = None
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for record in iter_pages(input_path, workers=workers, pages=pages):
+            engines[record["engine"]] = engines.get(record["engine"], 0) + 1
+            texts.append(record["text"])
+            total_pages = record.pop("total_pages")
+            if selected is None:
+                selected = len(parse_pages(pages, total_pages))
+            records.append(record)
+            progress("extracting", len(records), selected)
+        f.write("\n".join(texts))
+    return _result(output_path, started, total_pages=len(records), engines=engines,
+                   text="\n".join(texts), pages=records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one local conversion job")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = commands.add_parser("convert", help="Convert a PDF")
+    convert_parser.add_argument("format", choices=list(CONVERT_FORMATS))
+    convert_parser.add_argument("input_pdf")
+    convert_parser.add_argument("output_file")
+    convert_parser.add_argument("--pages", default=None, help="Page selection, e.g. 1-3,10,40-")
+
+    compress_parser = commands.add_parser("compress", help="Compress a PDF")
+    compress_parser.add_argument("input_pdf")
+    compress_parser.add_argument("output_pdf")
+    compress_parser.add_argument("--quality", default="medium",
+                                 help="low, medium, high or 1-100")
+
+    extract_parser = commands.add_parser("extract-text", help="Extract text, with OCR where needed")
+    extract_parser.add_argument("input_pdf")
+    extract_parser.add_argument("output_txt")
+    extract_parser.add_argument("--pages", default=None, help="Page selection, e.g. 1-3,10,40-")
+
+    args = parser.parse_args()
+    # Keep the real stdout for the result line; converter logs go to stderr
+    result_fd = os.dup(1)
+    init_worker()
+    try:
+        if args.command == "convert":
+            result = convert(args.input_pdf, args.format, args.output_file, pages=args.pages)
+        elif args.command == "compress":
+            result = compress(args.input_pdf, args.output_pdf, args.quality)
+        else:
+            result = extract_text(args.input_pdf, args.output_txt, pages=args.pages)
+            result.pop("pages")
+            result.pop("text")
+    except Exception as e:
+        print(f"[LocalJobs] Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    os.write(result_fd, (json.dumps(result) + "\n").encode())
+    sys.exit(0)
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Multi-Target Export
+Converts one PDF to several formats (word, excel, ppt, html, text) from a
+single parse. The selected pages are opened and extracted once with PyMuPDF
+into a plain page model:
+
+    {"number", "width", "height", "text",
+     "lines":  [{"bbox", "spans": [{"text", "size", "bold", "italic", "color"}]}],
+     "images": [{"bbox", "ext", "data"}],
+     "tables": [{"bbox", "rows"}],
+     "render": PNG bytes (only when ppt is requested)}
+
+Each writer then builds its output from that model, in a pool of worker
+processes when more than one format is requested, and the outputs are
+written as one zip stream in the order they finish.
+
+With a deadline, pages the extraction falls behind on lose their images and
+tables and are rendered at a lower resolution, and pages it cannot reach
+are left out of every format.
+
+Usage:
+    python multi_export.py <input_pdf> <output_zip|-> --formats word,excel,ppt
+        [--pages 1-3,10] [--name BASE] [--workers N] [--deadline SECONDS]
+"""
+
+import sys
+import os
+import io
+import html
+import time
+import zipfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+from page_selection import parse_pages, format_pages
+from scratch import job_scratch
+from deadline import FULL, MINIMAL, LEFT_OUT, as_deadline
+
+EXTENSIONS = {
+    "word": ".docx",
+    "excel": ".xlsx",
+    "ppt": ".pptx",
+    "html": ".html",
+    "text": ".txt",
+}
+
+# What each writer reads from the model; nothing else is extracted
+NEEDS = {
+    "word": {"lines", "images", "tables"},
+    "excel": {"text", "tables"},
+    "ppt": {"render"},
+    "html": {"lines", "images", "tables"},
+    "text": {"text"},
+}
+
+# Office formats are already deflated; storing them again saves CPU
+STORED = {"word", "excel", "ppt"}
+
+RENDER_DPI = 150
+# Slide renders of pages behind the deadline
+REDUCED_RENDER_DPI = 72
+# Model parts left out of pages behind the deadline
+REDUCED_SKIPS = {"images", "tables"}
+# Share of the deadline's working budget for the parse; the writers get the rest
+EXTRACT_SHARE = 0.5
+
+
+# ---- Extraction (once per document) ----
+
+def _inside(bbox, boxes):
+    """True if bbox's centre lies in any of boxes (text already in a table)."""
+    cx, cy = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+    return any(x0 <= cx <= x1 and y0 <= cy <= y1 for x0, y0, x1, y1 in boxes)
+
+
+def extract_page(page, needs, render_dpi=RENDER_DPI):
+    """Extract one fitz page into the model dict, limited to `needs`."""
+    model = {
+        "number": page.number + 1,
+        "width": page.rect.width,
+        "height": page.rect.height,
+        "lines": [],
+        "images": [],
+        "tables": [],
+        "text": "",
+        "render": None,
+    }
+
+    if "tables" in needs and hasattr(page, "find_tables"):
+        try:
+            for table in page.find_tables().tables:
+                rows = [[cell or "" for cell in row] for row in table.extract()]
+                if rows:
+                    model["tables"].append({"bbox": tuple(table.bbox), "rows": rows})
+        except Exception as e:
+            print(f"[multi_export] Table detection failed on page {model['number']}: {e}", file=sys.stderr)
+    table_boxes = [table["bbox"] for table in model["tables"]]
+
+    if "lines" in needs or "images" in needs:
+        flags = fitz.TEXT_PRESERVE_IMAGES if "images" in needs else 0
+        for block in page.get_text("dict", flags=flags, sort=True)["blocks"]:
+            if block["type"] == 1:
+                model["images"].append({"bbox": tuple(block["bbox"]),
+                                        "ext": block.get("ext", "png"),
+                                        "data": block["image"]})
+                continue
+            for line in block.get("lines", []):
+                if _inside(line["bbox"], table_boxes):
+                    continue
+                spans = [{"text": span["text"],
+                          "size": round(span["size"], 1),
+                          "bold": bool(span["flags"] & 16),
+                          "italic": bool(span["flags"] & 2),
+                          "color": span["color"]}
+                         for span in line["spans"] if span["text"].strip()]
+                if spans:
+                    model["lines"].append({"bbox": tuple(line["bbox"]), "spans": spans})
+
+    if "text" in needs:
+        model["text"] = page.get_text()
+
+    if "render" in needs:
+        model["render"] = page.get_pixmap(dpi=render_dpi).tobytes("png")
+
+    return model
+
+
+def extract_document(pdf_path, formats, pages=None, deadline=None):
+    """
+    Parse the selected pages once into the page model for `formats`; pages
+    behind the deadline are extracted more cheaply or left out
+
+    Returns:
+        List of page dicts, in page order
+    """
+    if not HAS_PYMUPDF:
+        raise RuntimeError("PyMuPDF not available for multi-format export")
+    deadline = as_deadline(deadline)
+    needs = set().union(*(NEEDS[fmt] for fmt in formats))
+    with fitz.open(pdf_path) as doc:
+        indexes = parse_pages(pages, len(doc))
+        print(f"[multi_export] Extracting {len(indexes)} page(s): {format_pages(indexes)} "
+              f"({', '.join(sorted(needs))})", file=sys.stderr)
+        model = []
+        stop_at = deadline.stop_at(EXTRACT_SHARE)
+        pages_started = time.monotonic()
+        for position, index in enumerate(indexes):
+            step = deadline.step(position, len(indexes), pages_started, stop_at)
+            if step == MINIMAL:
+                deadline.degrade(index + 1, LEFT_OUT)
+                continue
+            if step == FULL:
+                model.append(extract_page(doc[index], needs))
+                continue
+            how = [f"{part} left out" for part in sorted(needs & REDUCED_SKIPS)]
+            if "render" in needs:
+                how.append(f"rendered at {REDUCED_RENDER_DPI} DPI")
+            if how:
+                deadline.degrade(index + 1, ", ".join(how))
+            model.append(extract_page(doc[index], needs - REDUCED_SKIPS, REDUCED_RENDER_DPI))
+        return model
+
+
+def _blocks(page):
+    """Lines, tables and images of a page in reading order."""
+    items = [(line["bbox"], "line", line) for line in page["lines"]]
+    items += [(table["bbox"], "table", table) for table in page["tables"]]
+    items += [(image["bbox"], "image", image) for image in page["images"]]
+    items.sort(key=lambda item: (round(item[0][1]), item[0][0]))
+    return [(kind, item) for _, kind, item in items]
+
+
+# ---- Writers (one per format, all read the same model) ----
+
+def write_word(model, output_docx):
+    from docx import Document
+    from docx.shared import Inches, Pt, RGBColor
+
+    doc = Document()
+    if model:
+        section = doc.sections[0]
+        section.page_width = Inches(model[0]["width"] / 72)
+        section.page_height = Inches(model[0]["height"] / 72)
+        for side in ("top_margin", "bottom_margin", "left_margin", "right_margin"):
+            setattr(section, side, Inches(0.5))
+    usable_width = max(1.0, (model[0]["width"] / 72 - 1.0) if model else 6.5)
+
+    for position, page in enumerate(model):
+        for kind, item in _blocks(page):
+            if kind == "line":
+                paragraph = doc.add_paragraph()
+                paragraph.paragraph_format.space_after = Pt(0)
+                for span in item["spans"]:
+                    run = paragraph.add_run(span["text"])
+                    run.font.size = Pt(span["size"])
+                    run.bold = span["bold"]
+                    run.italic = span["italic"]
+                    run.font.color.rgb = RGBColor.from_string(f"{span['color']:06X}")
+            elif kind == "table":
+                rows = item["rows"]
+                table = doc.add_table(rows=len(rows), cols=max(len(row) for row in rows))
+                table.style = "Table Grid"
+                for r, row in enumerate(rows):
+                    for c, value in enumerate(row):
+                        table.cell(r, c).text = str(value)
+            else:
+                width = min(usable_width, (item["bbox"][2] - item["bbox"][0]) / 72)
+                try:
+                    doc.add_picture(io.BytesIO(item["data"]), width=Inches(max(width, 0.1)))
+                except Exception as e:
+                    print(f"[multi_export] Skipped image on page {page['number']}: {e}", file=sys.stderr)
+        if position < len(model) - 1:
+            doc.add_page_break()
+
+    doc.save(output_docx)
+
+
+def write_excel(model, output_xlsx):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    for page in model:
+        for table_idx, table in enumerate(page["tables"], 1):
+            ws = wb.create_sheet(title=f"P{page['number']}_T{table_idx}")
+            for row in table["rows"]:
+                ws.append(row)
+        if page["text"].strip():
+            ws = wb.create_sheet(title=f"P{page['number']}_Text")
+            for line in page["text"].split("\n"):
+                ws.append([line])
+            ws.column_dimensions['A'].width = 100
+    if not wb.sheetnames:
+        wb.create_sheet(title="Empty")
+    wb.save(output_xlsx)
+
+
+def write_ppt(model, output_pptx):
+    from pptx import Presentation
+    from pptx.util import Emu
+
+    prs = Presentation()
+    if model:
+        # Slides take the first page's proportions (points -> EMU)
+        prs.slide_width = Emu(int(model[0]["width"] * 12700))
+        prs.slide_height = Emu(int(model[0]["height"] * 12700))
+    blank = prs.slide_layouts[6]
+    for page in model:
+        slide = prs.slides.add_slide(blank)
+        slide.shapes.add_picture(io.BytesIO(page["render"]), 0, 0,
+                                 width=prs.slide_width, height=prs.slide_height)
+    prs.save(output_pptx)
+
+
+def write_html(model, output_html):
+    import base64
+
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>PDF to HTML</title>'
+             '<style>body{font-family:Arial,sans-serif;max-width:900px;margin:auto}'
+             'table{border-collapse:collapse;margin:8px 0}td{border:1px solid #999;padding:2px 6px}'
+             '.page{border-bottom:1px solid #ccc;padding:16px 0}p{margin:2px 0}</style></head><body>']
+    for page in model:
+        parts.append(f'<div class="page"><h2>Page {page["number"]}</h2>')
+        for kind, item in _blocks(page):
+            if kind == "line":
+                spans = []
+                for span in item["spans"]:
+                    style = f"font-size:{span['size']}pt;color:#{span['color']:06x}"
+                    if span["bold"]:
+                        style += ";font-weight:bold"
+                    if span["italic"]:
+                        style += ";font-style:italic"
+                    spans.append(f'<span style="{style}">{html.escape(span["text"])}</span>')
+                parts.append(f'<p>{"".join(spans)}</p>')
+            elif kind == "table":
+                rows = "".join("<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in row) + "</tr>"
+                               for row in item["rows"])
+                parts.append(f"<table>{rows}</table>")
+            else:
+                data = base64.b64encode(item["data"]).decode("ascii")
+                width = int(item["bbox"][2] - item["bbox"][0])
+                parts.append(f'<img src="data:image/{item["ext"]};base64,{data}" width="{width}">')
+        parts.append("</div>")
+    parts.append("</body></html>")
+    with open(output_html, 'w', encoding='utf-8') as f:
+        f.write("".join(parts))
+
+
+def write_text(model, output_txt):
+    with open(output_txt, 'w', encoding='utf-8') as f:
+        for page in model:
+            if page["text"]:
+                f.write(f"\n--- Page {page['number']} ---\n{page['text']}\n")
+
+
+WRITERS = {
+    "word": write_word,
+    "excel": write_excel,
+    "ppt": write_ppt,
+    "html": write_html,
+    "text": write_text,
+}
+
+
+# Worker processes receive the model once, through the initializer
+_MODEL = None
+
+
+def _init_writer(model):
+    global _MODEL
+    _MODEL = model
+
+
+def _run_writer(fmt, output_path):
+    started = time.perf_counter()
+    WRITERS[fmt](_MODEL, output_path)
+    return fmt, output_path, int((time.perf_counter() - started) * 1000)
+
+
+# ---- Export ----
+
+def export_formats(pdf_path, formats, out, pages=None, name=None, workers=None, deadline=None):
+    """
+    Convert pdf_path to every format in `formats` from one parse and write
+    the outputs to `out` (a path or a binary stream such as stdout) as a
+    zip, each member named <name><extension>. The deadline (a
+    deadline.Deadline or seconds) bounds the parse, see extract_document().
+
+    Returns:
+        List of {"format", "name", "bytes", "ms"} in the order written
+    """
+    formats = list(dict.fromkeys(fmt.strip().lower() for fmt in formats if fmt.strip()))
+    unknown = [fmt for fmt in formats if fmt not in WRITERS]
+    if not formats or unknown:
+        raise ValueError(f"Unknown format(s) {', '.join(unknown)}; choose from {', '.join(WRITERS)}")
+    name = name or os.path.splitext(os.path.basename(pdf_path))[0]
+
+    started = time.perf_counter()
+    model = extract_document(pdf_path, formats, pages, deadline)
+    print(f"[multi_export] Parsed {len(model)} page(s) in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+    written = []
+    with job_scratch("multi-export", os.path.getsize(pdf_path) * 2 * len(formats)) as work_dir, \
+            zipfile.ZipFile(out, "w") as archive:
+
+        def add(fmt, output_path, ms):
+            member = name + EXTENSIONS[fmt]
+            compression = zipfile.ZIP_STORED if fmt in STORED else zipfile.ZIP_DEFLATED
+            archive.write(output_path, member, compress_type=compression)
+            written.append({"format": fmt, "name": member, "bytes": os.path.getsize(output_path), "ms": ms})
+            os.remove(output_path)
+            print(f"[multi_export] ✓ {member} ({ms} ms)", file=sys.stderr)
+
+        targets = [(fmt, os.path.join(work_dir, fmt + EXTENSIONS[fmt])) for fmt in formats]
+        workers = max(1, min(workers or os.cpu_count() or 1, len(targets)))
+        if workers == 1:
+            _init_writer(model)
+            for fmt, output_path in targets:
+                add(*_run_writer(fmt, output_path))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_writer,
+                                     initargs=(model,)) as executor:
+                futures = [executor.submit(_run_writer, fmt, output_path) for fmt, output_path in targets]
+                for future in as_completed(futures):
+                    add(*future.result())
+
+    print(f"[multi_export] ✅ {len(written)} format(s) in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a PDF to several formats from one parse, as a zip")
+    parser.add_argument("input_pdf", help="Input PDF")
+    parser.add_argument("output_zip", help="Output zip path, or - for stdout")
+    parser.add_argument("--formats", required=True, help=f"Comma-separated: {', '.join(WRITERS)}")
+    parser.add_argument("--pages", default=None, help="Page selection, e.g. 1-3,10,40-")
+    parser.add_argument("--name", default=None, help="Base name of the files inside the zip")
+    parser.add_argument("--workers", type=int, default=None, help="Writer processes (one per format if omitted)")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="Seconds the export may take; pages behind it are extracted more cheaply")
+    args = parser.parse_args()
+
+    out = sys.stdout.buffer if args.output_zip == "-" else args.output_zip
+    deadline = as_deadline(args.deadline)
+    try:
+        export_formats(args.input_pdf, args.formats.split(","), out, args.pages, args.name, args.workers,
+                       deadline)
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    deadline.log_report()
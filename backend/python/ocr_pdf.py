@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Hybrid OCR Text Extraction
+Checks every page for a usable text layer with PyMuPDF and only sends
+image-only pages to Tesseract. OCR pages are rendered and recognised in a
+pool of worker processes, and results are cached by the hash of the
+rendered page, so re-processing the same scan (or the same page inside a
+different file) skips Tesseract entirely.
+
+Rendered pages go through the ocr_preprocess.py NumPy stage (binarize,
+deskew, despeckle, crop) before Tesseract unless --no-preprocess is given.
+
+The cache holds the text of every scanned page, so it is off unless
+OCR_CACHE_DIR (or --cache-dir) names a directory; like the layout cache it
+is private to the user (0700/0600) and pruned after each run to
+OCR_CACHE_MAX_MB, dropping entries unused for OCR_CACHE_MAX_AGE_DAYS first.
+
+Output uses the pdf_to_text.py page format, or one NDJSON record per page
+with --ndjson; the record 'engine' is 'text-layer', 'ocr', 'ocr-cache' or
+'ocr-failed' (an empty page where Tesseract failed). With --deadline
+SECONDS, pages whose OCR is not done in time are left out and listed in the
+'[Deadline]' report line.
+
+Usage:
+    python ocr_pdf.py <input_pdf> [output_txt] [--ndjson] [--lang eng]
+        [--dpi 300] [--workers N] [--cache-dir DIR] [--no-preprocess]
+        [--pages 1-3,10,40-] [--deadline SECONDS]
+"""
+
+import sys
+import os
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed, TimeoutError as FutureTimeout
+
+try:
+    # 'import fitz' prints a deprecation notice to stdout in newer PyMuPDF,
+    # which would corrupt the NDJSON stream
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+    print("Warning: PyMuPDF not available", file=sys.stderr)
+
+try:
+    import pytesseract
+    from PIL import Image
+    HAS_TESSERACT = True
+except ImportError:
+    HAS_TESSERACT = False
+    print("Warning: pytesseract not available - OCR disabled", file=sys.stderr)
+
+from pdf_to_text import MAX_REPLACEMENT_RATIO, _format_page
+from page_selection import parse_pages, page_count
+from ocr_preprocess import HAS_NUMPY, PREPROCESS_VERSION, preprocess_pixmap
+from layout_cache import _private_dir, prune_cache
+from deadline import LEFT_OUT, as_deadline
+
+# Resolution pages are rendered at for OCR
+OCR_DPI = 300
+
+# A text layer with fewer characters than this is treated as missing
+MIN_TEXT_LAYER_CHARS = 20
+
+# None turns caching off; the server opts in by setting OCR_CACHE_DIR
+DEFAULT_CACHE_DIR = os.environ.get("OCR_CACHE_DIR") or None
+CACHE_LABEL = "OCR cache"
+MAX_CACHE_BYTES = int(float(os.environ.get("OCR_CACHE_MAX_MB", 256)) * 1024 * 1024)
+MAX_AGE_SECONDS = float(os.environ.get("OCR_CACHE_MAX_AGE_DAYS", 7)) * 24 * 3600
+
+# Per-process document opened by _init_worker
+_worker_doc = None
+
+
+def has_usable_text_layer(text):
+    """True if a page's text layer has enough decodable text to skip OCR."""
+    text = text.strip()
+    if len(text) < MIN_TEXT_LAYER_CHARS:
+        return False
+    return text.count("\ufffd") / len(text) <= MAX_REPLACEMENT_RATIO
+
+
+def _init_worker(pdf_path):
+    """Open the source PDF once per worker process (pool workers only)."""
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)
+    # Tesseract's own OpenMP threads would oversubscribe the cores the pool uses
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _cache_file(cache_dir, digest):
+    return os.path.join(cache_dir, digest[:2], digest + ".txt")
+
+
+def ocr_page(page_index, dpi, lang, cache_dir, preprocess=True, doc=None):
+    """
+    Render one page in grayscale and OCR it, consulting the cache first.
+    With preprocess, Tesseract gets the cleaned bitmap from ocr_preprocess
+    and blank pages skip Tesseract altogether. doc defaults to the
+    document the worker process opened.
+
+    Returns:
+        Tuple of (page_index, text, engine, seconds)
+    """
+    started = time.perf_counter()
+    doc = _worker_doc if doc is None else doc
+    pix = doc[page_index].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+
+    # The key covers the rendered pixels and everything that changes the output
+    key = hashlib.sha256()
+    preprocess = preprocess and HAS_NUMPY
+    stage = f"pre{PREPROCESS_VERSION}" if preprocess else "raw"
+    key.update(f"{pix.width}x{pix.height}:{lang}:{stage}:".encode())
+    key.update(pix.samples)
+    cache_file = _cache_file(cache_dir, key.hexdigest()) if cache_dir else None
+
+    if cache_file and os.path.exists(cache_file):
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            text = f.read()
+        # The modification time doubles as the last use for pruning
+        os.utime(cache_file)
+        return page_index, text, "ocr-cache", time.perf_counter() - started
+
+    if preprocess:
+        image, _ = preprocess_pixmap(pix, dpi)
+    else:
+        image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    try:
+        text = pytesseract.image_to_string(image, lang=lang) if image is not None else ""
+    except Exception as e:
+        # pytesseract's exceptions cannot be unpickled in the parent, which
+        # would break the whole pool instead of failing this page
+        raise RuntimeError(f"Tesseract failed on page {page_index + 1}: {e}") from None
+
+    if cache_file:
+        os.makedirs(os.path.dirname(cache_file), mode=0o700, exist_ok=True)
+        temp_path = f"{cache_file}.{os.getpid()}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, cache_file)
+    return page_index, text, "ocr", time.perf_counter() - started
+
+
+def _failed_page(index, error):
+    """Result for a page Tesseract could not read: empty, so the document still completes."""
+    print(f"   ✗ Page {index + 1}: {error}", file=sys.stderr)
+    return index, "", "ocr-failed", 0.0
+
+
+def _run_ocr(pdf_path, page_indexes, dpi, lang, cache_dir, workers, preprocess, stop_at=None):
+    """
+    Yield OCR results in completion order, in a process pool when useful;
+    pages not started or finished by stop_at (time.monotonic()) are dropped
+    and a page that fails comes back empty as 'ocr-failed'
+    """
+    if len(page_indexes) < 2 or workers == 1:
+        # In-process: no thread limit for Tesseract and no document left open
+        with fitz.open(pdf_path) as doc:
+            for index in page_indexes:
+                if stop_at is not None and time.monotonic() >= stop_at:
+                    return
+                try:
+                    result = ocr_page(index, dpi, lang, cache_dir, preprocess, doc)
+                except Exception as e:
+                    result = _failed_page(index, e)
+                yield result
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(pdf_path,))
+    futures = {executor.submit(ocr_page, index, dpi, lang, cache_dir, preprocess): index
+               for index in page_indexes}
+    timeout = None if stop_at is None else max(0.0, stop_at - time.monotonic())
+    finished = False
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = _failed_page(futures[future], e)
+            yield result
+        finished = True
+    except FutureTimeout:
+        print(f"   ⏱ OCR stopped at the deadline", file=sys.stderr)
+    finally:
+        # A deadline, a consumer that stops early or a failed page should not
+        # wait for the pages still being recognised, not even at exit
+        processes = list((executor._processes or {}).values())
+        executor.shutdown(wait=finished, cancel_futures=True)
+        if not finished:
+            for process in processes:
+                process.terminate()
+
+
+def iter_pages(pdf_path, lang="eng", dpi=OCR_DPI, workers=None, cache_dir=DEFAULT_CACHE_DIR,
+               preprocess=True, pages=None, stop_at=None):
+    """
+    Yield one record per selected page (all pages if pages is None), in page
+    order, as soon as it is available:
+    {"page", "total_pages", "text", "chars", "engine", "ms"}.
+    Pages with a usable text layer are read directly; the rest are OCRed.
+    Pages still waiting for OCR at stop_at (time.monotonic()) are left out.
+    """
+    pending = {}
+    ocr_indexes = []
+    with fitz.open(pdf_path) as doc:
+        if doc.needs_pass:
+            raise ValueError("PDF is encrypted - cannot extract text")
+        total_pages = len(doc)
+        indexes = parse_pages(pages, total_pages)
+        for index in indexes:
+            started = time.perf_counter()
+            text = doc[index].get_text()
+            if has_usable_text_layer(text):
+                pending[index] = (text, "text-layer", time.perf_counter() - started)
+            else:
+                ocr_indexes.append(index)
+
+    print(f"📄 Total pages: {total_pages}, text layer: {len(indexes) - len(ocr_indexes)}, "
+          f"OCR: {len(ocr_indexes)}", file=sys.stderr)
+    if ocr_indexes and not HAS_TESSERACT:
+        raise RuntimeError("pytesseract is required to OCR image-only pages")
+
+    position = 0
+
+    def release(skip_missing=False):
+        nonlocal position
+        while position < len(indexes) and (skip_missing or indexes[position] in pending):
+            position += 1
+            if indexes[position - 1] not in pending:
+                continue
+            text, engine, seconds = pending.pop(indexes[position - 1])
+            yield {
+                "page": indexes[position - 1] + 1,
+                "total_pages": total_pages,
+                "text": text,
+                "chars": len(text),
+                "engine": engine,
+                "ms": round(seconds * 1000, 2),
+            }
+
+    yield from release()
+    if ocr_indexes and cache_dir and not _private_dir(cache_dir, CACHE_LABEL):
+        cache_dir = None
+    workers = workers or os.cpu_count() or 1
+    for index, text, engine, seconds in _run_ocr(pdf_path, ocr_indexes, dpi, lang,
+                                                 cache_dir, workers, preprocess, stop_at):
+        pending[index] = (text, engine, seconds)
+        if engine != "ocr-failed":
+            print(f"   ✓ Page {index + 1}: {engine}", file=sys.stderr)
+        yield from release()
+    if ocr_indexes and cache_dir:
+        prune_cache(cache_dir, MAX_CACHE_BYTES, MAX_AGE_SECONDS, CACHE_LABEL)
+    # Only a stop time leaves pages without OCR; the pages after them still count
+    yield from release(skip_missing=True)
+
+
+def _record_left_out(records, pdf_path, pages, deadline):
+    """
+    Pass page records through, then record the selected pages the OCR did
+    not finish before the deadline as left out
+    """
+    seen = set()
+    for record in records:
+        seen.add(record["page"])
+        yield record
+    if deadline.limited:
+        for index in parse_pages(pages, page_count(pdf_path)):
+            if index + 1 not in seen:
+                deadline.degrade(index + 1, LEFT_OUT)
+
+
+def ocr_pdf(pdf_path, output_txt, lang="eng", dpi=OCR_DPI, workers=None,
+            cache_dir=DEFAULT_CACHE_DIR, preprocess=True, pages=None, deadline=None):
+    """
+    Extract text from a mixed scanned/digital PDF into a text file; pages
+    not OCRed before the deadline are left out
+
+    Returns:
+        Dict with per-engine page counts, or None if no text was found
+    """
+    print(f"⏳ Starting hybrid OCR extraction...", file=sys.stderr)
+    print(f"   Processing: {pdf_path}", file=sys.stderr)
+
+    deadline = as_deadline(deadline)
+    engines = {}
+    pages_with_text = 0
+    records = _record_left_out(iter_pages(pdf_path, lang, dpi, workers, cache_dir, preprocess, pages,
+                                          deadline.stop_at()), pdf_path, pages, deadline)
+    with open(output_txt, 'w', encoding='utf-8') as f:
+        for record in records:
+            engines[record["engine"]] = engines.get(record["engine"], 0) + 1
+            if not record["text"].strip():
+                continue
+            if pages_with_text:
+                f.write('\n')
+            f.write(_format_page(record["page"], record["text"]))
+            pages_with_text += 1
+
+    if not pages_with_text:
+        print(f"⚠️ No text found, even with OCR", file=sys.stderr)
+        return None
+    print(f"✅ Extraction completed: {pages_with_text} pages with text", file=sys.stderr)
+    for engine, count in sorted(engines.items()):
+        print(f"   ✓ {engine}: {count} page(s)", file=sys.stderr)
+    print(f"   ✓ Saved to: {output_txt}", file=sys.stderr)
+    return engines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract text with OCR only where needed")
+    parser.add_argument("input_pdf", help="Input PDF file")
+    parser.add_argument("output_txt", nargs="?", help="Output text file (omit with --ndjson)")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="Stream one JSON record per page to stdout instead")
+    parser.add_argument("--lang", default="eng", help="Tesseract language(s), e.g. eng+deu")
+    parser.add_argument("--dpi", type=int, default=OCR_DPI, help="OCR render resolution")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="OCR worker processes (CPU count if omitted)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="OCR result cache directory (default OCR_CACHE_DIR, unset disables caching)")
+    parser.add_argument("--no-preprocess", action="store_true",
+                        help="Send raw renders to Tesseract (skip ocr_preprocess.py)")
+    parser.add_argument("--pages", default=None,
+                        help="Pages to extract, e.g. 1-3,10,40- (all if omitted)")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="Seconds the extraction may take; pages not OCRed by then are left out")
+    args = parser.parse_args()
+    if not args.ndjson and not args.output_txt:
+        parser.error("output_txt is required unless --ndjson is given")
+    if not HAS_PYMUPDF:
+        print("Error: PyMuPDF is required. Install with: pip install PyMuPDF", file=sys.stderr)
+        sys.exit(1)
+
+    deadline = as_deadline(args.deadline)
+    try:
+        if args.ndjson:
+            success = False
+            records = iter_pages(args.input_pdf, args.lang, args.dpi, args.workers, args.cache_dir or None,
+                                 not args.no_preprocess, args.pages, deadline.stop_at())
+            for record in _record_left_out(records, args.input_pdf, args.pages, deadline):
+                sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+                sys.stdout.flush()
+                success = success or bool(record["chars"])
+        else:
+            success = ocr_pdf(args.input_pdf, args.output_txt, args.lang, args.dpi,
+                              args.workers, args.cache_dir or None,
+                              not args.no_preprocess, args.pages, deadline) is not None
+    except Exception as e:
+        print(f"⚠️ OCR extraction failed: {e}", file=sys.stderr)
+        success = False
+    deadline.log_report()
+    sys.exit(0 if success else 1)
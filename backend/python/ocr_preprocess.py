@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+OCR Page Pre-processing
+NumPy stage that turns a rendered PyMuPDF Pixmap into a clean, tight bitmap
+before it is handed to Tesseract:
+- grayscale conversion and adaptive (local mean) thresholding
+- projection-profile deskew
+- removal of small isolated specks
+- cropping of empty margins
+
+Every step works on arrays built directly over the Pixmap sample buffer;
+window sums use integral images, so the cost is linear in the page size.
+Used by ocr_pdf.py when NumPy is installed.
+
+Usage (writes the pre-processed page as PNG for inspection):
+    python ocr_preprocess.py <input_pdf> <page_number> <output_png> [--dpi 300]
+"""
+
+import sys
+import math
+import argparse
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    print("Warning: NumPy not available - OCR pre-processing disabled", file=sys.stderr)
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+    print("Warning: Pillow not available - OCR pre-processing disabled", file=sys.stderr)
+
+# Bumped whenever the output of preprocess_pixmap changes, so cached OCR
+# results from older pre-processing are not reused
+PREPROCESS_VERSION = 1
+
+# Adaptive threshold: a pixel is ink when it is this much darker than the
+# mean of its neighbourhood, which spans about a tenth of an inch
+THRESHOLD_PERCENT = 15
+THRESHOLD_WINDOW_INCHES = 0.1
+
+# Deskew search range and resolution in degrees, and the smallest skew that
+# is worth a rotation
+MAX_SKEW_DEGREES = 5.0
+SKEW_STEP_DEGREES = 0.2
+MIN_SKEW_DEGREES = 0.2
+
+# Ink pixels sampled for the projection profile
+MAX_DESKEW_SAMPLES = 200000
+
+# Specks are isolated blobs fitting in a square of this size (at 300 DPI),
+# smaller than the dot of an 'i' at body text sizes
+SPECK_SIZE_300DPI = 3
+
+# White border kept around the cropped content, as Tesseract expects some
+CROP_PADDING_INCHES = 0.05
+
+# ITU-R BT.601 luma weights for RGB renders
+_LUMA = (0.299, 0.587, 0.114)
+
+
+def pixmap_to_gray(pix):
+    """View a Pixmap's samples as a 2-D uint8 grayscale array."""
+    samples = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+    samples = samples.reshape(pix.height, pix.width, pix.n)
+    colors = pix.n - pix.alpha
+    if colors == 1:
+        return samples[:, :, 0]
+    rgb = samples[:, :, :3].astype(np.float32)
+    return (rgb @ np.array(_LUMA, dtype=np.float32)).astype(np.uint8)
+
+
+def _window_sums(values, radius, mode="constant", dtype=np.int64):
+    """
+    Sum of each (2r+1) x (2r+1) neighbourhood, via an integral image. Pixel
+    counts fit in int32, which halves the memory traffic of the cumsums.
+    """
+    size = 2 * radius + 1
+    padded = np.pad(values, radius, mode=mode)
+    integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1), dtype=dtype)
+    np.cumsum(np.cumsum(padded, axis=0, dtype=dtype), axis=1, out=integral[1:, 1:])
+    return (integral[size:, size:] - integral[:-size, size:]
+            - integral[size:, :-size] + integral[:-size, :-size])
+
+
+def binarize(gray, dpi):
+    """Return a boolean ink mask using a local mean (Bradley) threshold."""
+    radius = max(1, int(dpi * THRESHOLD_WINDOW_INCHES) // 2)
+    sums = _window_sums(gray, radius, mode="edge")
+    area = (2 * radius + 1) ** 2
+    return gray.astype(np.int64) * (100 * area) < sums * (100 - THRESHOLD_PERCENT)
+
+
+def estimate_skew(ink):
+    """
+    Estimate the skew of text rows in degrees (counter-clockwise positive)
+    as the angle whose projection profile is sharpest
+    """
+    ys, xs = np.nonzero(ink)
+    if len(ys) < 100:
+        return 0.0
+    step = max(1, len(ys) // MAX_DESKEW_SAMPLES)
+    ys = ys[::step].astype(np.float32)
+    xs = xs[::step].astype(np.float32)
+
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-MAX_SKEW_DEGREES, MAX_SKEW_DEGREES + 1e-6, SKEW_STEP_DEGREES):
+        theta = math.radians(angle)
+        rows = ys * math.cos(theta) + xs * math.sin(theta)
+        rows = (rows - rows.min()).astype(np.int64)
+        profile = np.bincount(rows).astype(np.float64)
+        score = float(np.dot(profile, profile))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def rotate(ink, angle):
+    """Rotate an ink mask by angle degrees (counter-clockwise), growing the canvas."""
+    image = Image.fromarray(ink.astype(np.uint8) * 255)
+    rotated = image.rotate(angle, resample=Image.NEAREST, expand=True, fillcolor=0)
+    return np.asarray(rotated) > 127
+
+
+def despeckle(ink, dpi):
+    """
+    Remove isolated blobs that fit in a small square: pixels inside a window
+    that contains ink while the one-pixel ring around it is empty
+    """
+    radius = max(1, round(SPECK_SIZE_300DPI * dpi / 300) // 2)
+    counts = ink.view(np.uint8)
+    inner = _window_sums(counts, radius, dtype=np.int32)
+    outer = _window_sums(counts, radius + 1, dtype=np.int32)
+    isolated = (inner > 0) & (outer == inner)
+    if not isolated.any():
+        return ink
+    # Clear every pixel covered by an isolated window
+    covered = _window_sums(isolated.view(np.uint8), radius, dtype=np.int32) > 0
+    return ink & ~covered
+
+
+def crop_margins(ink, dpi):
+    """Crop to the ink bounding box plus a small padding; None if blank."""
+    rows = np.flatnonzero(ink.any(axis=1))
+    if not len(rows):
+        return None
+    cols = np.flatnonzero(ink.any(axis=0))
+    pad = int(dpi * CROP_PADDING_INCHES)
+    top, bottom = max(0, rows[0] - pad), min(ink.shape[0], rows[-1] + pad + 1)
+    left, right = max(0, cols[0] - pad), min(ink.shape[1], cols[-1] + pad + 1)
+    return ink[top:bottom, left:right]
+
+
+def preprocess_pixmap(pix, dpi):
+    """
+    Run the full pre-processing chain on a rendered page
+
+    Args:
+        pix: PyMuPDF Pixmap (gray or RGB, alpha ignored)
+        dpi: Resolution the page was rendered at
+
+    Returns:
+        Tuple of (PIL 'L' image with black text on white, or None for a
+        blank page, and a dict describing what was done)
+    """
+    ink = binarize(pixmap_to_gray(pix), dpi)
+    angle = estimate_skew(ink)
+    if abs(angle) >= MIN_SKEW_DEGREES:
+        ink = rotate(ink, -angle)
+    before = int(np.count_nonzero(ink))
+    ink = despeckle(ink, dpi)
+    info = {"skew": round(angle, 2), "specks_removed": before - int(np.count_nonzero(ink))}
+
+    ink = crop_margins(ink, dpi)
+    if ink is None:
+        info["size"] = (0, 0)
+        return None, info
+    info["size"] = (ink.shape[1], ink.shape[0])
+    return Image.fromarray(np.where(ink, 0, 255).astype(np.uint8)), info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-process one PDF page for OCR")
+    parser.add_argument("input_pdf")
+    parser.add_argument("page", type=int, help="1-based page number")
+    parser.add_argument("output_png")
+    parser.add_argument("--dpi", type=int, default=300)
+    args = parser.parse_args()
+
+    if not (HAS_NUMPY and HAS_PIL):
+        print("[Preprocess] Error: NumPy and Pillow are required", file=sys.stderr)
+        sys.exit(1)
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
+
+    with fitz.open(args.input_pdf) as doc:
+        pix = doc[args.page - 1].get_pixmap(dpi=args.dpi, colorspace=fitz.csGRAY)
+    image, info = preprocess_pixmap(pix, args.dpi)
+    print(f"[Preprocess] {pix.width}x{pix.height} -> {info}", file=sys.stderr)
+    if image is None:
+        print("[Preprocess] Page is blank", file=sys.stderr)
+        sys.exit(1)
+    image.save(args.output_png)
+    sys.exit(0)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Page Selection
+Parses page selections such as "1-3,10,40-" (1-based, inclusive, open ends
+allowed) into sorted 0-based page indexes, and maps them onto the page
+arguments of the libraries the converters use, so only the selected pages
+are parsed, rendered or laid out:
+
+    pdf2docx   -> start/end for one contiguous run, else pages=[...]
+    pdfplumber -> pdfplumber.open(path, pages=[1-based numbers])
+    pdf2image  -> one convert_from_path(first_page, last_page) per run
+    PyMuPDF    -> iterate the indexes directly
+
+select_pages() returns None when every page is selected, and the adapters
+map None to the library defaults, so converters called without a selection
+behave exactly as before.
+
+Usage:
+    python page_selection.py <input_pdf> <pages>
+"""
+
+import sys
+import re
+
+try:
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+_PART = re.compile(r"^(\d*)\s*(-?)\s*(\d*)$")
+
+
+def parse_pages(spec, total_pages):
+    """
+    Parse a page selection into sorted, de-duplicated 0-based indexes.
+    None, "" and "all" select every page; open ranges ("40-", "-5") run to
+    the end or from the start, and ranges past the end are clipped.
+
+    Raises:
+        ValueError: for malformed parts, page 0, reversed ranges, or a
+        selection that contains no page of the document
+    """
+    if selects_all(spec):
+        return list(range(total_pages))
+
+    selected = set()
+    for part in str(spec).split(","):
+        part = part.strip()
+        match = _PART.match(part)
+        if not part or not match or not (match.group(1) or match.group(3)):
+            raise ValueError(f"Invalid page selection '{part}' in '{spec}'")
+        first, dash, last = match.groups()
+        start = int(first) if first else 1
+        end = (int(last) if last else total_pages) if dash else start
+        if start < 1 or end < 1:
+            raise ValueError(f"Page numbers start at 1: '{part}'")
+        if last and end < start:
+            raise ValueError(f"Reversed page range '{part}'")
+        selected.update(range(start - 1, min(end, total_pages)))
+
+    if not selected:
+        raise ValueError(f"Page selection '{spec}' is outside the document "
+                         f"({total_pages} page(s))")
+    return sorted(selected)
+
+
+def selects_all(spec):
+    return spec is None or str(spec).strip().lower() in ("", "all")
+
+
+def page_count(pdf_path):
+    """Number of pages, read with PyMuPDF when available."""
+    if HAS_PYMUPDF:
+        with fitz.open(pdf_path) as doc:
+            return len(doc)
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def select_pages(pdf_path, spec):
+    """Resolve a selection against a file: 0-based indexes, or None for all pages."""
+    if selects_all(spec):
+        return None
+    return parse_pages(spec, page_count(pdf_path))
+
+
+def page_runs(indexes):
+    """Group sorted indexes into contiguous (start, stop) half-open runs."""
+    runs = []
+    for index in indexes:
+        if runs and runs[-1][1] == index:
+            runs[-1][1] = index + 1
+        else:
+            runs.append([index, index + 1])
+    return [tuple(run) for run in runs]
+
+
+def format_pages(indexes):
+    """Render indexes back to the compact 1-based form, e.g. '1-3,10'."""
+    if indexes is None:
+        return "all"
+    return ",".join(f"{start + 1}" if stop - start == 1 else f"{start + 1}-{stop}"
+                    for start, stop in page_runs(indexes))
+
+
+def pdf2docx_page_args(indexes):
+    """Keyword arguments for pdf2docx Converter.convert()."""
+    if indexes is None:
+        return {}
+    runs = page_runs(indexes)
+    if len(runs) == 1:
+        return {"start": runs[0][0], "end": runs[0][1]}
+    # pdf2docx only parses the listed pages (single process)
+    return {"pages": list(indexes)}
+
+
+def plumber_page_numbers(indexes):
+    """The 1-based 'pages' argument for pdfplumber.open()."""
+    if indexes is None:
+        return None
+    return [index + 1 for index in indexes]
+
+
+def pdf2image_runs(indexes):
+    """(first_page, last_page) pairs for pdf2image.convert_from_path()."""
+    if indexes is None:
+        return [(None, None)]
+    return [(start + 1, stop) for start, stop in page_runs(indexes)]
+
+
+def pop_pages_argument(argv):
+    """
+    Remove '--pages X' / '--pages=X' from a positional argv list, for the
+    scripts that are called as '<format> <input> <output>'
+
+    Returns:
+        Tuple of (selection or None, remaining argv)
+    """
+    spec = None
+    remaining = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--pages":
+            spec = next(args, None)
+        elif arg.startswith("--pages="):
+            spec = arg.split("=", 1)[1]
+        else:
+            remaining.append(arg)
+    return spec, remaining
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python page_selection.py <input_pdf> <pages>", file=sys.stderr)
+        sys.exit(1)
+    try:
+        indexes = parse_pages(sys.argv[2], page_count(sys.argv[1]))
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"{len(indexes)} page(s): {format_pages(indexes)}")
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+PDF Size Anatomy Analyzer
+Attributes the bytes of a PDF to categories (images by filter and resolution,
+embedded/subset fonts, content streams, metadata, thumbnails, incremental
+update history, unreferenced objects) and to pages, and recommends a
+compress_pdf.py mode.
+
+Makes a single pass over the xref table reading object dictionaries and
+/Length entries - no stream is decoded, and only streams whose dictionary
+and length match another one have their raw bytes hashed, the same
+duplicate check compress_pdf.py's structure pass uses - so it stays fast
+on very large files.
+
+Usage:
+    python pdf_anatomy.py <input_pdf> [output_json]
+"""
+
+import sys
+import os
+import re
+import json
+import time
+from collections import deque
+
+try:
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+    print("Warning: PyMuPDF not available", file=sys.stderr)
+
+from compress_pdf import stream_length, find_duplicate_streams
+
+_REF_RE = re.compile(r"(?<![\d.])(\d+) \d+ R\b")
+_SUBSET_RE = re.compile(r"^/?[A-Z]{6}\+")
+
+FONT_FILE_KEYS = ("FontFile", "FontFile2", "FontFile3")
+
+# Megapixel buckets used to group images by resolution
+RESOLUTION_BUCKETS = ((0.25, "<0.25MP"), (1.0, "0.25-1MP"), (4.0, "1-4MP"), (16.0, "4-16MP"))
+
+# Share of the file above which a category drives the recommendation
+IMAGE_SHARE_THRESHOLD = 0.4
+STRUCTURE_SHARE_THRESHOLD = 0.1
+
+
+def _refs(text):
+    """Extract the object numbers referenced by an object's source."""
+    return [int(num) for num in _REF_RE.findall(text)]
+
+
+def _resolution_bucket(width, height):
+    megapixels = width * height / 1000000.0
+    for limit, label in RESOLUTION_BUCKETS:
+        if megapixels < limit:
+            return label
+    return ">16MP"
+
+
+def _filter_name(doc, xref):
+    """Return the last (outermost-decoded) filter name of a stream, or 'none'."""
+    kind, value = doc.xref_get_key(xref, "Filter")
+    if kind == "null":
+        return "none"
+    names = re.findall(r"/(\w+)", value)
+    return names[-1] if names else "none"
+
+
+def _scan_objects(doc):
+    """
+    Single pass over the xref table collecting size, references and type
+    information for every object
+
+    Returns:
+        Tuple of (objects dict, font program names, thumbnail xrefs,
+        content stream xrefs, ICC profile xrefs)
+    """
+    objects = {}
+    font_programs = {}
+    icc_profiles = set()
+    for xref in range(1, doc.xref_length()):
+        source = doc.xref_object(xref, compressed=True)
+        if source == "null":
+            continue
+        is_stream = doc.xref_is_stream(xref)
+        size = len(source) + (stream_length(doc, xref) if is_stream else 0)
+        obj_type = doc.xref_get_key(xref, "Type")[1]
+        subtype = doc.xref_get_key(xref, "Subtype")[1]
+        objects[xref] = {
+            "size": size,
+            "refs": _refs(source),
+            "stream": is_stream,
+            "type": obj_type,
+            "subtype": subtype,
+        }
+
+        if obj_type == "/FontDescriptor":
+            font_name = doc.xref_get_key(xref, "FontName")[1]
+            for key in FONT_FILE_KEYS:
+                kind, value = doc.xref_get_key(xref, key)
+                if kind == "xref":
+                    font_programs[int(value.split()[0])] = font_name
+        elif subtype == "/Image" and is_stream:
+            try:
+                width = int(doc.xref_get_key(xref, "Width")[1])
+                height = int(doc.xref_get_key(xref, "Height")[1])
+            except ValueError:
+                width = height = 0
+            objects[xref]["image"] = (_filter_name(doc, xref), width, height)
+        for match in re.finditer(r"/ICCBased (\d+) \d+ R", source):
+            icc_profiles.add(int(match.group(1)))
+    return objects, font_programs, icc_profiles
+
+
+def _reachable(objects, roots, stop=None):
+    """Breadth-first walk over indirect references."""
+    seen = set()
+    queue = deque(root for root in roots if root in objects)
+    while queue:
+        xref = queue.popleft()
+        if xref in seen:
+            continue
+        seen.add(xref)
+        if stop is not None and xref not in roots and stop(objects[xref]):
+            continue
+        for ref in objects[xref]["refs"]:
+            if ref in objects and ref not in seen:
+                queue.append(ref)
+    return seen
+
+
+def _trailer_roots(doc):
+    roots = []
+    for key in ("Root", "Info", "Encrypt"):
+        kind, value = doc.xref_get_key(-1, key)
+        if kind == "xref":
+            roots.append(int(value.split()[0]))
+        elif kind == "dict":
+            roots.extend(_refs(value))
+    return roots
+
+
+def _classify(xref, obj, font_programs, page_refs, icc_profiles):
+    """Pick the size category of a reachable object."""
+    if "image" in obj:
+        return "images"
+    if xref in font_programs:
+        return "fonts_subset" if _SUBSET_RE.match(font_programs[xref]) else "fonts_embedded"
+    if xref in page_refs["thumbnails"]:
+        return "thumbnails"
+    if xref in page_refs["contents"]:
+        return "content_streams"
+    if obj["type"] == "/Metadata":
+        return "metadata"
+    if xref in icc_profiles:
+        return "icc_profiles"
+    if obj["type"] == "/EmbeddedFile":
+        return "embedded_files"
+    if obj["subtype"] == "/Form":
+        return "form_xobjects"
+    if obj["stream"]:
+        return "other_streams"
+    return "structure"
+
+
+def recommend_strategy(report):
+    """
+    Decide which compress_pdf.py mode is worth running
+
+    Returns:
+        Dict with the recommended mode ('images', 'structure', 'all' or
+        None when the file is already compact) and the reasons
+    """
+    total = float(report["file_size"]) or 1.0
+    categories = report["categories"]
+    reasons = []
+
+    recompressible = sum(entry["bytes"] for name, entry in report["images"]["by_filter"].items()
+                         if name not in ("JBIG2Decode", "CCITTFaxDecode"))
+    lossy = recompressible / total >= IMAGE_SHARE_THRESHOLD
+    if lossy:
+        reasons.append(f"images are {recompressible * 100 / total:.0f}% of the file")
+
+    structural = (categories.get("unreferenced", {}).get("bytes", 0)
+                  + categories.get("fonts_embedded", {}).get("bytes", 0)
+                  + report["duplicates"]["bytes"]
+                  + report["incremental_updates"]["history_bytes"])
+    if categories.get("content_streams", {}).get("uncompressed", 0):
+        structural += categories["content_streams"]["uncompressed"]
+    lossless = structural / total >= STRUCTURE_SHARE_THRESHOLD
+    if lossless:
+        reasons.append(f"duplicates, unreferenced objects, update history, full fonts and "
+                       f"uncompressed streams are {structural * 100 / total:.0f}% of the file")
+
+    if lossy and lossless:
+        mode = "all"
+    elif lossy:
+        mode = "images"
+    elif lossless:
+        mode = "structure"
+    else:
+        mode = None
+        reasons.append("no category is large enough to be worth compressing")
+    return {"mode": mode, "reasons": reasons}
+
+
+def analyze_pdf(pdf_path):
+    """
+    Attribute the bytes of a PDF to categories and pages
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Returns:
+        Report dict (JSON serialisable)
+    """
+    if not HAS_PYMUPDF:
+        raise RuntimeError("PyMuPDF is required. Install with: pip install PyMuPDF")
+
+    started = time.perf_counter()
+    file_size = os.path.getsize(pdf_path)
+    doc = fitz.open(pdf_path)
+    try:
+        objects, font_programs, icc_profiles = _scan_objects(doc)
+
+        page_xrefs = [doc.page_xref(pno) for pno in range(doc.page_count)]
+        page_refs = {"contents": set(), "thumbnails": set()}
+        for page_xref in page_xrefs:
+            for key, bucket in (("Contents", "contents"), ("Thumb", "thumbnails")):
+                value = doc.xref_get_key(page_xref, key)[1]
+                page_refs[bucket].update(_refs(value))
+                for ref in _refs(value):
+                    # /Contents may point at an array of streams
+                    if ref in objects and not objects[ref]["stream"]:
+                        page_refs[bucket].update(objects[ref]["refs"])
+
+        reachable = _reachable(objects, _trailer_roots(doc))
+
+        categories = {}
+        images = {"by_filter": {}, "by_resolution": {}}
+        duplicate_streams = find_duplicate_streams(doc)
+        duplicates = {"count": 0, "bytes": 0}
+        for xref, obj in objects.items():
+            category = "unreferenced" if xref not in reachable else \
+                _classify(xref, obj, font_programs, page_refs, icc_profiles)
+            obj["category"] = category
+            entry = categories.setdefault(category, {"bytes": 0, "objects": 0})
+            entry["bytes"] += obj["size"]
+            entry["objects"] += 1
+            if category == "content_streams" and doc.xref_get_key(xref, "Filter")[0] == "null":
+                entry["uncompressed"] = entry.get("uncompressed", 0) + obj["size"]
+
+            if "image" in obj and category == "images":
+                filter_name, width, height = obj["image"]
+                for group, key in ((images["by_filter"], filter_name),
+                                   (images["by_resolution"], _resolution_bucket(width, height))):
+                    bucket = group.setdefault(key, {"bytes": 0, "count": 0})
+                    bucket["bytes"] += obj["size"]
+                    bucket["count"] += 1
+
+            if xref in duplicate_streams and category != "unreferenced":
+                duplicates["count"] += 1
+                duplicates["bytes"] += obj["size"]
+
+        owners = {}
+        page_reach = []
+        for page_xref in page_xrefs:
+            # Stop at other pages and the page tree so /Parent links are not followed
+            reach = _reachable(objects, [page_xref],
+                               stop=lambda obj: obj["type"] in ("/Page", "/Pages"))
+            page_reach.append(reach)
+            for xref in reach:
+                owners[xref] = owners.get(xref, 0) + 1
+
+        pages = []
+        for pno, reach in enumerate(page_reach, 1):
+            page_entry = {"page": pno, "own_bytes": 0, "shared_bytes": 0,
+                          "content_bytes": 0, "image_bytes": 0, "font_bytes": 0}
+            for xref in reach:
+                obj = objects[xref]
+                page_entry["own_bytes" if owners[xref] == 1 else "shared_bytes"] += obj["size"]
+                if obj["category"] == "content_streams":
+                    page_entry["content_bytes"] += obj["size"]
+                elif obj["category"] == "images":
+                    page_entry["image_bytes"] += obj["size"]
+                elif obj["category"].startswith("fonts_"):
+                    page_entry["font_bytes"] += obj["size"]
+            pages.append(page_entry)
+
+        accounted = sum(obj["size"] for obj in objects.values())
+        revisions = doc.version_count
+        report = {
+            "file": os.path.basename(pdf_path),
+            "file_size": file_size,
+            "page_count": doc.page_count,
+            "object_count": len(objects),
+            "categories": categories,
+            "images": images,
+            "duplicates": duplicates,
+            "incremental_updates": {
+                "revisions": revisions,
+                # Bytes not owned by any live object: xref sections, padding and,
+                # for incrementally updated files, superseded object versions
+                "history_bytes": max(0, file_size - accounted) if revisions > 1 else 0,
+                "unaccounted_bytes": max(0, file_size - accounted),
+            },
+            "pages": pages,
+        }
+    finally:
+        doc.close()
+
+    report["recommendation"] = recommend_strategy(report)
+    report["elapsed_ms"] = int((time.perf_counter() - started) * 1000)
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python pdf_anatomy.py <input_pdf> [output_json]")
+        sys.exit(1)
+
+    input_pdf = sys.argv[1]
+    output_json = sys.argv[2] if len(sys.argv) > 2 else None
+
+    try:
+        result = analyze_pdf(input_pdf)
+    except Exception as e:
+        print(f"[Anatomy] Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if output_json:
+        with open(output_json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"[Anatomy] Report written to: {output_json}", file=sys.stderr)
+    else:
+        print(json.dumps(result, indent=2))
+    sys.exit(0)
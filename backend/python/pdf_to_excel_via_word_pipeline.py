@@ -70,8 +70,13 @@ def convert_pdf_to_excel(pdf_file, output_file=None):
         traceback.print_exc()
         return False
 
-def batch_convert(input_dir, output_dir=None):
-    """Convert all PDF files in a directory to Excel."""
+def batch_convert(input_dir, output_dir=None, workers=None):
+    """Convert all PDF files in a directory to Excel.
+    
+    Runs convert_pdf_to_excel() through batch_convert.py, so files are
+    converted in parallel and a manifest in the output folder lets an
+    interrupted run resume.
+    """
     
     if not os.path.isdir(input_dir):
         print(f"❌ Error: Directory not found: {input_dir}")
@@ -80,46 +85,27 @@ def batch_convert(input_dir, output_dir=None):
     if output_dir is None:
         output_dir = input_dir
     
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Find all PDF files
-    pdf_files = [f for f in os.listdir(input_dir) if f.lower().endswith('.pdf')]
-    
-    if not pdf_files:
+    if not any(f.lower().endswith('.pdf') for f in os.listdir(input_dir)):
         print(f"❌ No PDF files found in: {input_dir}")
         return False
     
-    print(f"Found {len(pdf_files)} PDF file(s) to convert")
-    print()
-    
-    success_count = 0
-    failed_count = 0
-    
-    for idx, pdf_file in enumerate(pdf_files, 1):
-        pdf_path = os.path.join(input_dir, pdf_file)
-        base_name = os.path.splitext(pdf_file)[0]
-        output_file = os.path.join(output_dir, f"{base_name}.xlsx")
-        
-        print(f"\n[{idx}/{len(pdf_files)}] Processing: {pdf_file}")
-        print("-" * 80)
-        
-        if convert_pdf_to_excel(pdf_path, output_file):
-            success_count += 1
-        else:
-            failed_count += 1
+    import batch_convert as batch
+    summary = batch.batch_convert([input_dir], [batch.VIA_WORD_FORMAT], output_dir, workers=workers)
     
     print()
     print("=" * 80)
     print("Batch Conversion Summary")
     print("=" * 80)
-    print(f"Total files:    {len(pdf_files)}")
-    print(f"Successful:     {success_count}")
-    print(f"Failed:         {failed_count}")
+    print(f"Total files:    {summary['total']}")
+    print(f"Successful:     {summary['converted']}")
+    print(f"Up to date:     {summary['skipped']}")
+    print(f"Failed:         {summary['failed']}")
+    print(f"Throughput:     {summary['files_per_second']} files/s, {summary['pages_per_second']} pages/s")
     print(f"Output folder:  {output_dir}")
     print("=" * 80)
     print()
     
-    return failed_count == 0
+    return summary['failed'] == 0
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -128,12 +114,13 @@ if __name__ == "__main__":
     parser.add_argument("input", help="PDF file or directory containing PDF files")
     parser.add_argument("-o", "--output", help="Output Excel file or directory")
     parser.add_argument("-b", "--batch", action="store_true", help="Batch convert all PDFs in directory")
+    parser.add_argument("-w", "--workers", type=int, help="Parallel conversions in batch mode (CPU count if omitted)")
     
     args = parser.parse_args()
     
     if args.batch or os.path.isdir(args.input):
         # Batch mode
-        success = batch_convert(args.input, args.output)
+        success = batch_convert(args.input, args.output, args.workers)
         sys.exit(0 if success else 1)
     else:
         # Single file mode
@@ -8,27 +8,42 @@ Supported formats:
 - Advanced: AVIF, HEIF (via pillow-heif if available)
 - Professional: PSD, XCF, AI, EPS, WMF, EMF, RAW, DNG, ICO, ICNS (via ImageMagick/convert)
 
+With --deadline SECONDS, pages that fall behind are rendered at half the
+DPI (not below MIN_DPI), and once the budget is spent the remaining pages
+are left out; the '[Deadline]' report line lists every degraded page.
+
 Usage:
-    python pdf_to_images.py <pdf_path> <output_format> [output_dir] [page_num]
+    python pdf_to_images.py <pdf_path> <output_format> [output_dir] [pages] [quality] [dpi] [--zip out.zip]
+        [--deadline SECONDS]
     
 Examples:
     python pdf_to_images.py document.pdf png ./output
     python pdf_to_images.py document.pdf jpg ./output 1
+    python pdf_to_images.py document.pdf png ./output 1-3,10 95 150 --zip pages.zip
+    python pdf_to_images.py document.pdf png ./output 1- 95 300 --zip pages.zip --deadline 60
     python pdf_to_images.py document.pdf psd ./output
 """
 
 import sys
 import os
+import io
 from pathlib import Path
 import subprocess
 from typing import Optional, List
-import tempfile
 import shutil
+import time
+import zipfile
+
+from page_selection import parse_pages, format_pages
+from deadline import FULL, REDUCED, LEFT_OUT, as_deadline, pop_deadline_argument
 
 # Try importing image processing libraries
 try:
     from PIL import Image
-    import fitz  # PyMuPDF
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
     HAVE_PIL = True
     HAVE_FITZ = True
 except ImportError as e:
@@ -49,6 +64,9 @@ except ImportError:
 # Check for ImageMagick
 HAVE_IMAGEMAGICK = shutil.which('convert') is not None or shutil.which('magick') is not None
 
+# Lowest resolution pages are rendered at when behind the deadline
+MIN_DPI = 72
+
 
 class PDFToImageConverter:
     """Convert PDF pages to various image formats"""
@@ -238,10 +256,10 @@ class PDFToImageConverter:
             return self._convert_native(img, output_path, 'png')
         
         try:
-            # Save as temporary PNG
-            temp_dir = tempfile.gettempdir()
-            temp_png = Path(temp_dir) / f"temp_{output_path.stem}.png"
-            img.save(temp_png, format='PNG')
+            # Hand the PNG to ImageMagick on stdin: no temporary file that
+            # concurrent jobs could collide on
+            png = io.BytesIO()
+            img.save(png, format='PNG')
             
             # Convert using ImageMagick
             convert_cmd = 'magick' if shutil.which('magick') else 'convert'
@@ -249,24 +267,21 @@ class PDFToImageConverter:
             # Build command based on format
             if format_id == 'svg':
                 # SVG needs special handling
-                cmd = [convert_cmd, str(temp_png), str(output_path)]
+                cmd = [convert_cmd, 'png:-', str(output_path)]
             elif format_id in ['psd', 'ai', 'eps', 'pdf']:
                 # These formats have specific requirements
-                cmd = [convert_cmd, str(temp_png), f"{format_id}:{output_path}"]
+                cmd = [convert_cmd, 'png:-', f"{format_id}:{output_path}"]
             else:
-                cmd = [convert_cmd, str(temp_png), str(output_path)]
+                cmd = [convert_cmd, 'png:-', str(output_path)]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            # Cleanup
-            if temp_png.exists():
-                temp_png.unlink()
+            result = subprocess.run(cmd, input=png.getvalue(), capture_output=True, timeout=30)
             
             if result.returncode == 0:
                 print(f"[Success] Converted to {format_id.upper()}: {output_path.name}")
                 return True
             else:
-                print(f"[Warning] ImageMagick conversion failed: {result.stderr}", file=sys.stderr)
+                print(f"[Warning] ImageMagick conversion failed: {result.stderr.decode(errors='replace')}",
+                      file=sys.stderr)
                 # Fallback to PNG
                 output_path = output_path.with_suffix('.png')
                 return self._convert_native(img, output_path, 'png')
@@ -329,25 +344,62 @@ class PDFToImageConverter:
             print(f"[Error] Conversion failed: {e}", file=sys.stderr)
             return False
     
-    def convert_all_pages(self, format_id: str, quality: int = 95, dpi: int = 300) -> int:
-        """Convert all PDF pages to image format
+    def convert_all_pages(self, format_id: str, quality: int = 95, dpi: int = 300,
+                          pages: Optional[str] = None, deadline=None) -> int:
+        """Convert all PDF pages (or a selection) to image format
         
         Args:
             format_id: Output format
             quality: Quality setting
             dpi: Resolution in DPI
+            pages: Page selection such as "1-3,10,40-" (all pages if None)
+            deadline: deadline.Deadline (or seconds) the pages must be done by;
+                pages behind it are rendered at a lower DPI, or left out once
+                it is spent (at least one page is always converted)
             
         Returns:
             Number of successfully converted pages
         """
+        deadline = as_deadline(deadline)
+        indexes = parse_pages(pages, self.page_count)
         success_count = 0
-        for page_num in range(1, self.page_count + 1):
-            if self.convert_page(page_num, format_id, quality, dpi):
+        pages_started = time.monotonic()
+        for position, index in enumerate(indexes):
+            step = deadline.step(position, len(indexes), pages_started)
+            page_dpi = dpi
+            if step == REDUCED or (step != FULL and not success_count):
+                page_dpi = max(MIN_DPI, min(dpi, dpi // 2))
+                deadline.degrade(index + 1, f"rendered at {page_dpi} DPI")
+            elif step != FULL:
+                deadline.degrade(index + 1, LEFT_OUT)
+                continue
+            if self.convert_page(index + 1, format_id, quality, page_dpi):
                 success_count += 1
         
-        print(f"\n[Summary] Converted {success_count}/{self.page_count} pages to {format_id.upper()}")
+        print(f"\n[Summary] Converted {success_count}/{len(indexes)} pages to {format_id.upper()}")
         return success_count
     
+    def output_files(self, pages: Optional[str] = None) -> List[Path]:
+        """Image files written for the selected pages (including PNG fallbacks)"""
+        files = []
+        for index in parse_pages(pages, self.page_count):
+            files.extend(sorted(self.output_dir.glob(f"{self.pdf_path.stem}_page{index + 1}.*")))
+        return files
+    
+    def write_zip(self, zip_path: str, pages: Optional[str] = None) -> int:
+        """Bundle the images of the selected pages into one zip archive
+        
+        Returns:
+            Number of images in the archive
+        """
+        files = self.output_files(pages)
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED) as archive:
+            for file in files:
+                archive.write(file, file.name)
+                file.unlink()
+        print(f"[Zip] Wrote {len(files)} image(s) to {zip_path}")
+        return len(files)
+    
     def close(self):
         """Close PDF document"""
         if self.pdf_doc:
@@ -356,8 +408,20 @@ class PDFToImageConverter:
 
 def main():
     """Main entry point"""
-    if len(sys.argv) < 3:
-        print("Usage: python pdf_to_images.py <pdf_path> <format> [output_dir] [page_num] [quality] [dpi]")
+    argv = sys.argv[1:]
+    zip_path = None
+    if "--zip" in argv:
+        position = argv.index("--zip")
+        zip_path = argv[position + 1] if position + 1 < len(argv) else None
+        del argv[position:position + 2]
+    try:
+        deadline_seconds, argv = pop_deadline_argument(argv)
+    except ValueError as e:
+        print(f"[Error] {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    if len(argv) < 2:
+        print("Usage: python pdf_to_images.py <pdf_path> <format> [output_dir] [pages] [quality] [dpi] [--zip out.zip] [--deadline SECONDS]")
         print("\nSupported formats:")
         print("  Native:        " + ", ".join(['png', 'jpg', 'jpeg', 'webp', 'gif', 'bmp', 'tiff']))
         print("  Modern:        " + ", ".join(['avif', 'heif', 'heic']))
@@ -365,30 +429,42 @@ def main():
         print("\nExamples:")
         print("  python pdf_to_images.py document.pdf png")
         print("  python pdf_to_images.py document.pdf jpg ./output 1 95")
+        print("  python pdf_to_images.py document.pdf png ./output 1-3,10 95 150 --zip pages.zip")
         print("  python pdf_to_images.py document.pdf psd ./output")
         sys.exit(1)
     
-    pdf_path = sys.argv[1]
-    format_id = sys.argv[2]
-    output_dir = sys.argv[3] if len(sys.argv) > 3 else './output'
-    page_num = int(sys.argv[4]) if len(sys.argv) > 4 else None
-    quality = int(sys.argv[5]) if len(sys.argv) > 5 else 95
-    dpi = int(sys.argv[6]) if len(sys.argv) > 6 else 300
+    pdf_path = argv[0]
+    format_id = argv[1]
+    output_dir = argv[2] if len(argv) > 2 else './output'
+    # A single page number or a selection such as "1-3,10,40-"
+    pages = argv[3] if len(argv) > 3 else None
+    quality = int(argv[4]) if len(argv) > 4 else 95
+    dpi = int(argv[5]) if len(argv) > 5 else 300
     
+    # Started before the document is opened, so the budget covers everything
+    deadline = as_deadline(deadline_seconds)
+    converter = None
     try:
         converter = PDFToImageConverter(pdf_path, output_dir)
         
-        if page_num:
-            success = converter.convert_page(page_num, format_id, quality, dpi)
+        if pages and pages.strip().isdigit() and not zip_path:
+            # A single page has nothing to step down to; the caller's kill timer bounds it
+            success = converter.convert_page(int(pages), format_id, quality, dpi)
             sys.exit(0 if success else 1)
         else:
-            success_count = converter.convert_all_pages(format_id, quality, dpi)
+            # The document stays open across all selected pages
+            print(f"[Convert] Pages: {format_pages(parse_pages(pages, converter.page_count))}")
+            success_count = converter.convert_all_pages(format_id, quality, dpi, pages, deadline)
+            if zip_path and success_count:
+                converter.write_zip(zip_path, pages)
+            deadline.log_report(sys.stdout)
             sys.exit(0 if success_count > 0 else 1)
     except Exception as e:
         print(f"[Fatal Error] {e}", file=sys.stderr)
         sys.exit(1)
     finally:
-        converter.close()
+        if converter:
+            converter.close()
 
 
 if __name__ == '__main__':
@@ -2,10 +2,23 @@
 """
 PDF to Text Extraction Script
 Extracts all text from PDF files with proper formatting and page separation.
+A page selection (--pages "1-3,10,40-") limits extraction to those pages.
+PyMuPDF extracts page ranges in parallel; pdfplumber is only used for pages
+where PyMuPDF output looks wrong, or for the whole document when PyMuPDF is
+not installed. With --deadline SECONDS the pages not reached in time are
+left out and listed in the '[Deadline]' report line.
 """
 
 import sys
 import os
+import json
+import time
+import argparse
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from page_selection import parse_pages, page_runs
+from deadline import LEFT_OUT, as_deadline
 
 # Text extraction libraries
 try:
@@ -16,105 +29,334 @@ except ImportError:
     print("Warning: pdfplumber not available", file=sys.stderr)
 
 try:
-    import fitz  # PyMuPDF
+    # Newer PyMuPDF prints a deprecation notice to stdout on 'import fitz',
+    # which would corrupt the NDJSON stream
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
     HAS_PYMUPDF = True
 except ImportError:
     HAS_PYMUPDF = False
     print("Warning: PyMuPDF not available", file=sys.stderr)
 
+# Pages handed to a worker per task; small enough that output can be
+# streamed early, large enough to amortise the task overhead
+PAGES_PER_CHUNK = 50
 
-def extract_text_with_pdfplumber(pdf_path, output_txt):
-    """Extract text using pdfplumber (best for structured text extraction)."""
-    try:
-        print(f"🔥 Using pdfplumber for text extraction...", file=sys.stderr)
-        
-        with pdfplumber.open(pdf_path) as pdf:
-            total_pages = len(pdf.pages)
-            print(f"📄 Total pages: {total_pages}", file=sys.stderr)
-            
-            all_text = []
-            
-            for page_num, page in enumerate(pdf.pages, 1):
-                text = page.extract_text()
-                if text:
-                    all_text.append(f"\n{'='*80}")
-                    all_text.append(f"PAGE {page_num}")
-                    all_text.append(f"{'='*80}\n")
-                    all_text.append(text)
-                print(f"   ✓ Extracted text from page {page_num}", file=sys.stderr)
-            
-            if all_text:
-                with open(output_txt, 'w', encoding='utf-8') as f:
-                    f.write('\n'.join(all_text))
-                
-                print(f"✅ Text extraction completed with pdfplumber:", file=sys.stderr)
-                print(f"   ✓ Extracted text from {total_pages} pages", file=sys.stderr)
-                print(f"   ✓ Saved to: {output_txt}", file=sys.stderr)
-                return True
-            else:
-                print(f"⚠️ No text extracted from PDF with pdfplumber", file=sys.stderr)
-                return False
-    except Exception as e:
-        print(f"⚠️ pdfplumber extraction failed: {e}", file=sys.stderr)
+# Pages with less text than this are retried with pdfplumber if they use fonts
+MIN_PAGE_CHARS = 20
+
+# Share of U+FFFD characters above which glyph decoding is considered broken
+MAX_REPLACEMENT_RATIO = 0.05
+
+# Reading order heuristic: share of same-column blocks that jump back up the
+# page by more than ORDER_TOLERANCE points
+MIN_BLOCKS_FOR_ORDER_CHECK = 4
+ORDER_TOLERANCE = 5
+MAX_BACKWARD_JUMP_RATIO = 0.3
+
+# Per-process documents opened by _init_worker (pool workers only)
+_worker_doc = None
+_worker_plumber = None
+
+
+def _format_page(page_num, text):
+    """Render one page with the PAGE header used by every extractor."""
+    return '\n'.join([f"\n{'='*80}", f"PAGE {page_num}", f"{'='*80}\n", text])
+
+
+def _reading_order_broken(blocks):
+    """
+    Heuristic for scrambled content streams: text blocks that keep jumping
+    back up the page within the same column
+    """
+    text_blocks = [b for b in blocks if b[6] == 0 and b[4].strip()]
+    if len(text_blocks) < MIN_BLOCKS_FOR_ORDER_CHECK:
         return False
 
+    backward = 0
+    for prev, block in zip(text_blocks, text_blocks[1:]):
+        same_column = block[0] < prev[2] and block[2] > prev[0]
+        if same_column and block[1] < prev[1] - ORDER_TOLERANCE:
+            backward += 1
+    return backward / (len(text_blocks) - 1) > MAX_BACKWARD_JUMP_RATIO
 
-def extract_text_with_pymupdf(pdf_path, output_txt):
-    """Extract text using PyMuPDF (fallback method)."""
-    try:
-        print(f"🔄 Using PyMuPDF for text extraction...", file=sys.stderr)
-        
-        pdf_doc = fitz.open(pdf_path)
+
+def _needs_fallback(page, textpage, text):
+    """Decide whether fitz output for a page should be redone with pdfplumber."""
+    stripped = text.strip()
+    if len(stripped) < MIN_PAGE_CHARS:
+        # Image-only pages have nothing for pdfplumber to find either
+        return bool(page.get_fonts())
+    if stripped.count("\ufffd") / len(stripped) > MAX_REPLACEMENT_RATIO:
+        return True
+    return _reading_order_broken(page.get_text("blocks", textpage=textpage))
+
+
+class _LazyPlumber:
+    """
+    pdfplumber handle on one PDF, opened on the first fallback page (most
+    documents never need one) and closed with the block
+    """
+
+    def __init__(self, pdf_path):
+        self.pdf_path = pdf_path
+        self._pdf = None
+
+    def page_text(self, page_index):
+        if self._pdf is None:
+            self._pdf = pdfplumber.open(self.pdf_path)
+        page = self._pdf.pages[page_index]
+        try:
+            return page.extract_text() or ""
+        finally:
+            page.close()
+
+    def close(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _init_worker(pdf_path):
+    """Open the source PDF once per worker process (pool workers only)."""
+    global _worker_doc, _worker_plumber
+    _worker_doc = fitz.open(pdf_path)
+    _worker_plumber = _LazyPlumber(pdf_path)
+
+
+def extract_page_range(pdf_path, start, stop, doc=None, plumber=None):
+    """
+    Extract pages [start, stop) with fitz, redoing suspicious pages with
+    pdfplumber; doc and plumber default to the worker process's handles
+
+    Returns:
+        Tuple of (start, list of (page_num, text, engine, seconds))
+    """
+    doc = _worker_doc if doc is None else doc
+    plumber = _worker_plumber if plumber is None else plumber
+    results = []
+    for index in range(start, stop):
+        started = time.perf_counter()
+        page = doc[index]
+        # One TextPage serves both the text and the block layout check
+        textpage = page.get_textpage()
+        text = page.get_text(textpage=textpage)
+        engine = "pymupdf"
+        if HAS_PDFPLUMBER and _needs_fallback(page, textpage, text):
+            try:
+                fallback_text = plumber.page_text(index)
+                if len(fallback_text.strip()) >= len(text.strip()) // 2:
+                    text = fallback_text
+                    engine = "pdfplumber"
+            except Exception:
+                pass
+        results.append((index + 1, text, engine, time.perf_counter() - started))
+    return start, results
+
+
+def _page_ranges(indexes):
+    """Split the selected pages into contiguous ranges of PAGES_PER_CHUNK."""
+    return [(start, min(start + PAGES_PER_CHUNK, stop))
+            for run_start, stop in page_runs(indexes)
+            for start in range(run_start, stop, PAGES_PER_CHUNK)]
+
+
+def _run_ranges(pdf_path, ranges, workers):
+    """Yield extracted page ranges in completion order."""
+    if len(ranges) < 2 or workers == 1:
+        # In-process: the handles are this call's, closed when it ends
+        with fitz.open(pdf_path) as doc, _LazyPlumber(pdf_path) as plumber:
+            for start, stop in ranges:
+                yield extract_page_range(pdf_path, start, stop, doc, plumber)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(pdf_path,)) as executor:
+        futures = [executor.submit(extract_page_range, pdf_path, start, stop)
+                   for start, stop in ranges]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # A consumer that stops early (or a failed page) should not wait
+            # for the remaining chunks to be processed
+            for future in futures:
+                future.cancel()
+
+
+def _page_record(page_num, total_pages, text, engine, seconds):
+    return {
+        "page": page_num,
+        "total_pages": total_pages,
+        "text": text,
+        "chars": len(text),
+        "engine": engine,
+        "ms": round(seconds * 1000, 2),
+    }
+
+
+def iter_pages_with_pymupdf(pdf_path, workers=None, pages=None):
+    """
+    Yield page records in page order, extracted with PyMuPDF across a process
+    pool of ranges of the selected pages. Pages where fitz finds suspiciously little text,
+    undecodable glyphs or scrambled reading order are redone individually
+    with pdfplumber. Each range is yielded as soon as every range before it
+    has completed.
+    """
+    print(f"🔥 Using PyMuPDF for text extraction...", file=sys.stderr)
+
+    with fitz.open(pdf_path) as pdf_doc:
+        if pdf_doc.needs_pass:
+            raise ValueError("PDF is encrypted - cannot extract text")
         total_pages = len(pdf_doc)
+    indexes = parse_pages(pages, total_pages)
+    print(f"📄 Total pages: {total_pages}" + (f", selected: {len(indexes)}"
+          if len(indexes) < total_pages else ""), file=sys.stderr)
+
+    workers = workers or os.cpu_count() or 1
+    ranges = _page_ranges(indexes)
+    pending = {}
+    next_range = 0
+    for start, results in _run_ranges(pdf_path, ranges, workers):
+        pending[start] = results
+        # Release every range that is now contiguous with what was yielded
+        while next_range < len(ranges) and ranges[next_range][0] in pending:
+            start, stop = ranges[next_range]
+            for page_num, text, engine, seconds in pending.pop(start):
+                yield _page_record(page_num, total_pages, text, engine, seconds)
+            print(f"   ✓ Extracted text from pages {start + 1}-{stop}", file=sys.stderr)
+            next_range += 1
+
+
+def iter_pages_with_pdfplumber(pdf_path, pages=None):
+    """Yield page records extracted with pdfplumber (used without PyMuPDF)."""
+    print(f"🔥 Using pdfplumber for text extraction...", file=sys.stderr)
+
+    with pdfplumber.open(pdf_path) as pdf:
+        total_pages = len(pdf.pages)
         print(f"📄 Total pages: {total_pages}", file=sys.stderr)
-        
-        all_text = []
-        
-        for page_num, page in enumerate(pdf_doc, 1):
-            text = page.get_text()
-            if text:
-                all_text.append(f"\n{'='*80}")
-                all_text.append(f"PAGE {page_num}")
-                all_text.append(f"{'='*80}\n")
-                all_text.append(text)
+
+        for index in parse_pages(pages, total_pages):
+            started = time.perf_counter()
+            page = pdf.pages[index]
+            page_num = index + 1
+            text = page.extract_text() or ""
+            page.close()
+            yield _page_record(page_num, total_pages, text, "pdfplumber",
+                               time.perf_counter() - started)
             print(f"   ✓ Extracted text from page {page_num}", file=sys.stderr)
-        
-        pdf_doc.close()
-        
-        if all_text:
-            with open(output_txt, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(all_text))
-            
-            print(f"✅ Text extraction completed with PyMuPDF:", file=sys.stderr)
-            print(f"   ✓ Extracted text from {total_pages} pages", file=sys.stderr)
-            print(f"   ✓ Saved to: {output_txt}", file=sys.stderr)
-            return True
-        else:
-            print(f"⚠️ No text extracted from PDF with PyMuPDF", file=sys.stderr)
-            return False
-    except Exception as e:
-        print(f"⚠️ PyMuPDF extraction failed: {e}", file=sys.stderr)
-        return False
 
 
-def pdf_to_text(pdf_path, output_txt="output.txt"):
+def iter_pages(pdf_path, workers=None, pages=None):
+    """
+    Yield one record per selected page (all pages if pages is None), in page
+    order, as soon as it is extracted:
+    {"page", "total_pages", "text", "chars", "engine", "ms"}.
+    Uses parallel PyMuPDF with per-page pdfplumber fallback; pdfplumber
+    handles the whole document only if PyMuPDF is missing or fails before
+    producing any page.
+    """
+    emitted = 0
+    if HAS_PYMUPDF:
+        try:
+            for record in iter_pages_with_pymupdf(pdf_path, workers, pages):
+                emitted += 1
+                yield record
+            return
+        except Exception as e:
+            print(f"⚠️ PyMuPDF extraction failed: {e}", file=sys.stderr)
+            if emitted or not HAS_PDFPLUMBER:
+                raise
+            print(f"   Falling back to pdfplumber...", file=sys.stderr)
+
+    if HAS_PDFPLUMBER:
+        yield from iter_pages_with_pdfplumber(pdf_path, pages)
+        return
+
+    raise RuntimeError("Required libraries are missing (PyMuPDF or pdfplumber)")
+
+
+def _within_deadline(records, pages, deadline):
+    """
+    Pass page records through until the deadline is spent; the selected
+    pages not reached by then are recorded as left out
+    """
+    selected = None
+    with closing(records):
+        for done, record in enumerate(records, 1):
+            yield record
+            selected = selected or parse_pages(pages, record["total_pages"])
+            if deadline.expired() and done < len(selected):
+                for index in selected[done:]:
+                    deadline.degrade(index + 1, LEFT_OUT)
+                return
+
+
+def pdf_to_ndjson(pdf_path, stream=None, workers=None, pages=None, deadline=None):
+    """
+    Stream page records to a text stream (stdout by default) as NDJSON,
+    flushing after every page so consumers can start on page 1 immediately.
+    Returns the number of pages that contained text.
+    """
+    stream = stream or sys.stdout
+    pages_with_text = 0
+    records = _within_deadline(iter_pages(pdf_path, workers, pages), pages, as_deadline(deadline))
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        stream.flush()
+        if record["chars"]:
+            pages_with_text += 1
+    return pages_with_text
+
+
+def pdf_to_text(pdf_path, output_txt="output.txt", workers=None, progress=None, pages=None,
+                deadline=None):
     """
-    Extract all text from PDF and save as text file.
-    Tries pdfplumber first, falls back to PyMuPDF.
+    Extract all text from PDF (or the selected pages) and save as text file.
+    Pages are written as they arrive from iter_pages; progress, if given, is
+    called with (pages done, pages selected) after each one. Pages not
+    reached before the deadline are left out.
     """
     print(f"⏳ Starting text extraction from PDF...", file=sys.stderr)
     print(f"   Processing: {pdf_path}", file=sys.stderr)
     
-    # Try pdfplumber first (better for structured text)
-    if HAS_PDFPLUMBER:
-        if extract_text_with_pdfplumber(pdf_path, output_txt):
-            return True
-        print(f"   Falling back to PyMuPDF...", file=sys.stderr)
-    
-    # Fallback to PyMuPDF
-    if HAS_PYMUPDF:
-        if extract_text_with_pymupdf(pdf_path, output_txt):
-            return True
+    pages_with_text = 0
+    engines = {}
+    selected = None
+    try:
+        with open(output_txt, 'w', encoding='utf-8') as f:
+            records = _within_deadline(iter_pages(pdf_path, workers, pages), pages, as_deadline(deadline))
+            for done, record in enumerate(records, 1):
+                if progress:
+                    if selected is None:
+                        selected = len(parse_pages(pages, record["total_pages"]))
+                    progress(done, selected)
+                if not record["text"]:
+                    continue
+                if pages_with_text:
+                    f.write('\n')
+                f.write(_format_page(record["page"], record["text"]))
+                pages_with_text += 1
+                engines[record["engine"]] = engines.get(record["engine"], 0) + 1
+    except Exception as e:
+        print(f"⚠️ Text extraction failed: {e}", file=sys.stderr)
+        pages_with_text = 0
+
+    if pages_with_text:
+        print(f"✅ Text extraction completed:", file=sys.stderr)
+        print(f"   ✓ Extracted text from {pages_with_text} pages", file=sys.stderr)
+        for engine, count in sorted(engines.items()):
+            print(f"   ✓ {engine}: {count} page(s)", file=sys.stderr)
+        print(f"   ✓ Saved to: {output_txt}", file=sys.stderr)
+        return True
     
     # If both fail, create error message
     error_message = f"""TEXT EXTRACTION FAILED
@@ -138,12 +380,31 @@ Solution: Try exporting to Word (.docx) instead, which may handle the PDF better
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python pdf_to_text.py <input_pdf> <output_txt>")
-        sys.exit(1)
-    
-    input_pdf = sys.argv[1]
-    output_txt = sys.argv[2]
+    parser = argparse.ArgumentParser(description="Extract text from a PDF")
+    parser.add_argument("input_pdf", help="Input PDF file")
+    parser.add_argument("output_txt", nargs="?", help="Output text file (omit with --ndjson)")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="Stream one JSON record per page to stdout instead")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="PyMuPDF worker processes (CPU count if omitted)")
+    parser.add_argument("--pages", default=None,
+                        help="Pages to extract, e.g. 1-3,10,40- (all if omitted)")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="Seconds the extraction may take; later pages are left out")
+    args = parser.parse_args()
     
-    success = pdf_to_text(input_pdf, output_txt)
+    deadline = as_deadline(args.deadline)
+    if args.ndjson:
+        try:
+            success = pdf_to_ndjson(args.input_pdf, workers=args.workers, pages=args.pages,
+                                    deadline=deadline) > 0
+        except Exception as e:
+            print(f"⚠️ Text extraction failed: {e}", file=sys.stderr)
+            success = False
+    elif args.output_txt:
+        success = pdf_to_text(args.input_pdf, args.output_txt, args.workers, pages=args.pages,
+                              deadline=deadline)
+    else:
+        parser.error("output_txt is required unless --ndjson is given")
+    deadline.log_report()
     sys.exit(0 if success else 1)
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Profiled Conversion
+Converts each page with the engine document_profile.py picked for it, so
+a scanned page goes straight to OCR and a plain text page skips pdf2docx,
+and no engine is ever run twice on the same page:
+
+    pdf2docx -> chunked, cached layout parse (chunked_docx.py)
+    pymupdf  -> text blocks read directly with PyMuPDF
+    raster   -> the page rendered as a picture
+    ocr      -> Tesseract text for image-only pages (ocr_pdf.py)
+
+Word output is built in one python-docx document, page by page in order:
+pdf2docx pages are written by pdf2docx's own Page.make_docx() from the
+stored layout, the others by the small writers below. A page whose engine
+fails is handed to the next cheaper engine instead of being retried.
+
+With a deadline (deadline.py) the batch engines get a share of the budget
+each; pages they do not finish become pictures (layout pages) or PyMuPDF
+text, pictures drop to a lower DPI when the pages fall behind, and pages
+left once the budget is spent are replaced by a one-line note. Pages the
+profiler does not reach in its share are read with PyMuPDF.
+
+Usage:
+    python profiled_convert.py <input_pdf> <output_docx> [--pages 1-3,10] [--exact]
+        [--deadline SECONDS]
+"""
+
+import sys
+import io
+import time
+import argparse
+
+try:
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+from page_selection import select_pages, format_pages
+from document_profile import profile_document, plan_engines, engine_pages, describe_plan
+from deadline import REDUCED, MINIMAL, LEFT_OUT, as_deadline, left_out_note
+from layout_cache import pdf2docx_converter
+
+# Classes whose pages go through pdf2docx when exact layout matters more
+# than speed (the hidden-tables Word path and Excel)
+LAYOUT_FIDELITY = {"text": "pdf2docx"}
+
+# Resolution of pages written as pictures, and when behind the deadline
+RASTER_DPI = 150
+REDUCED_RASTER_DPI = 72
+# Margin of pages not laid out by pdf2docx, in points
+PAGE_MARGIN = 36
+
+# Where a page goes when its planned engine fails
+_DEGRADE = {"pdf2docx": "pymupdf", "ocr": "raster"}
+
+# Shares of the remaining deadline budget profiling and the batch engines
+# may use; the rest is left for writing the pages
+PROFILE_SHARE = 0.2
+LAYOUT_SHARE = 0.6
+OCR_SHARE = 0.6
+
+
+def plan_pages(pdf_path, indexes=None, overrides=None, deadline=None):
+    """
+    Profile the selected pages and pick an engine for each, profiling
+    within its share of the deadline
+
+    Returns:
+        Tuple of (dict of 0-based page index -> engine, dict of page index
+        -> profile class)
+    """
+    deadline = as_deadline(deadline)
+    profile = profile_document(pdf_path, format_pages(indexes) if indexes is not None else None,
+                               deadline.stop_at(PROFILE_SHARE))
+    plan = plan_engines(profile, overrides)
+    for page in profile["unprofiled"]:
+        deadline.degrade(page, "not profiled in time, pymupdf")
+    print(f"📊 Profiled {len(profile['pages'])} page(s) as {profile['class']} in {profile['ms']} ms - "
+          f"{describe_plan(plan)}", file=sys.stderr)
+    return plan, {stats["page"] - 1: stats["class"] for stats in profile["pages"]}
+
+
+def _pdf2docx_pages(pdf_path, indexes, stop_at=None):
+    """Stored pdf2docx layouts by page index; pages that failed are missing."""
+    from chunked_docx import parse_chunked
+    try:
+        layout, summary = parse_chunked(pdf_path, indexes, stop_at=stop_at)
+    except Exception as e:
+        print(f"⚠️ pdf2docx failed ({e})", file=sys.stderr)
+        return {}
+    return {raw["id"]: raw for raw in layout.get("pages", [])}
+
+
+def _ocr_texts(pdf_path, indexes, stop_at=None):
+    """OCR text by page index; empty if OCR cannot run."""
+    try:
+        from ocr_pdf import iter_pages
+        # Pages Tesseract failed on are left out and fall back like unfinished ones
+        return {record["page"] - 1: record["text"]
+                for record in iter_pages(pdf_path, pages=format_pages(indexes), stop_at=stop_at)
+                if record["engine"] != "ocr-failed"}
+    except Exception as e:
+        print(f"⚠️ OCR unavailable ({e}), rendering those pages instead", file=sys.stderr)
+        return {}
+
+
+def prepare(pdf_path, plan, deadline=None):
+    """
+    Run the batch engines (pdf2docx, OCR) once for all of their pages, each
+    within its share of the deadline
+    """
+    deadline = as_deadline(deadline)
+    groups = engine_pages(plan)
+    layouts = (_pdf2docx_pages(pdf_path, groups["pdf2docx"], deadline.stop_at(LAYOUT_SHARE))
+               if "pdf2docx" in groups else {})
+    texts = _ocr_texts(pdf_path, groups["ocr"], deadline.stop_at(OCR_SHARE)) if "ocr" in groups else {}
+    return layouts, texts
+
+
+def resolve(plan, classes, layouts, texts, deadline=None, pictures=True):
+    """
+    Final engine per page once the batch engines have run. Pages the
+    deadline cut short become pictures when they needed layout
+    reconstruction (pictures=False for outputs without them) and PyMuPDF
+    text otherwise.
+    """
+    deadline = as_deadline(deadline)
+    resolved = {}
+    for index, engine in plan.items():
+        if (engine == "pdf2docx" and index not in layouts) or (engine == "ocr" and index not in texts):
+            if deadline.limited:
+                cheaper = "raster" if pictures and classes.get(index) != "text" else "pymupdf"
+                deadline.degrade(index + 1, f"{engine} produced nothing in time, {cheaper} instead")
+            else:
+                cheaper = _DEGRADE[engine]
+                print(f"   ↪ Page {index + 1}: {engine} produced nothing, using {cheaper}", file=sys.stderr)
+            engine = cheaper
+        resolved[index] = engine
+    return resolved
+
+
+# ---- Word ----
+
+def _new_section(doc, page):
+    from docx.enum.section import WD_SECTION
+    from docx.shared import Pt
+
+    # Same rule pdf2docx's Page.make_docx() uses, so both kinds of page mix
+    section = doc.add_section(WD_SECTION.NEW_PAGE) if doc.paragraphs else doc.sections[0]
+    section.page_width = Pt(page.rect.width)
+    section.page_height = Pt(page.rect.height)
+    for side in ("left_margin", "right_margin", "top_margin", "bottom_margin"):
+        setattr(section, side, Pt(PAGE_MARGIN))
+
+
+def _write_pymupdf_page(doc, page):
+    from docx.shared import Pt, RGBColor
+
+    _new_section(doc, page)
+    written = False
+    for block in page.get_text("dict", flags=fitz.TEXT_MEDIABOX_CLIP, sort=True)["blocks"]:
+        if block["type"] != 0:
+            continue
+        paragraph = doc.add_paragraph()
+        for line_number, line in enumerate(block["lines"]):
+            if line_number:
+                paragraph.add_run(" ")
+            for span in line["spans"]:
+                run = paragraph.add_run(span["text"])
+                run.font.size = Pt(round(span["size"], 1))
+                run.bold = bool(span["flags"] & 16)
+                run.italic = bool(span["flags"] & 2)
+                run.font.color.rgb = RGBColor.from_string(f"{span['color']:06X}")
+        written = True
+    if not written:
+        # Keeps the page (and its section) when it has no text
+        doc.add_paragraph()
+
+
+def _write_raster_page(doc, page, dpi=RASTER_DPI):
+    from docx.shared import Pt
+
+    _new_section(doc, page)
+    png = page.get_pixmap(dpi=dpi).tobytes("png")
+    scale = min((page.rect.width - 2 * PAGE_MARGIN) / page.rect.width,
+                (page.rect.height - 2 * PAGE_MARGIN - 12) / page.rect.height)
+    doc.add_picture(io.BytesIO(png), width=Pt(page.rect.width * scale))
+
+
+def _write_ocr_page(doc, page, text):
+    _new_section(doc, page)
+    paragraphs = [" ".join(part.split()) for part in text.split("\n\n")]
+    paragraphs = [part for part in paragraphs if part] or [""]
+    for part in paragraphs:
+        doc.add_paragraph(part)
+
+
+def _write_left_out_pages(doc, page, indexes):
+    # One section for all of them: a section per page costs as much as
+    # converting them
+    _new_section(doc, page)
+    doc.add_paragraph(left_out_note(indexes))
+
+
+def convert_profiled(pdf_path, output_docx, indexes=None, overrides=None, deadline=None):
+    """
+    Convert the selected pages (None for all) to .docx, each with its
+    profiled engine, stepping down to cheaper ones to meet the deadline
+    (a deadline.Deadline or seconds; None for no limit)
+
+    Returns:
+        Dict with "plan" (engine per 1-based page), "engines" (page count
+        per engine) and "seconds"
+    """
+    from docx import Document
+
+    started = time.perf_counter()
+    deadline = as_deadline(deadline)
+    plan, classes = plan_pages(pdf_path, indexes, overrides, deadline)
+    layouts, texts = prepare(pdf_path, plan, deadline)
+    plan = resolve(plan, classes, layouts, texts, deadline)
+
+    if layouts:
+        # Loaded through the helper, so PyMuPDF's 'import fitz' notice stays off stdout
+        pdf2docx_converter()
+        from pdf2docx.page.Page import Page
+
+    doc = Document()
+    pages_started = time.monotonic()
+    with fitz.open(pdf_path) as src:
+        for done, index in enumerate(sorted(plan)):
+            engine = plan[index]
+            page = src[index]
+            step = deadline.step(done, len(plan), pages_started)
+            if step == MINIMAL:
+                # Only the reserve is left, so the rest of the pages go too
+                left_out = sorted(plan)[done:]
+                for skipped in left_out:
+                    deadline.degrade(skipped + 1, LEFT_OUT)
+                    plan[skipped] = "left out"
+                _write_left_out_pages(doc, page, left_out)
+                break
+            if engine == "pdf2docx":
+                try:
+                    Page().restore(layouts[index]).make_docx(doc)
+                except Exception as e:
+                    print(f"   ↪ Page {index + 1}: pdf2docx could not write it ({e}), using pymupdf",
+                          file=sys.stderr)
+                    engine = plan[index] = "pymupdf"
+            if engine == "pymupdf":
+                _write_pymupdf_page(doc, page)
+            elif engine == "raster":
+                dpi = RASTER_DPI
+                if step == REDUCED:
+                    dpi = REDUCED_RASTER_DPI
+                    deadline.degrade(index + 1, f"picture at {dpi} DPI")
+                _write_raster_page(doc, page, dpi)
+            elif engine == "ocr":
+                _write_ocr_page(doc, page, texts[index])
+    doc.save(output_docx)
+
+    engines = {}
+    for engine in plan.values():
+        engines[engine] = engines.get(engine, 0) + 1
+    return {
+        "plan": {index + 1: engine for index, engine in sorted(plan.items())},
+        "engines": engines,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+# ---- Excel ----
+
+def iter_profiled_blocks(pdf_path, indexes=None, overrides=LAYOUT_FIDELITY, deadline=None):
+    """
+    Paragraphs and tables of the selected pages in page order, the same
+    tuples as layout_cache.iter_blocks(), each page read by its profiled
+    engine; pictures (raster pages) carry no cell content and are skipped.
+    Pages the deadline cuts short are read as PyMuPDF text, and pages left
+    once it is spent are skipped.
+    """
+    from layout_cache import iter_blocks
+
+    deadline = as_deadline(deadline)
+    plan, classes = plan_pages(pdf_path, indexes, overrides, deadline)
+    layouts, texts = prepare(pdf_path, plan, deadline)
+    plan = resolve(plan, classes, layouts, texts, deadline, pictures=False)
+
+    pages_started = time.monotonic()
+    with fitz.open(pdf_path) as src:
+        for done, index in enumerate(sorted(plan)):
+            engine = plan[index]
+            if deadline.step(done, len(plan), pages_started) == MINIMAL:
+                deadline.degrade(index + 1, LEFT_OUT)
+                continue
+            if engine == "pdf2docx":
+                yield from iter_blocks({"pages": [layouts[index]]})
+            elif engine == "pymupdf":
+                for block in src[index].get_text("blocks", sort=True):
+                    if block[6] == 0 and block[4].strip():
+                        yield "text", block[4].strip(), False
+            elif engine == "ocr":
+                for part in texts[index].split("\n\n"):
+                    if part.strip():
+                        yield "text", part.strip(), False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a PDF to Word with a profiled engine per page")
+    parser.add_argument("input_pdf", help="Input PDF")
+    parser.add_argument("output_docx", help="Output .docx")
+    parser.add_argument("--pages", default=None, help="Page selection, e.g. 1-3,10,40-")
+    parser.add_argument("--exact", action="store_true", help="Lay out text pages with pdf2docx too")
+    parser.add_argument("--deadline", type=float, default=None, help="Seconds the conversion may take")
+    args = parser.parse_args()
+
+    deadline = as_deadline(args.deadline)
+    try:
+        summary = convert_profiled(args.input_pdf, args.output_docx, select_pages(args.input_pdf, args.pages),
+                                   LAYOUT_FIDELITY if args.exact else None, deadline)
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    deadline.log_report()
+    print(f"✅ {args.output_docx} in {summary['seconds']}s: "
+          + ", ".join(f"{engine} {count}" for engine, count in sorted(summary["engines"].items())),
+          file=sys.stderr)
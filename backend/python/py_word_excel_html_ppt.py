@@ -1,18 +1,23 @@
 import os
 import sys
 import io
-import tempfile
+import time
+
+from layout_cache import pdf2docx_converter
 
 # Only import what we actually need for basic conversions
 try:
-    from pdf2docx import Converter
+    Converter = pdf2docx_converter()
     HAS_PDF2DOCX = True
 except ImportError:
     HAS_PDF2DOCX = False
     print("Warning: pdf2docx not available", file=sys.stderr)
 
 try:
-    import fitz  # PyMuPDF - for high-quality PDF extraction
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF - for high-quality PDF extraction
     HAS_PYMUPDF = True
 except ImportError:
     HAS_PYMUPDF = False
@@ -70,10 +75,33 @@ try:
 except Exception:
     pass
 
-def html_to_word(html_path, output_docx="output.docx"):
+# Page selections ("1-3,10,40-") are pushed down into each library
+from page_selection import (parse_pages, select_pages, page_count,
+                            pdf2image_runs, format_pages, pop_pages_argument)
+# Each page is converted with the engine its profile calls for; pdf2docx
+# pages are parsed in checkpointed chunks shared by Word and Excel
+from profiled_convert import LAYOUT_FIDELITY, convert_profiled, iter_profiled_blocks
+# Converters take an optional latency budget and step down page by page
+# (lower DPI, pictures instead of layout, no post-processing) to meet it
+from deadline import FULL, REDUCED, MINIMAL, LEFT_OUT, LEFT_OUT_NOTE, as_deadline, pop_deadline_argument
+# Intermediates that need a path go in a per-job scratch directory; images
+# are handed to python-docx/python-pptx as streams
+from scratch import job_scratch
+
+
+def _pdf2image_pages(pdf_path, indexes, dpi):
+    """Render the selected pages with pdf2image, one call per contiguous run."""
+    images = []
+    for first_page, last_page in pdf2image_runs(indexes):
+        images.extend(convert_from_path(pdf_path, dpi=dpi, poppler_path=POPPLER_PATH,
+                                        first_page=first_page, last_page=last_page))
+    return images
+
+def html_to_word(html_path, output_docx="output.docx", deadline=None):
     """Convert HTML file to Word document using BeautifulSoup and python-docx."""
     print(f"⏳ Converting HTML to Word...", file=sys.stderr)
     print(f"   Processing: {html_path}", file=sys.stderr)
+    deadline = as_deadline(deadline)
     
     try:
         from bs4 import BeautifulSoup
@@ -147,19 +175,20 @@ def html_to_word(html_path, output_docx="output.docx"):
                 doc.add_paragraph()
         
         # Clean up formatting
-        print(f"🔧 Post-processing: Cleaning up formatting...", file=sys.stderr)
-        for paragraph in doc.paragraphs:
-            paragraph.paragraph_format.space_before = Pt(0)
-            paragraph.paragraph_format.space_after = Pt(3)
-            paragraph.paragraph_format.line_spacing = 1.0
-        
-        # Clean up tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        paragraph.paragraph_format.space_before = Pt(0)
-                        paragraph.paragraph_format.space_after = Pt(0)
+        if deadline.optional("formatting clean-up"):
+            print(f"🔧 Post-processing: Cleaning up formatting...", file=sys.stderr)
+            for paragraph in doc.paragraphs:
+                paragraph.paragraph_format.space_before = Pt(0)
+                paragraph.paragraph_format.space_after = Pt(3)
+                paragraph.paragraph_format.line_spacing = 1.0
+            
+            # Clean up tables
+            for table in doc.tables:
+                for row in table.rows:
+                    for cell in row.cells:
+                        for paragraph in cell.paragraphs:
+                            paragraph.paragraph_format.space_before = Pt(0)
+                            paragraph.paragraph_format.space_after = Pt(0)
         
         # Save document
         doc.save(output_docx)
@@ -180,7 +209,7 @@ def html_to_word(html_path, output_docx="output.docx"):
         traceback.print_exc(file=sys.stderr)
         return False
 
-def pdf_to_word_with_hidden_tables(pdf_path, output_docx="output.docx"):
+def pdf_to_word_with_hidden_tables(pdf_path, output_docx="output.docx", pages=None, deadline=None):
     """Convert PDF to Word with exact layout preservation.
     This approach:
     1. Uses pdf2docx for accurate layout and table structure
@@ -188,9 +217,12 @@ def pdf_to_word_with_hidden_tables(pdf_path, output_docx="output.docx"):
     3. Maintains tables with proper borders and styling
     4. Preserves exact page dimensions and positioning
     5. Maintains all images with correct placement
+    With a deadline, pages that would miss it are converted more cheaply
+    and the table formatting pass may be skipped.
     """
     
     print(f"\u23f3 Converting PDF to Word (exact layout preservation)...", file=sys.stderr)
+    deadline = as_deadline(deadline)
     
     top_margin = 0.5
     bottom_margin = 0.5
@@ -202,18 +234,24 @@ def pdf_to_word_with_hidden_tables(pdf_path, output_docx="output.docx"):
         return False
     
     try:
-        from pdf2docx import Converter
         from docx import Document
         from docx.shared import Pt, Inches
         from docx.oxml import OxmlElement
         from docx.oxml.ns import qn
         
-        # Extract full PDF text content first (for accuracy check)
+        indexes = select_pages(pdf_path, pages)
+        if indexes is not None:
+            print(f"   Pages: {format_pages(indexes)}", file=sys.stderr)
+        
+        # Extract full PDF text content first (for accuracy check); a
+        # deadline leaves no time for reading every page twice
         pdf_text_content = {}
-        if HAS_PYMUPDF:
+        if HAS_PYMUPDF and deadline.limited:
+            deadline.skip("text accuracy check")
+        elif HAS_PYMUPDF:
             try:
                 pdf_doc = fitz.open(pdf_path)
-                for page_num in range(len(pdf_doc)):
+                for page_num in parse_pages(pages, len(pdf_doc)):
                     page = pdf_doc[page_num]
                     pdf_text_content[page_num] = page.get_text("text")
                 pdf_doc.close()
@@ -229,7 +267,7 @@ def pdf_to_word_with_hidden_tables(pdf_path, output_docx="output.docx"):
             try:
                 pdf_doc = fitz.open(pdf_path)
                 if len(pdf_doc) > 0:
-                    page = pdf_doc[0]
+                    page = pdf_doc[indexes[0] if indexes else 0]
                     rect = page.rect
                     actual_pdf_width = rect.width / 72
                     actual_pdf_height = rect.height / 72
@@ -240,7 +278,8 @@ def pdf_to_word_with_hidden_tables(pdf_path, output_docx="output.docx"):
             except Exception as e:
                 print(f"   Warning: Could not measure PDF: {e}", file=sys.stderr)
         
-        # Step 1: Convert PDF to Word using pdf2docx (preserves layout and tables)
+        # Step 1: Convert PDF to Word using pdf2docx (preserves layout and tables);
+        # scanned, graphic and blank pages take their profiled engine instead
         print(f"\ud83d\udd25 Converting with pdf2docx (layout + structure)...", file=sys.stderr)
         
         # Ensure output directory exists
@@ -250,22 +289,11 @@ def pdf_to_word_with_hidden_tables(pdf_path, output_docx="output.docx"):
             os.makedirs(output_dir, exist_ok=True)
             print(f"   ✓ Created output directory: {output_dir}", file=sys.stderr)
         
-        cv = Converter(pdf_path)
-        try:
-            # Enable multi-processing for faster conversion
-            print(f"   🚀 Starting conversion with automatic multiprocessing...", file=sys.stderr)
-            cv.convert(output_docx)  # Default uses multiprocessing
-            print(f"   ✓ Conversion successful", file=sys.stderr)
-        except Exception as e:
-            # Fallback to single-processing
-            print(f"   ⚠ Multiprocessing failed: {str(e)}", file=sys.stderr)
-            print(f"   Retrying with single-processing...", file=sys.stderr)
-            cv.close()
-            cv = Converter(pdf_path)
-            cv.convert(output_docx, multi_processing=False, cpu_count=1)
-            print(f"   ✓ Single-processing conversion successful (fallback)", file=sys.stderr)
-        finally:
-            cv.close()
+        # pdf2docx pages are parsed in checkpointed chunks and cached; a layout
+        # parsed earlier (Word or Excel) skips the analysis
+        summary = convert_profiled(pdf_path, output_docx, indexes, LAYOUT_FIDELITY, deadline)
+        print(f"   ✓ Conversion successful: " + ", ".join(f"{engine} {count} page(s)"
+              for engine, count in sorted(summary["engines"].items())), file=sys.stderr)
         
         # Step 2: Post-process to preserve tables with formatting
         print(f"\ud83d\udd27 Post-processing: Preserving table formatting...", file=sys.stderr)
@@ -281,9 +309,9 @@ def pdf_to_word_with_hidden_tables(pdf_path, output_docx="output.docx"):
                 section.left_margin = Inches(left_margin)
                 section.right_margin = Inches(right_margin)
                 
-        # PRESERVE table formatting - don't hide them
+        # PRESERVE table formatting - don't hide them (skipped when behind the deadline)
         table_count = 0
-        for table in doc.tables:
+        for table in (doc.tables if deadline.optional("table formatting") else []):
             table_count += 1
                     
             # Enhance table formatting with proper borders
@@ -318,19 +346,20 @@ def pdf_to_word_with_hidden_tables(pdf_path, output_docx="output.docx"):
         print(f"   ✓ Preserved {table_count} table(s) with formatting", file=sys.stderr)
         
         # Verify content is present
-        word_text_count = 0
-        for para in doc.paragraphs:
-            word_text_count += len(para.text)
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    word_text_count += len(cell.text)
-        
-        pdf_text_count = sum(len(text) for text in pdf_text_content.values())
-        print(f"   \u2713 PDF text: {pdf_text_count} chars, Word text: {word_text_count} chars", file=sys.stderr)
-        
-        if word_text_count < pdf_text_count * 0.9:  # Allow 10% tolerance
-            print(f"   \u26a0\ufe0f  Warning: Word document has {pdf_text_count - word_text_count} fewer characters", file=sys.stderr)
+        if pdf_text_content:
+            word_text_count = 0
+            for para in doc.paragraphs:
+                word_text_count += len(para.text)
+            for table in doc.tables:
+                for row in table.rows:
+                    for cell in row.cells:
+                        word_text_count += len(cell.text)
+            
+            pdf_text_count = sum(len(text) for text in pdf_text_content.values())
+            print(f"   \u2713 PDF text: {pdf_text_count} chars, Word text: {word_text_count} chars", file=sys.stderr)
+            
+            if word_text_count < pdf_text_count * 0.9:  # Allow 10% tolerance
+                print(f"   \u26a0\ufe0f  Warning: Word document has {pdf_text_count - word_text_count} fewer characters", file=sys.stderr)
         
         # Skipped heavy text formatting enhancements for performance
         print(f"   ⏩ Any formatting enhancements were skipped for speed optimization", file=sys.stderr)
@@ -360,12 +389,15 @@ def pdf_to_word_with_hidden_tables(pdf_path, output_docx="output.docx"):
         traceback.print_exc(file=sys.stderr)
         return False
 
-def pdf_to_word_accurate(pdf_path, output_docx="output.docx"):
+def pdf_to_word_accurate(pdf_path, output_docx="output.docx", pages=None, deadline=None):
     """Convert PDF to Word using PyMuPDF for accurate text extraction + image preservation.
-    This approach avoids false table detection and preserves exact text layout."""
+    This approach avoids false table detection and preserves exact text layout.
+    Pages behind the deadline keep their text but not their images, and pages
+    left once it is spent are left out."""
     
     print(f"\u23f3 Converting PDF to Word (accurate text + images)...", file=sys.stderr)
     print(f"   Using PyMuPDF for precise extraction", file=sys.stderr)
+    deadline = as_deadline(deadline)
     
     top_margin = 0.5
     bottom_margin = 0.5
@@ -381,15 +413,15 @@ def pdf_to_word_accurate(pdf_path, output_docx="output.docx"):
         from docx.shared import Pt, Inches
         
         pdf_doc = fitz.open(pdf_path)
+        indexes = parse_pages(pages, len(pdf_doc))
         doc = Document()
-        temp_images = []
         
         # Get page dimensions
         pdf_page_width = None
         pdf_page_height = None
         
-        if len(pdf_doc) > 0:
-            page = pdf_doc[0]
+        if indexes:
+            page = pdf_doc[indexes[0]]
             rect = page.rect
             actual_pdf_width = rect.width / 72
             actual_pdf_height = rect.height / 72
@@ -406,10 +438,15 @@ def pdf_to_word_accurate(pdf_path, output_docx="output.docx"):
                 section.left_margin = Inches(left_margin)
                 section.right_margin = Inches(right_margin)
         
-        # Process each page
-        for page_num in range(len(pdf_doc)):
+        # Process each selected page
+        pages_started = time.monotonic()
+        for position, page_num in enumerate(indexes):
             page = pdf_doc[page_num]
             print(f"\ud83d\udcc4 Page {page_num + 1}/{len(pdf_doc)}", file=sys.stderr)
+            step = deadline.step(position, len(indexes), pages_started)
+            if step == MINIMAL:
+                deadline.degrade(page_num + 1, LEFT_OUT)
+                continue
             
             # Extract text
             text = page.get_text("text")
@@ -426,19 +463,18 @@ def pdf_to_word_accurate(pdf_path, output_docx="output.docx"):
             
             # Extract and add images
             image_list = page.get_images()
-            if image_list:
+            if image_list and step != FULL:
+                deadline.degrade(page_num + 1, f"{len(image_list)} image(s) left out")
+            elif image_list:
                 print(f"   Found {len(image_list)} image(s)", file=sys.stderr)
                 for img_index, img in enumerate(image_list):
                     try:
                         xref = img[0]
                         pix = fitz.Pixmap(pdf_doc, xref)
-                        img_path = f"temp_p{page_num + 1}_i{img_index}.png"
-                        pix.save(img_path)
-                        temp_images.append(img_path)
                         
                         p = doc.add_paragraph()
                         run = p.add_run()
-                        run.add_picture(img_path, width=Inches(5.5))
+                        run.add_picture(io.BytesIO(pix.tobytes("png")), width=Inches(5.5))
                         p.paragraph_format.space_before = Pt(4)
                         p.paragraph_format.space_after = Pt(4)
                         print(f"   \u2713 Image added", file=sys.stderr)
@@ -446,7 +482,7 @@ def pdf_to_word_accurate(pdf_path, output_docx="output.docx"):
                         print(f"   \u26a0\ufe0f  Image error: {e}", file=sys.stderr)
             
             # Page break
-            if page_num < len(pdf_doc) - 1:
+            if position < len(indexes) - 1:
                 doc.add_page_break()
         
         pdf_doc.close()
@@ -454,14 +490,6 @@ def pdf_to_word_accurate(pdf_path, output_docx="output.docx"):
         # Save document
         doc.save(output_docx)
         
-        # Clean up temp images
-        for img_file in temp_images:
-            try:
-                if os.path.exists(img_file):
-                    os.remove(img_file)
-            except:
-                pass
-        
         print(f"\u2705 Conversion complete:", file=sys.stderr)
         print(f"   \u2713 Accurate text extraction", file=sys.stderr)
         print(f"   \u2713 All images preserved", file=sys.stderr)
@@ -472,11 +500,18 @@ def pdf_to_word_accurate(pdf_path, output_docx="output.docx"):
         print(f"\u26a0\ufe0f  Error: {e}", file=sys.stderr)
         return False
 
-def pdf_to_word(pdf_path, output_docx="output.docx"):
-    """Convert PDF to Word with exact page size matching, encryption handling, and layout preservation."""
+def pdf_to_word(pdf_path, output_docx="output.docx", pages=None, deadline=None):
+    """Convert PDF to Word with exact page size matching, encryption handling, and layout preservation.
+    With a deadline, pages that would miss it are converted more cheaply and
+    the formatting clean-up may be skipped."""
     
     print(f"⏳ Converting PDF to Word with page size matching...", file=sys.stderr)
     print(f"   Processing: {pdf_path}", file=sys.stderr)
+    deadline = as_deadline(deadline)
+    
+    indexes = select_pages(pdf_path, pages)
+    if indexes is not None:
+        print(f"   Pages: {format_pages(indexes)}", file=sys.stderr)
     
     # Get PDF page dimensions first
     pdf_page_width = None
@@ -502,25 +537,9 @@ def pdf_to_word(pdf_path, output_docx="output.docx"):
                 else:
                     print(f"   ⚠️ Could not decrypt with empty password - continuing with encrypted data", file=sys.stderr)
             
-            # Extract images from PDF first
-            print(f"🖼️  Extracting images from PDF...", file=sys.stderr)
-            extracted_images = {}
-            for page_num, page in enumerate(pdf_doc, 1):
-                image_list = page.get_images()
-                if image_list:
-                    print(f"   Found {len(image_list)} image(s) on page {page_num}", file=sys.stderr)
-                    for img_index, img in enumerate(image_list):
-                        xref = img[0]
-                        pix = fitz.Pixmap(pdf_doc, xref)
-                        img_path = f"temp_img_p{page_num}_i{img_index}.png"
-                        pix.save(img_path)
-                        if (page_num, img_index) not in extracted_images:
-                            extracted_images[(page_num, img_index)] = img_path
-                        print(f"   ✓ Extracted image: {img_path}", file=sys.stderr)
-            
             # Get page dimensions
             if len(pdf_doc) > 0:
-                page = pdf_doc[0]
+                page = pdf_doc[indexes[0] if indexes else 0]
                 rect = page.rect
                 # Get actual PDF dimensions in inches
                 actual_pdf_width = rect.width / 72  # Convert from points to inches
@@ -536,16 +555,15 @@ def pdf_to_word(pdf_path, output_docx="output.docx"):
         except Exception as e:
             print(f"   Warning: Could not measure PDF size: {e}", file=sys.stderr)
     
-    # PRIMARY: Use pdf2docx for layout-aware conversion
-    if HAS_PDF2DOCX:
+    # PRIMARY: Profile the pages and convert each with the cheapest adequate
+    # engine (pdf2docx for layout, PyMuPDF for plain text, OCR for scans)
+    if HAS_PYMUPDF:
         try:
-            print(f"🔥 Using pdf2docx for layout-aware conversion...", file=sys.stderr)
-            from pdf2docx import Converter
+            print(f"🔥 Using profiled per-page conversion...", file=sys.stderr)
             
-            # Use conversion with better settings
-            cv = Converter(pdf_path)
-            cv.convert(output_docx, multi_processing=False, cpu_count=1)
-            cv.close()
+            summary = convert_profiled(pdf_path, output_docx, indexes, deadline=deadline)
+            print(f"   ✓ " + ", ".join(f"{engine} {count} page(s)"
+                  for engine, count in sorted(summary["engines"].items())), file=sys.stderr)
             
             if os.path.exists(output_docx) and os.path.getsize(output_docx) > 0:
                 # Post-process to apply exact page size and enhance formatting
@@ -572,8 +590,11 @@ def pdf_to_word(pdf_path, output_docx="output.docx"):
                             print(f"   ✓ Word page size set to {pdf_page_width:.2f}" + '"' + f" x {pdf_page_height:.2f}" + '"', file=sys.stderr)
                             print(f"   ✓ Margins: T={top_margin}" + '"' + f", B={bottom_margin}" + '"' + f", L={left_margin}" + '"' + f", R={right_margin}" + '"', file=sys.stderr)
                     
+                    # Table and paragraph clean-up is skipped when behind the deadline
+                    enhance = deadline.optional("table and paragraph clean-up")
+                    
                     # Enhance table formatting with borders and proper spacing
-                    for table in doc.tables:
+                    for table in (doc.tables if enhance else []):
                         # Set table properties for better appearance
                         tbl = table._tbl
                         tblPr = tbl.tblPr
@@ -630,7 +651,7 @@ def pdf_to_word(pdf_path, output_docx="output.docx"):
                                     paragraph.paragraph_format.line_spacing = 1.0
                     
                     # Clean up paragraph formatting throughout document
-                    for paragraph in doc.paragraphs:
+                    for paragraph in (doc.paragraphs if enhance else []):
                         # Remove extra line breaks and clean spacing
                         if paragraph.text.strip() == '':
                             # Remove empty paragraphs
@@ -674,146 +695,9 @@ def pdf_to_word(pdf_path, output_docx="output.docx"):
                 print(f"   ✓ Professional quality maintained", file=sys.stderr)
                 return True
             else:
-                print(f"⚠️ pdf2docx created empty file", file=sys.stderr)
+                print(f"⚠️ Profiled conversion created empty file", file=sys.stderr)
         except Exception as e:
-            print(f"⚠️ pdf2docx failed: {e}", file=sys.stderr)
-            print(f"   Trying PyMuPDF...", file=sys.stderr)
-    
-    # PRIMARY: Use pdf2docx for layout-aware conversion
-    if HAS_PDF2DOCX:
-        try:
-            print(f"🔥 Using pdf2docx for layout-aware conversion...", file=sys.stderr)
-            from pdf2docx import Converter
-            
-            # Use conversion with better settings
-            cv = Converter(pdf_path)
-            cv.convert(output_docx, multi_processing=False, cpu_count=1)
-            cv.close()
-            
-            if os.path.exists(output_docx) and os.path.getsize(output_docx) > 0:
-                # Post-process to apply exact page size and enhance formatting
-                try:
-                    from docx import Document
-                    from docx.oxml.ns import qn
-                    from docx.oxml import OxmlElement
-                    from docx.shared import Pt, Inches
-                    from docx.enum.section import WD_SECTION
-                    
-                    print(f"🔧 Post-processing: Applying exact PDF page dimensions...", file=sys.stderr)
-                    doc = Document(output_docx)
-                    
-                    # Apply exact PDF page dimensions to all sections
-                    if pdf_page_width and pdf_page_height:
-                        for section in doc.sections:
-                            section.page_width = Inches(pdf_page_width)
-                            section.page_height = Inches(pdf_page_height)
-                            # Apply calculated margins
-                            section.top_margin = Inches(top_margin)
-                            section.bottom_margin = Inches(bottom_margin)
-                            section.left_margin = Inches(left_margin)
-                            section.right_margin = Inches(right_margin)
-                            print(f"   ✓ Word page size set to {pdf_page_width:.2f}" + '"' + f" x {pdf_page_height:.2f}" + '"', file=sys.stderr)
-                            print(f"   ✓ Margins: T={top_margin}" + '"' + f", B={bottom_margin}" + '"' + f", L={left_margin}" + '"' + f", R={right_margin}" + '"', file=sys.stderr)
-                    
-                    # Enhance table formatting with borders and proper spacing
-                    for table in doc.tables:
-                        # Set table properties for better appearance
-                        tbl = table._tbl
-                        tblPr = tbl.tblPr
-                        if tblPr is None:
-                            tblPr = OxmlElement('w:tblPr')
-                            tbl.insert(0, tblPr)
-                        
-                        # Set table alignment and width
-                        tblW = OxmlElement('w:tblW')
-                        tblW.set(qn('w:w'), '5000')
-                        tblW.set(qn('w:type'), 'auto')
-                        tblPr.append(tblW)
-                        
-                        # Add borders to all cells and format text
-                        for row in table.rows:
-                            # Set row height
-                            trPr = row._element.get_or_add_trPr()
-                            trHeight = OxmlElement('w:trHeight')
-                            trHeight.set(qn('w:val'), '300')
-                            trHeight.set(qn('w:type'), 'atLeast')
-                            trPr.append(trHeight)
-                            
-                            for cell in row.cells:
-                                tcPr = cell._element.get_or_add_tcPr()
-                                
-                                # Set cell borders
-                                tcBorders = OxmlElement('w:tcBorders')
-                                for border_name in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
-                                    border = OxmlElement(f'w:{border_name}')
-                                    border.set(qn('w:val'), 'single')
-                                    border.set(qn('w:sz'), '12')
-                                    border.set(qn('w:space'), '0')
-                                    border.set(qn('w:color'), '000000')
-                                    tcBorders.append(border)
-                                
-                                tcPr.append(tcBorders)
-                                
-                                # Remove extra spacing in cell text
-                                for paragraph in cell.paragraphs:
-                                    # Remove extra spaces
-                                    for run in paragraph.runs:
-                                        text = run.text
-                                        # Clean up excessive spaces around colons and punctuation
-                                        text = text.replace('  ', ' ')  # Remove double spaces
-                                        text = text.replace(' : ', ': ')  # Fix spacing around colons
-                                        text = text.replace(' , ', ', ')  # Fix spacing around commas
-                                        run.text = text
-                                        # Ensure consistent font
-                                        run.font.size = Pt(10)
-                                    
-                                    # Set paragraph spacing
-                                    paragraph.paragraph_format.space_before = Pt(0)
-                                    paragraph.paragraph_format.space_after = Pt(0)
-                                    paragraph.paragraph_format.line_spacing = 1.0
-                    
-                    # Clean up paragraph formatting throughout document
-                    for paragraph in doc.paragraphs:
-                        # Remove extra line breaks and clean spacing
-                        if paragraph.text.strip() == '':
-                            # Remove empty paragraphs
-                            p = paragraph._element
-                            p.getparent().remove(p)
-                        else:
-                            # Fix spacing and remove extra whitespace
-                            text = paragraph.text
-                            text = text.replace('  ', ' ')  # Remove double spaces
-                            text = text.replace(' : ', ': ')
-                            text = text.replace(' , ', ', ')
-                            
-                            # Update all runs with cleaned text
-                            if paragraph.runs:
-                                for run in paragraph.runs:
-                                    run.text = text if run == paragraph.runs[0] else ''
-                            
-                            # Set paragraph spacing for better layout
-                            paragraph.paragraph_format.space_before = Pt(3)
-                            paragraph.paragraph_format.space_after = Pt(3)
-                            paragraph.paragraph_format.line_spacing = 1.0
-                    
-                    # Save enhanced document with exact dimensions
-                    doc.save(output_docx)
-                    print(f"   ✓ Tables enhanced with proper borders and spacing", file=sys.stderr)
-                    print(f"   ✓ Text formatting cleaned and optimized", file=sys.stderr)
-                except Exception as e:
-                    print(f"   Note: Could not apply formatting enhancements: {e}", file=sys.stderr)
-                
-                print(f"✅ Word created with exact PDF dimensions:", file=sys.stderr)
-                print(f"   ✓ Page size matches PDF exactly", file=sys.stderr)
-                print(f"   ✓ Text preserved as editable text", file=sys.stderr)
-                print(f"   ✓ Images positioned at exact locations", file=sys.stderr)
-                print(f"   ✓ Tables and layout reconstructed", file=sys.stderr)
-                print(f"   ✓ Professional quality maintained", file=sys.stderr)
-                return True
-            else:
-                print(f"⚠️ pdf2docx created empty file", file=sys.stderr)
-        except Exception as e:
-            print(f"⚠️ pdf2docx failed: {e}", file=sys.stderr)
+            print(f"⚠️ Profiled conversion failed: {e}", file=sys.stderr)
             print(f"   Trying PyMuPDF...", file=sys.stderr)
     
     # FALLBACK: Use PyMuPDF for extraction with coordinate preservation
@@ -842,13 +726,25 @@ def pdf_to_word(pdf_path, output_docx="output.docx"):
                 section.left_margin = Inches(left_margin)
                 section.right_margin = Inches(right_margin)
             
-            for page_num in range(len(pdf_doc)):
+            selected = parse_pages(pages, len(pdf_doc))
+            pages_started = time.monotonic()
+            for position, page_num in enumerate(selected):
                 page = pdf_doc[page_num]
                 
                 print(f"   Processing page {page_num + 1}...", file=sys.stderr)
                 
-                # Extract blocks with their positions
-                blocks = page.get_text("dict")["blocks"]
+                # Extract blocks with their positions; behind the deadline
+                # image blocks are not decoded at all
+                step = deadline.step(position, len(selected), pages_started)
+                if step == MINIMAL:
+                    deadline.degrade(page_num + 1, LEFT_OUT)
+                    continue
+                if step == FULL:
+                    blocks = page.get_text("dict")["blocks"]
+                else:
+                    blocks = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]
+                    if page.get_images():
+                        deadline.degrade(page_num + 1, "text only, images left out")
                 
                 # Filter out empty blocks and collect content
                 content_blocks = []
@@ -875,7 +771,7 @@ def pdf_to_word(pdf_path, output_docx="output.docx"):
                             pass
                 
                 # Only add page break if this page has content and it's not the first page
-                if content_blocks and page_num > 0:
+                if content_blocks and position > 0:
                     doc.add_page_break()
                 
                 # Process content blocks
@@ -912,28 +808,24 @@ def pdf_to_word(pdf_path, output_docx="output.docx"):
                             img_data = base64.b64decode(img_dict) if isinstance(img_dict, str) else img_dict
                             
                             from PIL import Image
-                            import io as io_module
-                            img = Image.open(io_module.BytesIO(img_data))
+                            img = Image.open(io.BytesIO(img_data))
                             
                             # Calculate image dimensions
                             img_width_inch = (bbox[2] - bbox[0]) / 72
                             img_height_inch = (bbox[3] - bbox[1]) / 72
                             
-                            # Save temporarily
-                            temp_img = f"temp_img_{page_num}_{int(bbox[0])}.png"
-                            img.save(temp_img, "PNG")
+                            # Re-encode as PNG in memory
+                            png = io.BytesIO()
+                            img.save(png, "PNG")
+                            png.seek(0)
                             
-                            try:
-                                # Add image without extra spacing
-                                p = doc.add_paragraph()
-                                run = p.add_run()
-                                run.add_picture(temp_img, width=Inches(max(0.5, min(img_width_inch, 7))))
-                                p_format = p.paragraph_format
-                                p_format.space_before = Pt(0)
-                                p_format.space_after = Pt(0)
-                            finally:
-                                if os.path.exists(temp_img):
-                                    os.remove(temp_img)
+                            # Add image without extra spacing
+                            p = doc.add_paragraph()
+                            run = p.add_run()
+                            run.add_picture(png, width=Inches(max(0.5, min(img_width_inch, 7))))
+                            p_format = p.paragraph_format
+                            p_format.space_before = Pt(0)
+                            p_format.space_after = Pt(0)
                         except Exception as e:
                             print(f"   Warning: Could not extract image: {e}", file=sys.stderr)
             
@@ -951,38 +843,31 @@ def pdf_to_word(pdf_path, output_docx="output.docx"):
     
     raise RuntimeError("Word conversion requires pdf2docx or PyMuPDF")
 
-def pdf_to_excel(pdf_path, output_xlsx="output.xlsx"):
-    """Convert PDF to Excel via Word with proper formatting and table structure."""
+def pdf_to_excel(pdf_path, output_xlsx="output.xlsx", pages=None, deadline=None):
+    """Convert PDF to Excel from the pdf2docx layout with proper formatting and table structure.
+    Pages the layout analysis cannot finish before the deadline are read as plain text."""
     
-    print(f"⏳ Converting PDF to Excel (via Word pipeline)...", file=sys.stderr)
+    print(f"⏳ Converting PDF to Excel (via pdf2docx layout)...", file=sys.stderr)
     print(f"   Processing: {pdf_path}", file=sys.stderr)
+    deadline = as_deadline(deadline)
     
-    import tempfile
     import os
     
     try:
-        # Step 1: Convert PDF to Word (.docx)
-        print(f"📝 Step 1: Converting PDF to Word...", file=sys.stderr)
+        # Step 1: pdf2docx layout analysis (shared with the Word conversion via the cache)
+        print(f"📝 Step 1: Analysing PDF layout...", file=sys.stderr)
         
-        temp_docx = tempfile.NamedTemporaryFile(suffix=".docx", delete=False).name
-        success = pdf_to_word_with_hidden_tables(pdf_path, temp_docx)
+        # Scanned pages are OCRed and pictures skipped instead of going through pdf2docx
+        blocks = list(iter_profiled_blocks(pdf_path, select_pages(pdf_path, pages), deadline=deadline))
+        print(f"✓ Layout ready: {len(blocks)} paragraph(s) and table(s)", file=sys.stderr)
         
-        if not success or not os.path.exists(temp_docx):
-            raise RuntimeError("PDF to Word conversion failed")
+        # Step 2: Paragraphs and tables straight from the layout, no .docx round-trip
+        print(f"📊 Step 2: Writing Excel with formatting...", file=sys.stderr)
         
-        print(f"✓ Word document created: {os.path.getsize(temp_docx)} bytes", file=sys.stderr)
-        
-        # Step 2: Convert Word (.docx) to Excel (.xlsx) with formatting
-        print(f"📊 Step 2: Converting Word to Excel with formatting...", file=sys.stderr)
-        
-        from docx import Document
         from openpyxl import Workbook
         from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
         from openpyxl.utils import get_column_letter
         
-        # Load Word document
-        doc = Document(temp_docx)
-        
         # Create Excel workbook
         wb = Workbook()
         ws = wb.active
@@ -1002,84 +887,66 @@ def pdf_to_excel(pdf_path, output_xlsx="output.xlsx"):
         summary_fill = PatternFill(start_color="E8E8E8", end_color="E8E8E8", fill_type="solid")
         
         # Process document content
-        for element in doc.element.body:
+        for block in blocks:
             # Handle paragraphs
-            if element.tag.endswith('p'):
-                para = None
-                for p in doc.paragraphs:
-                    if p._element == element:
-                        para = p
-                        break
+            if block[0] == "text":
+                _, text, bold = block
+                cell = ws.cell(row=excel_row, column=1)
+                cell.value = text
                 
-                if para and para.text.strip():
-                    text = para.text.strip()
-                    cell = ws.cell(row=excel_row, column=1)
-                    cell.value = text
-                    
-                    # Apply formatting to bold text (likely headers/labels)
-                    for run in para.runs:
-                        if run.bold:
-                            cell.font = Font(bold=True, size=11)
-                            break
-                    
-                    excel_row += 1
+                # Apply formatting to bold text (likely headers/labels)
+                if bold:
+                    cell.font = Font(bold=True, size=11)
+                
+                excel_row += 1
             
             # Handle tables
-            elif element.tag.endswith('tbl'):
-                table = None
-                for tbl in doc.tables:
-                    if tbl._element == element:
-                        table = tbl
-                        break
+            else:
+                rows = block[1]
+                num_cols = max(len(row) for row in rows)
+                print(f"   Processing table: {len(rows)} rows, {num_cols} columns", file=sys.stderr)
                 
-                if table and len(table.rows) > 0:
-                    num_cols = len(table.columns)
-                    print(f"   Processing table: {len(table.rows)} rows, {num_cols} columns", file=sys.stderr)
-                    
-                    # Add spacing before table
-                    if excel_row > 1:
-                        excel_row += 1
-                    
-                    # Process each row in the table
-                    for row_idx, table_row in enumerate(table.rows):
-                        for col_idx in range(num_cols):
-                            try:
-                                cell_text = table_row.cells[col_idx].text.strip() if col_idx < len(table_row.cells) else ""
-                            except:
-                                cell_text = ""
-                            
-                            excel_cell = ws.cell(row=excel_row, column=col_idx + 1)
-                            
-                            # Try to parse as number
-                            is_number = False
-                            try:
-                                if cell_text and not any(char.isalpha() for char in cell_text.replace(",", "").replace(" ", "").replace("-", "")):
-                                    numeric_value = float(cell_text.replace(",", "").replace(" ", ""))
-                                    excel_cell.value = numeric_value
-                                    excel_cell.alignment = Alignment(horizontal="right", vertical="center")
-                                    is_number = True
-                            except (ValueError, AttributeError):
-                                pass
-                            
-                            if not is_number:
-                                excel_cell.value = cell_text
-                                excel_cell.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
-                            
-                            # Apply header styling to first row of table
-                            if row_idx == 0:
-                                excel_cell.font = header_font
-                                excel_cell.fill = header_fill
-                            
-                            # Apply borders to all cells
-                            excel_cell.border = thin_border
+                # Add spacing before table
+                if excel_row > 1:
+                    excel_row += 1
+                
+                # Process each row in the table
+                for row_idx, table_row in enumerate(rows):
+                    for col_idx in range(num_cols):
+                        cell_text = table_row[col_idx].strip() if col_idx < len(table_row) else ""
+                        
+                        excel_cell = ws.cell(row=excel_row, column=col_idx + 1)
+                        
+                        # Try to parse as number
+                        is_number = False
+                        try:
+                            if cell_text and not any(char.isalpha() for char in cell_text.replace(",", "").replace(" ", "").replace("-", "")):
+                                numeric_value = float(cell_text.replace(",", "").replace(" ", ""))
+                                excel_cell.value = numeric_value
+                                excel_cell.alignment = Alignment(horizontal="right", vertical="center")
+                                is_number = True
+                        except (ValueError, AttributeError):
+                            pass
                         
-                        excel_row += 1
+                        if not is_number:
+                            excel_cell.value = cell_text
+                            excel_cell.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
+                        
+                        # Apply header styling to first row of table
+                        if row_idx == 0:
+                            excel_cell.font = header_font
+                            excel_cell.fill = header_fill
+                        
+                        # Apply borders to all cells
+                        excel_cell.border = thin_border
                     
-                    # Add spacing after table
                     excel_row += 1
+                
+                # Add spacing after table
+                excel_row += 1
         
-        # Auto-fit column widths based on content
-        for col_num in range(1, ws.max_column + 1):
+        # Auto-fit column widths based on content (skipped when behind the deadline)
+        for col_num in (range(1, ws.max_column + 1) if deadline.optional("column auto-fit") else []):
             max_length = 0
             column = get_column_letter(col_num)
             
@@ -1101,7 +968,7 @@ def pdf_to_excel(pdf_path, output_xlsx="output.xlsx"):
         print(f"   ✓ Headers with gray background", file=sys.stderr)
         print(f"   ✓ Borders and alignment configured", file=sys.stderr)
         print(f"   ✓ Auto-fitted column widths", file=sys.stderr)
-        print(f"   Pipeline: PDF → Word → Excel", file=sys.stderr)
+        print(f"   Pipeline: PDF → pdf2docx layout → Excel", file=sys.stderr)
         
         return True
     
@@ -1110,20 +977,14 @@ def pdf_to_excel(pdf_path, output_xlsx="output.xlsx"):
         import traceback
         traceback.print_exc(file=sys.stderr)
         raise RuntimeError(f"Excel conversion failed: {e}")
-    
-    finally:
-        # Clean up temporary Word file
-        try:
-            if 'temp_docx' in locals() and os.path.exists(temp_docx):
-                os.remove(temp_docx)
-                print(f"   Cleaned up temporary Word file", file=sys.stderr)
-        except:
-            pass
-def pdf_to_ppt(pdf_path, output_pptx="output.pptx"):
-    """Convert PDF to PowerPoint with professional content pagination."""
+def pdf_to_ppt(pdf_path, output_pptx="output.pptx", pages=None, deadline=None):
+    """Convert PDF to PowerPoint with professional content pagination.
+    Pages behind the deadline get their text slides without images, and pages
+    left once it is spent get no slides."""
     
     print(f"⏳ Converting PDF to PowerPoint with professional layout...", file=sys.stderr)
     print(f"   Processing: {pdf_path}", file=sys.stderr)
+    deadline = as_deadline(deadline)
     
     if not HAS_PPTX:
         raise RuntimeError("python-pptx not available")
@@ -1139,7 +1000,8 @@ def pdf_to_ppt(pdf_path, output_pptx="output.pptx"):
         
         # Get PDF dimensions first
         pdf_doc = fitz.open(pdf_path)
-        first_page = pdf_doc[0]
+        indexes = parse_pages(pages, len(pdf_doc))
+        first_page = pdf_doc[indexes[0]]
         pdf_rect = first_page.rect
         pdf_width_inches = pdf_rect.width / 72
         pdf_height_inches = pdf_rect.height / 72
@@ -1166,9 +1028,14 @@ def pdf_to_ppt(pdf_path, output_pptx="output.pptx"):
         
         total_slides_created = 0
         
-        for page_num in range(len(pdf_doc)):
+        pages_started = time.monotonic()
+        for position, page_num in enumerate(indexes):
             page = pdf_doc[page_num]
             print(f"   Processing page {page_num + 1} of {len(pdf_doc)}...", file=sys.stderr)
+            step = deadline.step(position, len(indexes), pages_started)
+            if step == MINIMAL:
+                deadline.degrade(page_num + 1, LEFT_OUT)
+                continue
             
             # Extract all text content from page
             text_dict = page.get_text("dict")
@@ -1195,6 +1062,9 @@ def pdf_to_ppt(pdf_path, output_pptx="output.pptx"):
             
             # Collect all images
             images = page.get_images()
+            if images and step != FULL:
+                deadline.degrade(page_num + 1, f"{len(images)} image(s) left out")
+                images = []
             for img_index, img in enumerate(images):
                 all_images.append((img_index, img))
             
@@ -1303,18 +1173,11 @@ def pdf_to_ppt(pdf_path, output_pptx="output.pptx"):
                         base_image = pdf_doc.extract_image(xref)
                         image_bytes = base_image["image"]
                         
-                        temp_img = f"temp_img_{page_num}_{img_index}.png"
-                        with open(temp_img, "wb") as f:
-                            f.write(image_bytes)
-                        
-                        try:
-                            # Position image at bottom of slide
-                            img_left = Inches(SLIDE_MARGIN_INCHES)
-                            img_top = Inches(CONTENT_HEIGHT - 1)
-                            slide.shapes.add_picture(temp_img, img_left, img_top, width=Inches(CONTENT_WIDTH))
-                        finally:
-                            if os.path.exists(temp_img):
-                                os.remove(temp_img)
+                        # Position image at bottom of slide
+                        img_left = Inches(SLIDE_MARGIN_INCHES)
+                        img_top = Inches(CONTENT_HEIGHT - 1)
+                        slide.shapes.add_picture(io.BytesIO(image_bytes), img_left, img_top,
+                                                 width=Inches(CONTENT_WIDTH))
                     except Exception as e:
                         print(f"   Warning: Could not extract image: {e}", file=sys.stderr)
         
@@ -1339,29 +1202,26 @@ def pdf_to_ppt(pdf_path, output_pptx="output.pptx"):
                 from pptx.util import Inches
                 
                 # Convert PDF pages to images
-                pages = convert_from_path(pdf_path, dpi=150, poppler_path=POPPLER_PATH)
+                page_images = _pdf2image_pages(pdf_path, select_pages(pdf_path, pages), 150)
                 
                 prs = Presentation()
                 prs.slide_width = Inches(10)
                 prs.slide_height = Inches(7.5)
                 
-                for page_num, page_img in enumerate(pages, 1):
+                for page_num, page_img in enumerate(page_images, 1):
                     print(f"   Adding page {page_num} to presentation...", file=sys.stderr)
                     
                     # Add blank slide
                     blank_slide_layout = prs.slide_layouts[6]
                     slide = prs.slides.add_slide(blank_slide_layout)
                     
-                    # Save image temporarily
-                    temp_img = f"temp_ppt_page_{page_num}.png"
-                    page_img.save(temp_img, "PNG")
+                    # Encode the page in memory
+                    png = io.BytesIO()
+                    page_img.save(png, "PNG")
+                    png.seek(0)
                     
-                    try:
-                        # Add image to slide
-                        slide.shapes.add_picture(temp_img, Inches(0), Inches(0), width=Inches(10), height=Inches(7.5))
-                    finally:
-                        if os.path.exists(temp_img):
-                            os.remove(temp_img)
+                    # Add image to slide
+                    slide.shapes.add_picture(png, Inches(0), Inches(0), width=Inches(10), height=Inches(7.5))
                 
                 prs.save(output_pptx)
                 print(f"✅ PowerPoint created with image-based fallback:", file=sys.stderr)
@@ -1374,20 +1234,27 @@ def pdf_to_ppt(pdf_path, output_pptx="output.pptx"):
         else:
             raise RuntimeError(f"PowerPoint conversion failed: {e}")
 
-def pdf_to_html(pdf_path, output_html="output.html"):
-    """Convert PDF to HTML preserving EXACT layout by rendering pages as images."""
+def pdf_to_html(pdf_path, output_html="output.html", pages=None, deadline=None):
+    """Convert PDF to HTML preserving EXACT layout by rendering pages as images.
+    Behind the deadline pages are rendered at a lower resolution, and once it
+    is spent the remaining pages are replaced by a one-line note."""
     
     print(f"⏳ Converting PDF to HTML with pixel-perfect layout...", file=sys.stderr)
     print(f"   Processing: {pdf_path}", file=sys.stderr)
+    deadline = as_deadline(deadline)
     
-    # Use pdf2image if available (best for layout preservation)
-    if HAS_PDF2IMAGE and POPPLER_PATH:
+    # Use pdf2image if available (best for layout preservation); it renders
+    # every page in one call, so a deadline goes through PyMuPDF page by page
+    if HAS_PDF2IMAGE and POPPLER_PATH and not deadline.limited:
         try:
             print(f"🔥 Using pdf2image with Poppler for pixel-perfect conversion...", file=sys.stderr)
             
             # Convert all pages to images (Optimized DPI)
             print(f"   Using optimized DPI (150) for speed...", file=sys.stderr)
-            pages = convert_from_path(pdf_path, dpi=150, poppler_path=POPPLER_PATH)
+            indexes = select_pages(pdf_path, pages)
+            page_images = _pdf2image_pages(pdf_path, indexes, 150)
+            page_numbers = [index + 1 for index in indexes] if indexes else range(1, len(page_images) + 1)
+            total_pages = page_count(pdf_path) if indexes else len(page_images)
             
             # Create HTML with embedded images
             html_content = '''<!DOCTYPE html>
@@ -1448,7 +1315,7 @@ def pdf_to_html(pdf_path, output_html="output.html"):
             import base64
             import io
             
-            for page_num, page_img in enumerate(pages, 1):
+            for page_num, page_img in zip(page_numbers, page_images):
                 print(f"   Processing page {page_num}...", file=sys.stderr)
                 
                 # Convert PIL image to base64
@@ -1458,7 +1325,7 @@ def pdf_to_html(pdf_path, output_html="output.html"):
                 
                 html_content += f'''    <div class="pdf-page">
         <img src="data:image/png;base64,{img_b64}" alt="Page {page_num}" />
-        <div class="page-info">Page {page_num} of {len(pages)}</div>
+        <div class="page-info">Page {page_num} of {total_pages}</div>
     </div>
 '''
             
@@ -1527,6 +1394,11 @@ def pdf_to_html(pdf_path, output_html="output.html"):
             color: #666;
             font-size: 12px;
         }
+        .page-note {
+            padding: 40px;
+            text-align: center;
+            color: #666;
+        }
         @media print {
             body {
                 background: white;
@@ -1545,12 +1417,27 @@ def pdf_to_html(pdf_path, output_html="output.html"):
             
             import base64
             
-            for page_num in range(len(pdf_doc)):
+            selected = parse_pages(pages, len(pdf_doc))
+            pages_started = time.monotonic()
+            for position, page_num in enumerate(selected):
                 page = pdf_doc[page_num]
                 print(f"   Processing page {page_num + 1}...", file=sys.stderr)
+                step = deadline.step(position, len(selected), pages_started)
                 
-                # Render page to image with zoom for better quality
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), alpha=False)  # 2x zoom = ~150 DPI
+                if step == MINIMAL:
+                    deadline.degrade(page_num + 1, LEFT_OUT)
+                    html_content += f'''    <div class="pdf-page">
+        <p class="page-note">{LEFT_OUT_NOTE.format(page=page_num + 1)}</p>
+        <div class="page-info">Page {page_num + 1} of {len(pdf_doc)}</div>
+    </div>
+'''
+                    continue
+                
+                # Render page to image with zoom for better quality (1x when behind the deadline)
+                zoom = 2 if step == FULL else 1
+                if step == REDUCED:
+                    deadline.degrade(page_num + 1, "rendered at 72 DPI")
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)  # 2x zoom = ~150 DPI
                 img_data = pix.tobytes("png")
                 img_b64 = base64.b64encode(img_data).decode('utf-8')
                 
@@ -1664,7 +1551,7 @@ def word_to_excel(docx_path, output_xlsx="output.xlsx"):
         print(f"⚠️ Word to Excel conversion failed: {e}", file=sys.stderr)
         raise RuntimeError(f"Word to Excel conversion failed: {e}")
 
-def pdf_to_excel_via_word(pdf_path, output_xlsx="output.xlsx"):
+def pdf_to_excel_via_word(pdf_path, output_xlsx="output.xlsx", pages=None, deadline=None):
     """Convert PDF to Excel using Word as intermediate format for proper structure.
     
     Pipeline: PDF → Word (with exact page size & margins) → Excel
@@ -1675,24 +1562,17 @@ def pdf_to_excel_via_word(pdf_path, output_xlsx="output.xlsx"):
     print(f"   Processing: {pdf_path}", file=sys.stderr)
     print(f"   Pipeline: PDF → Word (with page size matching) → Excel", file=sys.stderr)
     
-    import tempfile
-    
     try:
-        # Step 1: Convert PDF to Word with exact page size and margins
-        temp_docx = tempfile.NamedTemporaryFile(suffix=".docx", delete=False).name
-        print(f"\n📄 Step 1: Converting PDF to Word with exact page size...", file=sys.stderr)
-        pdf_to_word(pdf_path, temp_docx)
-        
-        # Step 2: Convert Word to Excel
-        print(f"\n📊 Step 2: Converting Word to Excel...", file=sys.stderr)
-        word_to_excel(temp_docx, output_xlsx)
-        
-        # Clean up temporary Word file
-        try:
-            if os.path.exists(temp_docx):
-                os.remove(temp_docx)
-        except:
-            pass
+        # The intermediate Word file lives only as long as the job
+        with job_scratch("excel-via-word", os.path.getsize(pdf_path) * 4) as scratch_dir:
+            # Step 1: Convert PDF to Word with exact page size and margins
+            temp_docx = os.path.join(scratch_dir, "converted.docx")
+            print(f"\n📄 Step 1: Converting PDF to Word with exact page size...", file=sys.stderr)
+            pdf_to_word(pdf_path, temp_docx, pages, deadline)
+            
+            # Step 2: Convert Word to Excel
+            print(f"\n📊 Step 2: Converting Word to Excel...", file=sys.stderr)
+            word_to_excel(temp_docx, output_xlsx)
         
         print(f"\n✅ PDF to Excel conversion completed (via Word):", file=sys.stderr)
         print(f"   ✓ PDF converted to Word with exact dimensions", file=sys.stderr)
@@ -1704,13 +1584,17 @@ def pdf_to_excel_via_word(pdf_path, output_xlsx="output.xlsx"):
         print(f"\n⚠️ PDF to Excel conversion (via Word) failed: {e}", file=sys.stderr)
         raise RuntimeError(f"PDF to Excel via Word conversion failed: {e}")
 
-def pdf_to_text(pdf_path, output_txt="output.txt"):
-    """Extract all text from PDF and save as text file."""
+def pdf_to_text(pdf_path, output_txt="output.txt", pages=None, deadline=None):
+    """Extract all text from PDF and save as text file.
+    Pages behind the deadline are read with PyMuPDF instead of pdfplumber, and
+    pages left once it is spent are left out."""
     
     print(f"⏳ Extracting text from PDF...", file=sys.stderr)
     print(f"   Processing: {pdf_path}", file=sys.stderr)
+    deadline = as_deadline(deadline)
     
-    extracted_text = ""
+    # Pages are written as they are extracted instead of being accumulated
+    has_text = False
     
     # Try with pdfplumber first (best for text extraction)
     if HAS_PDFPLUMBER:
@@ -1718,21 +1602,38 @@ def pdf_to_text(pdf_path, output_txt="output.txt"):
             print(f"🔥 Using pdfplumber for text extraction...", file=sys.stderr)
             import pdfplumber
             
-            with pdfplumber.open(pdf_path) as pdf:
+            with pdfplumber.open(pdf_path) as pdf, open(output_txt, 'w', encoding='utf-8') as f:
                 total_pages = len(pdf.pages)
                 print(f"📄 Total pages: {total_pages}", file=sys.stderr)
                 
-                for page_num, page in enumerate(pdf.pages, 1):
-                    text = page.extract_text()
+                selected = parse_pages(pages, total_pages)
+                fast_doc = None
+                pages_started = time.monotonic()
+                for position, page_index in enumerate(selected):
+                    page_num = page_index + 1
+                    step = deadline.step(position, len(selected), pages_started)
+                    if step == MINIMAL:
+                        deadline.degrade(page_num, LEFT_OUT)
+                        continue
+                    if HAS_PYMUPDF and step == REDUCED:
+                        # PyMuPDF reads a page in a fraction of pdfplumber's time
+                        fast_doc = fast_doc or fitz.open(pdf_path)
+                        text = fast_doc[page_index].get_text()
+                        deadline.degrade(page_num, "PyMuPDF text instead of pdfplumber")
+                    else:
+                        page = pdf.pages[page_index]
+                        text = page.extract_text()
+                        page.close()
                     if text:
-                        extracted_text += f"\n--- Page {page_num} ---\n{text}\n"
+                        f.write(f"\n--- Page {page_num} ---\n{text}\n")
+                        has_text = has_text or bool(text.strip())
                     print(f"   ✓ Extracted text from page {page_num}", file=sys.stderr)
+                if fast_doc:
+                    fast_doc.close()
             
-            if extracted_text.strip():
-                with open(output_txt, 'w', encoding='utf-8') as f:
-                    f.write(extracted_text)
+            if has_text:
                 print(f"✅ Text extraction completed:", file=sys.stderr)
-                print(f"   ✓ Extracted text from {total_pages} pages", file=sys.stderr)
+                print(f"   ✓ Extracted text from {len(selected)} pages", file=sys.stderr)
                 print(f"   ✓ Saved to: {output_txt}", file=sys.stderr)
                 return True
             else:
@@ -1745,25 +1646,31 @@ def pdf_to_text(pdf_path, output_txt="output.txt"):
     if HAS_PYMUPDF:
         try:
             print(f"🔄 Using PyMuPDF for text extraction...", file=sys.stderr)
-            import fitz
             
             pdf_doc = fitz.open(pdf_path)
             total_pages = len(pdf_doc)
             print(f"📄 Total pages: {total_pages}", file=sys.stderr)
             
-            for page_num, page in enumerate(pdf_doc, 1):
-                text = page.get_text()
-                if text:
-                    extracted_text += f"\n--- Page {page_num} ---\n{text}\n"
-                print(f"   ✓ Extracted text from page {page_num}", file=sys.stderr)
+            has_text = False
+            with open(output_txt, 'w', encoding='utf-8') as f:
+                selected = parse_pages(pages, total_pages)
+                pages_started = time.monotonic()
+                for position, page_index in enumerate(selected):
+                    page_num = page_index + 1
+                    if deadline.step(position, len(selected), pages_started) == MINIMAL:
+                        deadline.degrade(page_num, LEFT_OUT)
+                        continue
+                    text = pdf_doc[page_index].get_text()
+                    if text:
+                        f.write(f"\n--- Page {page_num} ---\n{text}\n")
+                        has_text = has_text or bool(text.strip())
+                    print(f"   ✓ Extracted text from page {page_num}", file=sys.stderr)
             
             pdf_doc.close()
             
-            if extracted_text.strip():
-                with open(output_txt, 'w', encoding='utf-8') as f:
-                    f.write(extracted_text)
+            if has_text:
                 print(f"✅ Text extraction completed:", file=sys.stderr)
-                print(f"   ✓ Extracted text from {total_pages} pages", file=sys.stderr)
+                print(f"   ✓ Extracted text from {len(selected)} pages", file=sys.stderr)
                 print(f"   ✓ Saved to: {output_txt}", file=sys.stderr)
                 return True
             else:
@@ -1781,14 +1688,20 @@ def pdf_to_text(pdf_path, output_txt="output.txt"):
 if __name__ == "__main__":
     import sys
     import os
-    if len(sys.argv) < 4:
-        print("Usage: python pdf_convert.py <format> <input_pdf> <output_file>", file=sys.stderr)
-        print("Formats: word, excel, ppt, html, text", file=sys.stderr)
+    pages, argv = pop_pages_argument(sys.argv[1:])
+    try:
+        deadline_seconds, argv = pop_deadline_argument(argv)
+    except ValueError as e:
+        print(f"[Main] {e}", file=sys.stderr)
+        sys.exit(1)
+    if len(argv) < 3:
+        print("Usage: python pdf_convert.py <format> <input_pdf> <output_file> [--pages 1-3,10] [--deadline SECONDS]", file=sys.stderr)
+        print("Formats: word, excel, ppt, html, text, or several comma-separated (zip on stdout)", file=sys.stderr)
         sys.exit(1)
     
-    format_type = sys.argv[1].lower()
-    input_pdf = sys.argv[2]
-    output_file = sys.argv[3]
+    format_type = argv[0].lower()
+    input_pdf = argv[1]
+    output_file = argv[2]
     
     # Log input parameters
     print(f"[Main] Format: {format_type}", file=sys.stderr)
@@ -1796,29 +1709,52 @@ if __name__ == "__main__":
     print(f"[Main] Output file: {output_file}", file=sys.stderr)
     print(f"[Main] CWD: {os.getcwd()}", file=sys.stderr)
     print(f"[Main] Absolute output path: {os.path.abspath(output_file)}", file=sys.stderr)
+    if pages:
+        print(f"[Main] Pages: {pages}", file=sys.stderr)
+    # Started before any work, so the budget covers the whole conversion
+    deadline = as_deadline(deadline_seconds)
+    if deadline.limited:
+        print(f"[Main] Deadline: {deadline.seconds:g}s", file=sys.stderr)
     
+    # Several formats ("word,excel,ppt"): parse once, stream every output as one zip
+    if "," in format_type:
+        from multi_export import export_formats
+        try:
+            export_formats(input_pdf, format_type.split(","), sys.stdout.buffer, pages,
+                           name=os.path.splitext(os.path.basename(output_file))[0], deadline=deadline)
+        except Exception as e:
+            print(f"[Main] EXCEPTION: {str(e)}", file=sys.stderr)
+            import traceback
+            traceback.print_exc(file=sys.stderr)
+            sys.exit(1)
+        deadline.log_report()
+        sys.exit(0)
+
     try:
         if format_type == "word":
             # Check if input is HTML or PDF
             if input_pdf.lower().endswith('.html'):
-                html_to_word(input_pdf, output_file)
+                html_to_word(input_pdf, output_file, deadline)
             else:
                 # Use hybrid approach: pdf2docx layout + hidden tables for pixel-perfect similarity
-                pdf_to_word_with_hidden_tables(input_pdf, output_file)
+                pdf_to_word_with_hidden_tables(input_pdf, output_file, pages, deadline)
         elif format_type == "excel":
             # Use direct PDF to Excel (Fastest)
-            pdf_to_excel(input_pdf, output_file)
+            pdf_to_excel(input_pdf, output_file, pages, deadline)
             # Old pipeline (slow): pdf_to_excel_via_word(input_pdf, output_file)
         elif format_type == "ppt":
-            pdf_to_ppt(input_pdf, output_file)
+            pdf_to_ppt(input_pdf, output_file, pages, deadline)
         elif format_type == "html":
-            pdf_to_html(input_pdf, output_file)
+            pdf_to_html(input_pdf, output_file, pages, deadline)
         elif format_type == "text":
-            pdf_to_text(input_pdf, output_file)
+            pdf_to_text(input_pdf, output_file, pages, deadline)
         else:
             print(f"Unknown format: {format_type}", file=sys.stderr)
             sys.exit(1)
         
+        # Which pages were converted more cheaply to meet the deadline
+        deadline.log_report()
+        
         # After conversion succeeds, read the output file and write to stdout
         print(f"[Main] Conversion completed, reading output file...", file=sys.stderr)
         if os.path.exists(output_file):
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Job Scratch Directories
+Every conversion job gets its own directory for intermediate files, so
+concurrent jobs never share a name and nothing is left in the working
+directory. The directory goes on tmpfs (/dev/shm) when it has room for the
+job, in the system temp directory otherwise, or under SCRATCH_DIR when that
+is set.
+
+Intermediates that a library can read from a stream (python-docx and
+python-pptx pictures) are handed over as BytesIO and never touch a
+directory at all; the scratch directory is for the ones that need a path
+(subprocesses, pdf2docx output, checkpoints).
+
+A directory is removed when its job ends, also on an exception or SIGTERM.
+A job killed outright (SIGKILL) cannot clean up; its directory carries the
+process id and is swept by the next job that finds the process gone.
+
+Usage:
+    with job_scratch("excel-via-word") as scratch_dir:
+        temp_docx = os.path.join(scratch_dir, "converted.docx")
+
+    python scratch.py            # show where scratch directories would go
+    python scratch.py --sweep    # remove directories of dead jobs
+"""
+
+import sys
+import os
+import atexit
+import shutil
+import signal
+import tempfile
+import threading
+import argparse
+from contextlib import contextmanager
+
+SCRATCH_PREFIX = "pdf-editor-job-"
+TMPFS_DIR = "/dev/shm"
+
+# Space a job is assumed to need when the caller gives no estimate
+DEFAULT_SIZE_HINT = 64 * 1024 * 1024
+# tmpfs is memory: leave at least this much of it free for everything else
+TMPFS_HEADROOM = 256 * 1024 * 1024
+
+# Directories of this process not yet removed, for atexit/SIGTERM
+_active = set()
+_swept = set()
+_handlers_installed = False
+
+
+def scratch_root(size_hint=DEFAULT_SIZE_HINT):
+    """Directory new job directories go in: SCRATCH_DIR, tmpfs if the job fits, else the temp dir."""
+    override = os.environ.get("SCRATCH_DIR")
+    if override:
+        os.makedirs(override, exist_ok=True)
+        return override
+    if os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK):
+        try:
+            free = shutil.disk_usage(TMPFS_DIR).free
+        except OSError:
+            free = 0
+        if free >= size_hint + TMPFS_HEADROOM:
+            return TMPFS_DIR
+    return tempfile.gettempdir()
+
+
+def _owner(name):
+    """Process id a job directory name carries, or None."""
+    if not name.startswith(SCRATCH_PREFIX):
+        return None
+    pid = name[len(SCRATCH_PREFIX):].split("-", 1)[0]
+    return int(pid) if pid.isdigit() else None
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def sweep_stale(root):
+    """
+    Remove job directories in root whose process no longer exists
+
+    Returns:
+        Number of directories removed
+    """
+    removed = 0
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return 0
+    for name in names:
+        pid = _owner(name)
+        if pid is None or pid == os.getpid() or _alive(pid):
+            continue
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        removed += 1
+    if removed:
+        print(f"🧹 Removed {removed} scratch director{'y' if removed == 1 else 'ies'} of finished jobs",
+              file=sys.stderr)
+    return removed
+
+
+def _remove(path):
+    shutil.rmtree(path, ignore_errors=True)
+    _active.discard(path)
+
+
+def _remove_all():
+    for path in list(_active):
+        _remove(path)
+
+
+def _on_terminate(signum, frame):
+    # Unwind like an exception so every job_scratch() block cleans up
+    raise SystemExit(128 + signum)
+
+
+def _install_handlers():
+    global _handlers_installed
+    if _handlers_installed:
+        return
+    _handlers_installed = True
+    atexit.register(_remove_all)
+    # Only the main thread may set handlers; leave one the program set alone
+    if (threading.current_thread() is threading.main_thread()
+            and signal.getsignal(signal.SIGTERM) is signal.SIG_DFL):
+        signal.signal(signal.SIGTERM, _on_terminate)
+
+
+@contextmanager
+def job_scratch(label="job", size_hint=DEFAULT_SIZE_HINT):
+    """
+    A private directory for one job's intermediate files, removed with
+    everything in it when the block exits
+
+    Args:
+        label: Short name of the job, part of the directory name
+        size_hint: Bytes the job expects to write (decides whether tmpfs fits)
+    """
+    root = scratch_root(size_hint)
+    if root not in _swept:
+        _swept.add(root)
+        sweep_stale(root)
+    path = tempfile.mkdtemp(prefix=f"{SCRATCH_PREFIX}{os.getpid()}-{label}-", dir=root)
+    _active.add(path)
+    _install_handlers()
+    try:
+        yield path
+    finally:
+        _remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Job scratch directories")
+    parser.add_argument("--sweep", action="store_true", help="Remove directories of jobs that are gone")
+    parser.add_argument("--size-hint", type=int, default=DEFAULT_SIZE_HINT, help="Bytes a job expects to write")
+    args = parser.parse_args()
+
+    root = scratch_root(args.size_hint)
+    if args.sweep:
+        roots = dict.fromkeys(r for r in (os.environ.get("SCRATCH_DIR"), TMPFS_DIR, tempfile.gettempdir())
+                              if r and os.path.isdir(r))
+        removed = sum(sweep_stale(r) for r in roots)
+        print(f"✅ {removed} stale scratch director{'y' if removed == 1 else 'ies'} removed", file=sys.stderr)
+    else:
+        print(root)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+One-pass secure output engine using PyMuPDF
+Applies compression, permissions and AES-128/256 encryption with a single
+open and a single save, instead of a full PyPDF2 read/copy/write for each
+step. encrypt_pdf.py and set_permissions.py delegate here when PyMuPDF is
+available.
+
+Usage:
+    python secure_pdf.py <input_pdf> <output_pdf> [--quality Q] [--mode MODE]
+        [--owner-password PW] [--user-password PW] [--encryption aes-256]
+        [--deny print,copy,modify]
+"""
+
+import sys
+import os
+import argparse
+
+try:
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+    print("Warning: PyMuPDF not available", file=sys.stderr)
+
+ENCRYPTION_METHODS = ("aes-128", "aes-256")
+
+PERMISSION_NAMES = ("print", "copy", "modify")
+
+
+def _encryption_flag(method):
+    return {
+        "aes-128": fitz.PDF_ENCRYPT_AES_128,
+        "aes-256": fitz.PDF_ENCRYPT_AES_256,
+    }[method]
+
+
+def permission_flags(allow_print=True, allow_copy=True, allow_modify=True):
+    """
+    Build the PyMuPDF permission bit mask for the print/copy/modify switches
+    used by set_permissions.py
+    """
+    permissions = 0
+    if allow_print:
+        permissions |= fitz.PDF_PERM_PRINT | fitz.PDF_PERM_PRINT_HQ
+    if allow_copy:
+        permissions |= fitz.PDF_PERM_COPY | fitz.PDF_PERM_ACCESSIBILITY
+    if allow_modify:
+        permissions |= (fitz.PDF_PERM_MODIFY | fitz.PDF_PERM_FORM
+                        | fitz.PDF_PERM_ANNOTATE | fitz.PDF_PERM_ASSEMBLE)
+    return permissions
+
+
+def secure_pdf(input_path, output_path, quality=None, mode="all", user_password="",
+               owner_password=None, permissions=None, encryption="aes-256",
+               target_dpi=None, workers=None, log_prefix="[Secure]"):
+    """
+    Compress, restrict and encrypt a PDF in one open/save cycle
+
+    Args:
+        input_path: Path to the input PDF file
+        output_path: Path to save the output PDF
+        quality: Compression quality 1-100, or None to skip compression
+        mode: compress_pdf.py mode ('all', 'images', 'structure', 'auto')
+        user_password: Password for opening the PDF (can be empty)
+        owner_password: Password for restrictions; None means no encryption
+        permissions: PyMuPDF permission bit mask (all allowed if None)
+        encryption: 'aes-128' or 'aes-256'
+        target_dpi: Target effective image DPI (derived from quality if None)
+        workers: Number of image worker processes (CPU count if None)
+        log_prefix: Prefix for progress lines, so delegating scripts keep theirs
+
+    Returns:
+        Tuple of (success, original_size, output_size)
+    """
+    try:
+        if not HAS_PYMUPDF:
+            print(f"{log_prefix} Error: PyMuPDF is required. Install with: pip install PyMuPDF")
+            return False, 0, 0
+
+        print(f"{log_prefix} Reading PDF from: {input_path}")
+        if not os.path.exists(input_path):
+            print(f"{log_prefix} Error: Input file not found: {input_path}")
+            return False, 0, 0
+        if encryption not in ENCRYPTION_METHODS:
+            print(f"{log_prefix} Error: Unknown encryption method: {encryption}")
+            return False, 0, 0
+        if (user_password or permissions is not None) and not owner_password:
+            print(f"{log_prefix} Error: An owner password is required to encrypt or restrict")
+            return False, 0, 0
+
+        original_size = os.path.getsize(input_path)
+        save_options = {}
+        if owner_password:
+            save_options = {
+                "encryption": _encryption_flag(encryption),
+                "owner_pw": owner_password,
+                "user_pw": user_password or "",
+                "permissions": -1 if permissions is None else permissions,
+            }
+
+        # Imported here so compress_pdf's optional Pillow/PyPDF2 warnings only
+        # appear when compression is actually requested
+        from compress_pdf import (apply_compression, save_document,
+                                  print_structure_report, resolve_mode)
+
+        structure_report = None
+        doc = fitz.open(input_path)
+        try:
+            print(f"{log_prefix} Processing {len(doc)} pages")
+            if quality is not None:
+                mode = resolve_mode(input_path, mode)
+                structure_report = apply_compression(doc, input_path, quality, mode,
+                                                     target_dpi, workers)
+            if owner_password:
+                print(f"{log_prefix} Applying {encryption.upper()} encryption")
+            print(f"{log_prefix} Writing PDF to: {output_path}")
+            save_document(doc, output_path, structure_report is not None, **save_options)
+        finally:
+            doc.close()
+
+        if not os.path.exists(output_path):
+            print(f"{log_prefix} Error: Output file was not created")
+            return False, original_size, 0
+        if structure_report:
+            print_structure_report(structure_report, output_path, owner_password)
+
+        output_size = os.path.getsize(output_path)
+        print(f"{log_prefix} Success! Output PDF created: {output_path}")
+        print(f"{log_prefix} File size: {output_size} bytes")
+        return True, original_size, output_size
+
+    except Exception as e:
+        print(f"{log_prefix} Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False, 0, 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress, restrict and encrypt a PDF in one pass")
+    parser.add_argument("input_pdf", help="Input PDF file")
+    parser.add_argument("output_pdf", help="Output PDF file")
+    parser.add_argument("--quality", type=int, default=None,
+                        help="Compression quality 1-100 (no compression if omitted)")
+    parser.add_argument("--mode", default="all", choices=("all", "images", "structure", "auto"),
+                        help="Compression mode, see compress_pdf.py")
+    parser.add_argument("--owner-password", default=None, help="Owner password (enables encryption)")
+    parser.add_argument("--user-password", default="", help="Password required to open the PDF")
+    parser.add_argument("--encryption", choices=ENCRYPTION_METHODS, default="aes-256")
+    parser.add_argument("--deny", default="",
+                        help="Comma separated permissions to deny: print, copy, modify")
+    parser.add_argument("--dpi", type=int, default=None, help="Target effective image DPI")
+    parser.add_argument("--workers", type=int, default=None, help="Image worker processes")
+    args = parser.parse_args()
+
+    denied = set(name.strip() for name in args.deny.split(",") if name.strip())
+    unknown = denied - set(PERMISSION_NAMES)
+    if unknown:
+        parser.error(f"unknown permission(s): {', '.join(sorted(unknown))}")
+    if not HAS_PYMUPDF:
+        print("[Secure] Error: PyMuPDF is required. Install with: pip install PyMuPDF")
+        sys.exit(1)
+
+    permissions = None
+    if denied:
+        permissions = permission_flags("print" not in denied, "copy" not in denied,
+                                       "modify" not in denied)
+
+    success, original_size, output_size = secure_pdf(
+        args.input_pdf, args.output_pdf, quality=args.quality, mode=args.mode,
+        user_password=args.user_password, owner_password=args.owner_password,
+        permissions=permissions, encryption=args.encryption,
+        target_dpi=args.dpi, workers=args.workers)
+
+    if success:
+        print(f"RESULT:{original_size}:{output_size}")
+    sys.exit(0 if success else 1)
@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 """
-PDF Permissions Script using PyPDF2
-Sets document permissions (print, copy, modify) with owner password protection
+PDF Permissions Script
+Sets document permissions (print, copy, modify) with owner password protection.
+Uses the one-pass PyMuPDF engine in secure_pdf.py and falls back to PyPDF2
+when PyMuPDF is not installed.
 """
 
 import sys
 import os
-from PyPDF2 import PdfReader, PdfWriter
-from PyPDF2.constants import UserAccessPermissions as Permissions
+
+try:
+    from PyPDF2 import PdfReader, PdfWriter
+    from PyPDF2.constants import UserAccessPermissions as Permissions
+    HAS_PYPDF2 = True
+except ImportError:
+    HAS_PYPDF2 = False
+
+from secure_pdf import HAS_PYMUPDF, permission_flags, secure_pdf
 
 def set_permissions(input_path, output_path, owner_password, allow_print, allow_copy, allow_modify):
     """
@@ -24,7 +33,24 @@ def set_permissions(input_path, output_path, owner_password, allow_print, allow_
     Returns:
         True if successful, False otherwise
     """
+    if HAS_PYMUPDF:
+        print(f"[Permissions] Setting permissions:")
+        print(f"  - Print: {'Allowed' if allow_print else 'Denied'}")
+        print(f"  - Copy: {'Allowed' if allow_copy else 'Denied'}")
+        print(f"  - Modify: {'Allowed' if allow_modify else 'Denied'}")
+        success, _, _ = secure_pdf(input_path, output_path, owner_password=owner_password,
+                                   permissions=permission_flags(allow_print, allow_copy, allow_modify),
+                                   log_prefix="[Permissions]")
+        return success
+    return _set_permissions_with_pypdf2(input_path, output_path, owner_password,
+                                        allow_print, allow_copy, allow_modify)
+
+def _set_permissions_with_pypdf2(input_path, output_path, owner_password, allow_print, allow_copy, allow_modify):
+    """Fallback: full PyPDF2 read, page copy and restricted write."""
     try:
+        if not HAS_PYPDF2:
+            raise ImportError("PyPDF2")
+
         print(f"[Permissions] Reading PDF from: {input_path}")
         
         if not os.path.exists(input_path):
@@ -2,26 +2,41 @@
 """
 Simple, fast PDF to Office conversion script
 Outputs binary data directly to stdout for backend streaming
+Only the pages given with --pages (e.g. "1-3,10,40-") are converted
+Every format steps down page by page to finish within --deadline SECONDS
 """
 import sys
 import os
+import time
 
-def pdf_to_word_simple(pdf_path, output_docx):
+from page_selection import (select_pages, parse_pages, page_count, plumber_page_numbers,
+                            pdf2image_runs, format_pages, pop_pages_argument)
+from profiled_convert import LAYOUT_FIDELITY, convert_profiled
+from deadline import FULL, MINIMAL, LEFT_OUT, as_deadline, left_out_note, pop_deadline_argument
+
+# Resolution of PowerPoint slides (pdf2image's default), and of those behind the deadline
+SLIDE_DPI = 200
+REDUCED_SLIDE_DPI = 72
+
+def pdf_to_word_simple(pdf_path, output_docx, pages=None, deadline=None):
     """Simple PDF to Word conversion using pdf2docx with proper page sizing"""
     try:
-        from pdf2docx import Converter
         from docx import Document
         from docx.shared import Inches, Pt
-        import fitz
+        try:
+            import pymupdf as fitz
+        except ImportError:
+            import fitz
         
         print(f"[pdf_to_word] Starting conversion: {pdf_path}", file=sys.stderr)
         print(f"[pdf_to_word] Output: {output_docx}", file=sys.stderr)
         
         # Step 1: Get PDF dimensions
         print(f"[pdf_to_word] Measuring PDF page size...", file=sys.stderr)
+        indexes = select_pages(pdf_path, pages)
         pdf_doc = fitz.open(pdf_path)
         if len(pdf_doc) > 0:
-            page = pdf_doc[0]
+            page = pdf_doc[indexes[0] if indexes else 0]
             rect = page.rect
             # Convert from points to inches (72 points = 1 inch)
             pdf_width_inches = rect.width / 72.0
@@ -33,11 +48,11 @@ def pdf_to_word_simple(pdf_path, output_docx):
             print(f"[pdf_to_word] Using default page size: {pdf_width_inches:.2f}\" x {pdf_height_inches:.2f}\"", file=sys.stderr)
         pdf_doc.close()
         
-        # Step 2: Convert PDF to Word using pdf2docx
-        print(f"[pdf_to_word] Running conversion...", file=sys.stderr)
-        cv = Converter(pdf_path)
-        cv.convert(output_docx, multi_processing=False, cpu_count=1)
-        cv.close()
+        # Step 2: Convert PDF to Word - pdf2docx for text and layout pages,
+        # OCR or a picture for scanned and graphic pages (per-page profile)
+        print(f"[pdf_to_word] Running conversion on pages {format_pages(indexes)}...", file=sys.stderr)
+        summary = convert_profiled(pdf_path, output_docx, indexes, LAYOUT_FIDELITY, deadline)
+        print(f"[pdf_to_word] Engines: {summary['engines']}", file=sys.stderr)
         
         # Step 3: Adjust page size in Word document to match PDF
         print(f"[pdf_to_word] Adjusting page size in Word...", file=sys.stderr)
@@ -77,8 +92,10 @@ def pdf_to_word_simple(pdf_path, output_docx):
         traceback.print_exc(file=sys.stderr)
         return False
 
-def pdf_to_excel_simple(pdf_path, output_xlsx):
-    """Simple PDF to Excel conversion - extracts ALL pages and content"""
+def pdf_to_excel_simple(pdf_path, output_xlsx, pages=None, deadline=None):
+    """Simple PDF to Excel conversion - extracts ALL selected pages and content
+    Pages behind the deadline get their text but no table detection"""
+    deadline = as_deadline(deadline)
     try:
         import pdfplumber
         from openpyxl import Workbook
@@ -93,19 +110,26 @@ def pdf_to_excel_simple(pdf_path, output_xlsx):
         total_sheets_created = 0
         total_tables_found = 0
         
-        with pdfplumber.open(pdf_path) as pdf:
+        indexes = select_pages(pdf_path, pages)
+        with pdfplumber.open(pdf_path, pages=plumber_page_numbers(indexes)) as pdf:
             total_pages = len(pdf.pages)
-            print(f"[pdf_to_excel] PDF has {total_pages} pages total", file=sys.stderr)
+            print(f"[pdf_to_excel] Processing {total_pages} page(s): {format_pages(indexes)}", file=sys.stderr)
             
-            for page_idx in range(total_pages):
-                page = pdf.pages[page_idx]
-                page_number = page_idx + 1
+            pages_started = time.monotonic()
+            for position, page in enumerate(pdf.pages, 1):
+                page_number = page.page_number
                 
-                print(f"[pdf_to_excel] ===== PROCESSING PAGE {page_number}/{total_pages} =====", file=sys.stderr)
+                print(f"[pdf_to_excel] ===== PROCESSING PAGE {page_number} ({position}/{total_pages}) =====", file=sys.stderr)
+                step = deadline.step(position - 1, total_pages, pages_started)
+                if step == MINIMAL:
+                    deadline.degrade(page_number, LEFT_OUT)
+                    continue
                 
-                # Try to extract tables
+                # Try to extract tables (the slow part, skipped when behind the deadline)
                 try:
-                    tables = page.extract_tables()
+                    if step != FULL:
+                        deadline.degrade(page_number, "text only, tables left out")
+                    tables = page.extract_tables() if step == FULL else None
                     print(f"[pdf_to_excel] page.extract_tables() returned: {len(tables) if tables else 0} tables", file=sys.stderr)
                 except Exception as e:
                     print(f"[pdf_to_excel] Error extracting tables from page {page_number}: {e}", file=sys.stderr)
@@ -174,8 +198,10 @@ def pdf_to_excel_simple(pdf_path, output_xlsx):
         traceback.print_exc(file=sys.stderr)
         return False
 
-def pdf_to_ppt_simple(pdf_path, output_pptx):
-    """Simple PDF to PowerPoint conversion"""
+def pdf_to_ppt_simple(pdf_path, output_pptx, pages=None, deadline=None):
+    """Simple PDF to PowerPoint conversion
+    Pages behind the deadline are rendered at a lower resolution, and left out once it is spent"""
+    deadline = as_deadline(deadline)
     try:
         from pdf2image import convert_from_path
         from pptx import Presentation
@@ -203,11 +229,29 @@ def pdf_to_ppt_simple(pdf_path, output_pptx):
             except:
                 pass
         
-        pages = convert_from_path(pdf_path, poppler_path=poppler_path)
+        # One pdftoppm call per contiguous run of selected pages; with a
+        # deadline one per page, so each is rendered as the time left allows
+        if deadline.limited:
+            runs = [(index + 1, index + 1) for index in parse_pages(pages, page_count(pdf_path))]
+        else:
+            runs = pdf2image_runs(select_pages(pdf_path, pages))
+        page_images = []
+        pages_started = time.monotonic()
+        for position, (first_page, last_page) in enumerate(runs):
+            # Without a limit every run is FULL; with one every run is a single page
+            step = deadline.step(position, len(runs), pages_started)
+            if step == MINIMAL:
+                deadline.degrade(first_page, LEFT_OUT)
+                continue
+            if step != FULL:
+                deadline.degrade(first_page, f"rendered at {REDUCED_SLIDE_DPI} DPI")
+            page_images.extend(convert_from_path(pdf_path, poppler_path=poppler_path,
+                                                 dpi=SLIDE_DPI if step == FULL else REDUCED_SLIDE_DPI,
+                                                 first_page=first_page, last_page=last_page))
         
-        print(f"[pdf_to_ppt] Converting {len(pages)} pages to PowerPoint...", file=sys.stderr)
+        print(f"[pdf_to_ppt] Converting {len(page_images)} pages to PowerPoint...", file=sys.stderr)
         
-        for idx, page_image in enumerate(pages, 1):
+        for idx, page_image in enumerate(page_images, 1):
             # Save image to bytes
             img_byte_arr = io.BytesIO()
             page_image.save(img_byte_arr, format='PNG')
@@ -219,7 +263,7 @@ def pdf_to_ppt_simple(pdf_path, output_pptx):
             top = Inches(0)
             pic = slide.shapes.add_picture(img_byte_arr, left, top, width=prs.slide_width, height=prs.slide_height)
             
-            print(f"[pdf_to_ppt] Added page {idx}/{len(pages)}", file=sys.stderr)
+            print(f"[pdf_to_ppt] Added page {idx}/{len(page_images)}", file=sys.stderr)
         
         prs.save(output_pptx)
         
@@ -236,8 +280,10 @@ def pdf_to_ppt_simple(pdf_path, output_pptx):
         traceback.print_exc(file=sys.stderr)
         return False
 
-def pdf_to_html_simple(pdf_path, output_html):
-    """Simple PDF to HTML conversion"""
+def pdf_to_html_simple(pdf_path, output_html, pages=None, deadline=None):
+    """Simple PDF to HTML conversion
+    Pages behind the deadline get their text but no table detection"""
+    deadline = as_deadline(deadline)
     try:
         import pdfplumber
         
@@ -246,17 +292,26 @@ def pdf_to_html_simple(pdf_path, output_html):
         
         html_content = '<html><head><meta charset="utf-8"><title>PDF to HTML</title></head><body>'
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
+        with pdfplumber.open(pdf_path, pages=plumber_page_numbers(select_pages(pdf_path, pages))) as pdf:
+            pages_started = time.monotonic()
+            for position, page in enumerate(pdf.pages):
+                page_num = page.page_number
                 html_content += f'<h2>Page {page_num}</h2>'
+                step = deadline.step(position, len(pdf.pages), pages_started)
+                if step == MINIMAL:
+                    deadline.degrade(page_num, LEFT_OUT)
+                    html_content += f'<p>{left_out_note([page_num - 1])}</p>'
+                    continue
                 
                 # Extract text
                 text = page.extract_text()
                 if text:
                     html_content += f'<p>{text.replace(chr(10), "<br>")}</p>'
                 
-                # Extract tables
-                tables = page.extract_tables()
+                # Extract tables (skipped when behind the deadline)
+                if step != FULL:
+                    deadline.degrade(page_num, "text only, tables left out")
+                tables = page.extract_tables() if step == FULL else None
                 if tables:
                     for table in tables:
                         html_content += '<table border="1">'
@@ -286,33 +341,44 @@ def pdf_to_html_simple(pdf_path, output_html):
         return False
 
 if __name__ == "__main__":
-    if len(sys.argv) < 4:
-        print("Usage: python simple_pdf_converter.py <format> <input_pdf> <output_file>", file=sys.stderr)
+    pages, argv = pop_pages_argument(sys.argv[1:])
+    try:
+        deadline_seconds, argv = pop_deadline_argument(argv)
+    except ValueError as e:
+        print(f"[Main] {e}", file=sys.stderr)
+        sys.exit(1)
+    if len(argv) < 3:
+        print("Usage: python simple_pdf_converter.py <format> <input_pdf> <output_file> [--pages 1-3,10] [--deadline SECONDS]", file=sys.stderr)
         print("Formats: word, excel, ppt, html", file=sys.stderr)
         sys.exit(1)
     
-    format_type = sys.argv[1].lower()
-    input_pdf = sys.argv[2]
-    output_file = sys.argv[3]
+    format_type = argv[0].lower()
+    input_pdf = argv[1]
+    output_file = argv[2]
     
     print(f"[Main] Format: {format_type}", file=sys.stderr)
     print(f"[Main] Input: {input_pdf}", file=sys.stderr)
     print(f"[Main] Output: {output_file}", file=sys.stderr)
+    if pages:
+        print(f"[Main] Pages: {pages}", file=sys.stderr)
+    deadline = as_deadline(deadline_seconds)
     
     try:
         success = False
         
         if format_type == "word":
-            success = pdf_to_word_simple(input_pdf, output_file)
+            success = pdf_to_word_simple(input_pdf, output_file, pages, deadline)
         elif format_type == "excel":
-            success = pdf_to_excel_simple(input_pdf, output_file)
+            success = pdf_to_excel_simple(input_pdf, output_file, pages, deadline)
         elif format_type == "ppt":
-            success = pdf_to_ppt_simple(input_pdf, output_file)
+            success = pdf_to_ppt_simple(input_pdf, output_file, pages, deadline)
         elif format_type == "html":
-            success = pdf_to_html_simple(input_pdf, output_file)
+            success = pdf_to_html_simple(input_pdf, output_file, pages, deadline)
         else:
             print(f"[Main] Unknown format: {format_type}", file=sys.stderr)
             sys.exit(1)
+        # Which pages were converted more cheaply to meet the deadline
+        deadline.log_report()
         
         if success:
             # Read and output file to stdout
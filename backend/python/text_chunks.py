@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Structure-Aware Text Chunking
+Splits a PDF into chunks that fit a token budget, for agents that only need
+part of a document. Built on the pdf_to_text.py extraction:
+- headings and paragraphs come from PyMuPDF text blocks, with headings found
+  by font size relative to the document's body text
+- tables found by PyMuPDF are serialised one row per line
+- pages whose text layer looks broken fall back to pdfplumber
+
+Every chunk lists the pages and block bounding boxes it came from, and a
+cursor to resume after it. The cursor is self-contained, so a document can
+be walked a few chunks at a time without keeping anything in memory
+between calls; only the pages being read are processed.
+
+Usage (NDJSON, one chunk per line):
+    python text_chunks.py <input_pdf> [--max-tokens 800] [--cursor C] [--limit N]
+"""
+
+import sys
+import os
+import json
+import math
+import base64
+import argparse
+from collections import Counter
+
+from pdf_to_text import HAS_PDFPLUMBER, HAS_PYMUPDF, _needs_fallback, _LazyPlumber
+
+if HAS_PYMUPDF:
+    from pdf_to_text import fitz
+    # find_tables prints a package recommendation to stdout in newer PyMuPDF,
+    # which would corrupt the NDJSON stream
+    if hasattr(fitz, "no_recommend_layout"):
+        fitz.no_recommend_layout()
+
+# Token counts are estimated from characters; close enough for English
+# prose with common tokenizers and needs no extra dependency
+CHARS_PER_TOKEN = 4
+DEFAULT_MAX_TOKENS = 800
+MIN_MAX_TOKENS = 50
+
+# A heading starts a new chunk once the current one is at least this full
+MIN_CHUNK_FILL = 0.5
+
+CHUNK_SEPARATOR = "\n\n"
+
+# Blocks set this much larger than body text (or bold at body size and
+# short) are headings
+HEADING_SIZE_RATIO = 1.15
+MAX_HEADING_CHARS = 200
+MAX_HEADING_LINES = 3
+
+# Pages sampled, evenly spread, to find the body font size
+BODY_SIZE_SAMPLE_PAGES = 12
+
+CURSOR_VERSION = 1
+
+_BOLD_FLAG = 16
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def encode_cursor(state):
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if state.get("v") != CURSOR_VERSION:
+        raise ValueError("Cursor is from an incompatible version")
+    return state
+
+
+def _file_signature(pdf_path):
+    stat = os.stat(pdf_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def body_font_size(doc):
+    """Most common font size, weighted by characters, over a page sample."""
+    step = max(1, len(doc) // BODY_SIZE_SAMPLE_PAGES)
+    sizes = Counter()
+    for index in range(0, len(doc), step):
+        for block in doc[index].get_text("dict")["blocks"]:
+            for line in block.get("lines", ()):
+                for span in line["spans"]:
+                    sizes[round(span["size"], 1)] += len(span["text"].strip())
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+def _rect(bbox):
+    return [round(value, 1) for value in bbox]
+
+
+def _inside(bbox, area):
+    """True if the centre of bbox lies within area."""
+    x = (bbox[0] + bbox[2]) / 2
+    y = (bbox[1] + bbox[3]) / 2
+    return area[0] <= x <= area[2] and area[1] <= y <= area[3]
+
+
+def _block_text(block):
+    """Reflow a text block's lines into one paragraph."""
+    text = ""
+    for line in block["lines"]:
+        line_text = "".join(span["text"] for span in line["spans"]).strip()
+        if not line_text:
+            continue
+        if text.endswith("-") and line_text[:1].islower():
+            text = text[:-1] + line_text
+        else:
+            text = f"{text} {line_text}" if text else line_text
+    return text
+
+
+def _is_heading(block, text, body_size):
+    if not body_size or len(text) > MAX_HEADING_CHARS or len(block["lines"]) > MAX_HEADING_LINES:
+        return False
+    spans = [span for line in block["lines"] for span in line["spans"] if span["text"].strip()]
+    size = max(span["size"] for span in spans)
+    if size >= body_size * HEADING_SIZE_RATIO:
+        return True
+    bold = all(span["flags"] & _BOLD_FLAG for span in spans)
+    return bold and size >= body_size and not text.endswith((".", ",", ";", ":"))
+
+
+def _table_rows(table):
+    rows = []
+    for row in table.extract():
+        cells = [" ".join((cell or "").split()) for cell in row]
+        if any(cells):
+            rows.append(" | ".join(cells))
+    return rows
+
+
+def page_elements(doc, pdf_path, index, body_size, tables=True, plumber=None):
+    """
+    Headings, paragraphs and tables of one page in reading order, as dicts
+    with kind, text, page and bbox (tables also have rows); plumber is an
+    open pdf_to_text._LazyPlumber for broken text layers (one is opened for
+    this page if None)
+    """
+    page = doc[index]
+    page_num = index + 1
+    textpage = page.get_textpage()
+    text = page.get_text(textpage=textpage)
+
+    if HAS_PDFPLUMBER and _needs_fallback(page, textpage, text):
+        # Broken text layer: pdfplumber text, without usable block positions
+        try:
+            if plumber is None:
+                with _LazyPlumber(pdf_path) as own:
+                    fallback_text = own.page_text(index)
+            else:
+                fallback_text = plumber.page_text(index)
+        except Exception:
+            fallback_text = ""
+        if len(fallback_text.strip()) >= len(text.strip()) // 2:
+            paragraphs = [p.strip() for p in fallback_text.split("\n\n") if p.strip()]
+            return [{"kind": "paragraph", "text": " ".join(p.split()), "page": page_num,
+                     "bbox": _rect(page.rect)} for p in paragraphs]
+
+    found = []
+    if tables and hasattr(page, "find_tables"):
+        try:
+            found = [table for table in page.find_tables().tables if table.row_count]
+        except Exception as e:
+            print(f"[Chunks] Table detection failed on page {page_num}: {e}", file=sys.stderr)
+
+    elements = []
+    placed = set()
+    for block in page.get_text("dict", textpage=textpage)["blocks"]:
+        if block["type"] != 0:
+            continue
+        in_table = next((i for i, table in enumerate(found) if _inside(block["bbox"], table.bbox)), None)
+        if in_table is not None:
+            # The table takes the place of its first text block
+            if in_table not in placed:
+                placed.add(in_table)
+                elements.append(_table_element(found[in_table], page_num))
+            continue
+        block_text = _block_text(block)
+        if not block_text:
+            continue
+        kind = "heading" if _is_heading(block, block_text, body_size) else "paragraph"
+        elements.append({"kind": kind, "text": block_text, "page": page_num, "bbox": _rect(block["bbox"])})
+
+    for i, table in enumerate(found):
+        if i not in placed:
+            elements.append(_table_element(table, page_num))
+    return [element for element in elements if element["text"]]
+
+
+def _table_element(table, page_num):
+    rows = _table_rows(table)
+    return {"kind": "table", "text": "\n".join(rows), "rows": rows, "page": page_num,
+            "bbox": _rect(table.bbox)}
+
+
+def _split_text(text, max_chars):
+    """Split text at sentence ends, else at spaces, into parts of at most max_chars."""
+    parts = []
+    while len(text) > max_chars:
+        cut = max(text.rfind(". ", 0, max_chars), text.rfind("? ", 0, max_chars),
+                  text.rfind("! ", 0, max_chars))
+        if cut > max_chars // 2:
+            cut += 1
+        else:
+            cut = text.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+        parts.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        parts.append(text)
+    return parts
+
+
+def split_element(element, max_tokens):
+    """
+    Cut an element that is over budget into pieces that fit. Table pieces
+    repeat the first (header) row.
+    """
+    if estimate_tokens(element["text"]) <= max_tokens:
+        return [element]
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if element["kind"] != "table" or len(element["rows"]) < 2:
+        return [{**element, "text": part}
+                for part in _split_text(element["text"], max_chars)]
+
+    header = element["rows"][0]
+    room = max(max_chars - len(header) - 1, max_chars // 2)
+    rows = []
+    for row in element["rows"][1:]:
+        rows.extend(_split_text(row, room) if len(row) > room else [row])
+
+    pieces, current, length = [], [], 0
+    for row in rows:
+        if current and length + len(row) + 1 > room:
+            pieces.append(current)
+            current, length = [], 0
+        current.append(row)
+        length += len(row) + 1
+    pieces.append(current)
+    return [{**element, "rows": [header] + part, "text": "\n".join([header] + part)} for part in pieces]
+
+
+def iter_chunks(pdf_path, max_tokens=DEFAULT_MAX_TOKENS, cursor=None, tables=True):
+    """
+    Yield chunks of at most max_tokens (estimated), starting at cursor:
+    {"text", "tokens", "pages", "section", "refs", "cursor"}, where refs
+    holds the page, bbox and kind of every piece and cursor resumes after
+    the chunk (None after the last one).
+    """
+    state = decode_cursor(cursor) if cursor else None
+    signature = _file_signature(pdf_path)
+    if state:
+        if state["f"] != signature:
+            raise ValueError("The document changed since the cursor was issued")
+        max_tokens = state["t"]
+    max_tokens = max(MIN_MAX_TOKENS, int(max_tokens))
+
+    with fitz.open(pdf_path) as doc, _LazyPlumber(pdf_path) as plumber:
+        if doc.needs_pass:
+            raise ValueError("PDF is encrypted - cannot extract text")
+        body_size = state["b"] if state else body_font_size(doc)
+        page_index, piece_index = (state["p"], state["i"]) if state else (0, 0)
+        section = state["h"] if state else None
+
+        def position(page, piece, heading):
+            return encode_cursor({"v": CURSOR_VERSION, "f": signature, "t": max_tokens,
+                                  "b": body_size, "p": page, "i": piece, "h": heading})
+
+        chunk = []
+        chunk_section = section
+        for index in range(page_index, len(doc)):
+            pieces = [piece for element in page_elements(doc, pdf_path, index, body_size, tables, plumber)
+                      for piece in split_element(element, max_tokens)]
+            start = piece_index if index == page_index else 0
+            for i in range(start, len(pieces)):
+                piece = {**pieces[i], "_pos": (index, i)}
+                heading_break = (piece["kind"] == "heading"
+                                 and _tokens(chunk) >= max_tokens * MIN_CHUNK_FILL)
+                if chunk and (heading_break or _tokens(chunk + [piece]) > max_tokens):
+                    # Move trailing headings to the next chunk, if they fit there
+                    carried = []
+                    while len(chunk) > 1 and chunk[-1]["kind"] == "heading":
+                        carried.insert(0, chunk.pop())
+                    if carried and _tokens(carried + [piece]) > max_tokens:
+                        chunk += carried
+                        carried = []
+                    resume_page, resume_piece = carried[0]["_pos"] if carried else (index, i)
+                    next_section = _section_after(chunk, chunk_section)
+                    yield _make_chunk(chunk, chunk_section,
+                                      position(resume_page, resume_piece, next_section))
+                    chunk_section = next_section
+                    chunk = carried
+                chunk.append(piece)
+        if chunk:
+            yield _make_chunk(chunk, chunk_section, None)
+
+
+def _tokens(pieces):
+    """Estimated tokens of pieces joined into one chunk."""
+    return estimate_tokens(CHUNK_SEPARATOR.join(piece["text"] for piece in pieces))
+
+
+def _section_after(pieces, section):
+    """Heading in effect after the given pieces."""
+    for piece in pieces:
+        if piece["kind"] == "heading":
+            section = piece["text"]
+    return section
+
+
+def _make_chunk(pieces, section, cursor):
+    if pieces[0]["kind"] == "heading":
+        section = pieces[0]["text"]
+    text = CHUNK_SEPARATOR.join(piece["text"] for piece in pieces)
+    return {
+        "text": text,
+        "tokens": estimate_tokens(text),
+        "pages": [pieces[0]["page"], pieces[-1]["page"]],
+        "section": section,
+        "refs": [{"page": piece["page"], "bbox": piece["bbox"], "kind": piece["kind"]}
+                 for piece in pieces],
+        "cursor": cursor,
+    }
+
+
+def read_chunks(pdf_path, max_tokens=DEFAULT_MAX_TOKENS, cursor=None, limit=10, tables=True):
+    """
+    Return up to limit chunks starting at cursor
+
+    Returns:
+        Dict with total_pages, chunks and next_cursor (None at the end)
+    """
+    chunks = []
+    next_cursor = None
+    for chunk in iter_chunks(pdf_path, max_tokens, cursor, tables):
+        chunks.append(chunk)
+        next_cursor = chunk["cursor"]
+        if len(chunks) >= limit:
+            break
+    with fitz.open(pdf_path) as doc:
+        total_pages = len(doc)
+    return {"total_pages": total_pages, "chunks": chunks, "next_cursor": next_cursor}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split a PDF into token-budgeted chunks")
+    parser.add_argument("input_pdf", help="Input PDF file")
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS,
+                        help="Estimated tokens per chunk")
+    parser.add_argument("--cursor", default=None, help="Resume after a previous chunk")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many chunks")
+    parser.add_argument("--no-tables", action="store_true", help="Skip table detection")
+    args = parser.parse_args()
+    if not HAS_PYMUPDF:
+        print("[Chunks] Error: PyMuPDF is required. Install with: pip install PyMuPDF", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        count = 0
+        for chunk in iter_chunks(args.input_pdf, args.max_tokens, args.cursor, not args.no_tables):
+            sys.stdout.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+            count += 1
+            if args.limit and count >= args.limit:
+                break
+        print(f"[Chunks] {count} chunk(s)", file=sys.stderr)
+    except Exception as e:
+        print(f"[Chunks] Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(0)
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Persistent Full-Text Index
+Builds an on-disk inverted index over the text of uploaded PDFs, using the
+pdf_to_text.py extractors, and answers term, prefix (foo*) and phrase
+("net 30 days") queries across all indexed documents.
+
+Everything lives in a single SQLite file inside the index directory, so no
+external search service is needed. Each (term, document) pair has one
+postings block: the (page, token position, character offset) triples of
+every occurrence, delta/varint encoded and zlib compressed. Terms are the
+table's primary key, so prefix queries are a range scan.
+
+Documents are keyed by name (the upload file name by default). Re-adding a
+document with unchanged content is a no-op; changed content replaces its
+postings, so the index can be updated incrementally as uploads arrive.
+
+Usage:
+    python text_index.py add <index_dir> <pdf>... [--name NAME] [--workers N]
+    python text_index.py search <index_dir> <query> [--limit N]
+    python text_index.py remove <index_dir> <name>
+    python text_index.py stats <index_dir>
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import argparse
+
+INDEX_FILENAME = "text_index.sqlite"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+# Upper bound for the prefix range scan; sorts after any real term character
+_PREFIX_SENTINEL = "\U0010ffff"
+
+# Limits the number of terms a short prefix such as 'a*' can expand to
+MAX_PREFIX_TERMS = 500
+
+# Occurrence offsets reported per page in search results
+MAX_OFFSETS_PER_PAGE = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    path TEXT,
+    digest TEXT NOT NULL,
+    pages INTEGER NOT NULL,
+    tokens INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    hits INTEGER NOT NULL,
+    block BLOB NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+"""
+
+
+def tokenize(text):
+    """Yield (position, term, char_offset) for every word of a page."""
+    for position, match in enumerate(_TOKEN_RE.finditer(text)):
+        yield position, match.group().lower(), match.start()
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_postings(postings):
+    """
+    Compress a sorted list of (page, position, offset) triples. Pages are
+    delta encoded; positions and offsets are delta encoded within a page.
+    """
+    out = bytearray()
+    _write_varint(out, len(postings))
+    prev_page = prev_position = prev_offset = 0
+    for page, position, offset in postings:
+        if page != prev_page:
+            prev_position = prev_offset = 0
+        _write_varint(out, page - prev_page)
+        _write_varint(out, position - prev_position)
+        _write_varint(out, offset - prev_offset)
+        prev_page, prev_position, prev_offset = page, position, offset
+    return zlib.compress(bytes(out))
+
+
+def decode_postings(block):
+    """Inverse of encode_postings."""
+    data = zlib.decompress(block)
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+
+    postings = []
+    page = position = offset = 0
+    for i in range(1, 1 + 3 * values[0], 3):
+        page_delta, position_delta, offset_delta = values[i:i + 3]
+        if page_delta:
+            page += page_delta
+            position = offset = 0
+        position += position_delta
+        offset += offset_delta
+        postings.append((page, position, offset))
+    return postings
+
+
+def open_index(index_dir):
+    """Open (creating if needed) the index database in index_dir."""
+    os.makedirs(index_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(index_dir, INDEX_FILENAME))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def index_document(conn, pdf_path, name=None, workers=None):
+    """
+    Add or update one PDF in the index
+
+    Args:
+        conn: Connection from open_index
+        pdf_path: PDF to extract and index
+        name: Document key (file name if None)
+        workers: PyMuPDF worker processes for extraction
+
+    Returns:
+        Dict describing the outcome ('indexed' or 'unchanged')
+    """
+    from pdf_to_text import iter_pages
+
+    started = time.perf_counter()
+    name = name or os.path.basename(pdf_path)
+    digest = file_digest(pdf_path)
+
+    row = conn.execute("SELECT digest FROM documents WHERE name = ?", (name,)).fetchone()
+    if row and row[0] == digest:
+        return {"document": name, "status": "unchanged"}
+
+    terms = {}
+    pages = tokens = 0
+    for record in iter_pages(pdf_path, workers):
+        pages += 1
+        for position, term, offset in tokenize(record["text"]):
+            terms.setdefault(term, []).append((record["page"], position, offset))
+            tokens += 1
+
+    # The old rows go in the same transaction, so a failed insert keeps them
+    with conn:
+        if row:
+            _delete_rows(conn, name)
+        cursor = conn.execute(
+            "INSERT INTO documents (name, path, digest, pages, tokens, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (name, os.path.abspath(pdf_path), digest, pages, tokens, time.time()))
+        doc_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO postings (term, doc_id, hits, block) VALUES (?, ?, ?, ?)",
+            ((term, doc_id, len(postings), encode_postings(postings))
+             for term, postings in terms.items()))
+
+    return {
+        "document": name,
+        "status": "indexed",
+        "pages": pages,
+        "tokens": tokens,
+        "terms": len(terms),
+        "elapsed_ms": int((time.perf_counter() - started) * 1000),
+    }
+
+
+def _delete_rows(conn, name):
+    """Delete a document's rows in the caller's transaction, without committing."""
+    row = conn.execute("SELECT id FROM documents WHERE name = ?", (name,)).fetchone()
+    if not row:
+        return False
+    conn.execute("DELETE FROM postings WHERE doc_id = ?", row)
+    conn.execute("DELETE FROM documents WHERE id = ?", row)
+    return True
+
+
+def remove_document(conn, name):
+    """Drop a document and its postings. Returns True if it was indexed."""
+    with conn:
+        return _delete_rows(conn, name)
+
+
+def parse_query(query):
+    """
+    Split a query into clauses, each a list of word patterns. Quoted text is
+    a phrase; a trailing '*' makes a word a prefix pattern.
+    """
+    clauses = []
+    for phrase, word in _QUERY_RE.findall(query):
+        words = []
+        for raw in (phrase or word).split():
+            terms = [term for _, term, _ in tokenize(raw)]
+            words.extend((term, False) for term in terms)
+            if terms and raw.endswith("*"):
+                words[-1] = (terms[-1], True)
+        if words:
+            clauses.append(words)
+    return clauses
+
+
+def _expand(conn, term, is_prefix):
+    """Return the indexed terms a word pattern stands for."""
+    if not is_prefix:
+        return [term]
+    return [row[0] for row in conn.execute(
+        "SELECT DISTINCT term FROM postings WHERE term >= ? AND term < ? LIMIT ?",
+        (term, term + _PREFIX_SENTINEL, MAX_PREFIX_TERMS))]
+
+
+def _doc_ids(conn, terms):
+    """Documents containing any of the terms, read without decoding postings."""
+    ids = set()
+    for term in terms:
+        ids.update(row[0] for row in conn.execute(
+            "SELECT doc_id FROM postings WHERE term = ?", (term,)))
+    return ids
+
+
+def _postings(conn, terms, doc_ids):
+    """Return {doc_id: set of (page, position, offset)} limited to doc_ids."""
+    result = {}
+    for term in terms:
+        for doc_id, block in conn.execute(
+                "SELECT doc_id, block FROM postings WHERE term = ?", (term,)):
+            if doc_id in doc_ids:
+                result.setdefault(doc_id, set()).update(decode_postings(block))
+    return result
+
+
+def _clause_matches(conn, expanded, doc_ids):
+    """Return {doc_id: sorted list of (page, offset)} where a clause matches."""
+    first = _postings(conn, expanded[0], doc_ids)
+    if len(expanded) == 1:
+        return {doc_id: sorted((page, offset) for page, _, offset in hits)
+                for doc_id, hits in first.items()}
+
+    # Phrase: every following word must appear at the next token position
+    following = []
+    for terms in expanded[1:]:
+        following.append({doc_id: {(page, position) for page, position, _ in hits}
+                          for doc_id, hits in _postings(conn, terms, doc_ids).items()})
+
+    matches = {}
+    for doc_id, hits in first.items():
+        found = [(page, offset) for page, position, offset in hits
+                 if all((page, position + i) in positions.get(doc_id, ())
+                        for i, positions in enumerate(following, 1))]
+        if found:
+            matches[doc_id] = sorted(found)
+    return matches
+
+
+def search(conn, query, limit=20):
+    """
+    Find documents matching every clause of a query
+
+    Returns:
+        Dict with the ranked results: per document the total hit count and
+        the matching pages with character offsets of each occurrence
+    """
+    started = time.perf_counter()
+    clauses = [[_expand(conn, term, is_prefix) for term, is_prefix in words]
+               for words in parse_query(query)]
+
+    # Narrow to documents containing every word before any block is decoded
+    doc_ids = None
+    for terms in (terms for expanded in clauses for terms in expanded):
+        ids = _doc_ids(conn, terms)
+        doc_ids = ids if doc_ids is None else doc_ids & ids
+        if not doc_ids:
+            break
+
+    per_clause = []
+    for expanded in clauses:
+        if not doc_ids:
+            break
+        matches = _clause_matches(conn, expanded, doc_ids)
+        doc_ids &= set(matches)
+        per_clause.append(matches)
+
+    results = []
+    for doc_id in doc_ids or ():
+        pages = {}
+        for matches in per_clause:
+            for page, offset in matches[doc_id]:
+                pages.setdefault(page, []).append(offset)
+        name, path = conn.execute("SELECT name, path FROM documents WHERE id = ?",
+                                  (doc_id,)).fetchone()
+        results.append({
+            "document": name,
+            "path": path,
+            "hits": sum(len(offsets) for offsets in pages.values()),
+            "pages": [{"page": page, "offsets": sorted(offsets)[:MAX_OFFSETS_PER_PAGE]}
+                      for page, offsets in sorted(pages.items())],
+        })
+
+    results.sort(key=lambda r: (-r["hits"], r["document"]))
+    return {
+        "query": query,
+        "total": len(results),
+        "results": results[:limit],
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def index_stats(conn):
+    documents, pages, tokens = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(pages), 0), COALESCE(SUM(tokens), 0) FROM documents"
+    ).fetchone()
+    terms = conn.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0]
+    return {"documents": documents, "pages": pages, "tokens": tokens, "terms": terms}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local full-text index over PDF text")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = commands.add_parser("add", help="Index or re-index PDFs")
+    add_parser.add_argument("index_dir")
+    add_parser.add_argument("pdfs", nargs="+")
+    add_parser.add_argument("--name", default=None,
+                            help="Document name (single PDF only, file name by default)")
+    add_parser.add_argument("--workers", type=int, default=None,
+                            help="PyMuPDF worker processes (CPU count if omitted)")
+
+    search_parser = commands.add_parser("search", help="Query the index")
+    search_parser.add_argument("index_dir")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=20)
+
+    remove_parser = commands.add_parser("remove", help="Remove a document")
+    remove_parser.add_argument("index_dir")
+    remove_parser.add_argument("name")
+
+    stats_parser = commands.add_parser("stats", help="Show index totals")
+    stats_parser.add_argument("index_dir")
+
+    args = parser.parse_args()
+    if args.command == "add" and args.name and len(args.pdfs) > 1:
+        parser.error("--name can only be used with a single PDF")
+
+    conn = open_index(args.index_dir)
+    success = True
+    try:
+        if args.command == "add":
+            for pdf_path in args.pdfs:
+                try:
+                    result = index_document(conn, pdf_path, args.name, args.workers)
+                    print(f"[Index] {result['document']}: {result['status']}", file=sys.stderr)
+                except Exception as e:
+                    result = {"document": args.name or os.path.basename(pdf_path),
+                              "status": "failed", "error": str(e)}
+                    print(f"[Index] Error indexing {pdf_path}: {e}", file=sys.stderr)
+                    success = False
+                print(json.dumps(result))
+        elif args.command == "search":
+            print(json.dumps(search(conn, args.query, args.limit), indent=2))
+        elif args.command == "remove":
+            success = remove_document(conn, args.name)
+            print(json.dumps({"document": args.name, "removed": success}))
+        else:
+            print(json.dumps(index_stats(conn), indent=2))
+    finally:
+        conn.close()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Word Bounding-Box Sidecar
+Extracts every word with its bounding box using PyMuPDF and stores them in a
+compact binary sidecar, generated once per document hash, so the viewer can
+search and highlight without re-extracting text with pdf.js.
+
+File layout (all little-endian):
+    header      8s magic 'PDFWBOX1', uint32 version, uint32 page_count
+    page table  page_count x (uint64 offset, uint32 size, uint32 word_count,
+                float32 page_width, float32 page_height)
+    page block  float32[4 * n] word boxes x0, y0, x1, y1 (points, top-left origin)
+                uint32[n + 1]  offsets of each word in the text blob
+                UTF-8 text blob of all words concatenated
+
+Each page block is self-contained, so a client that has read the header and
+page table can fetch just the pages it needs with HTTP range requests.
+
+Usage:
+    python word_boxes.py <input_pdf> <sidecar_dir>
+    python word_boxes.py --dump <sidecar_file> <page_number>
+"""
+
+import sys
+import os
+import json
+import time
+import struct
+import hashlib
+import argparse
+from array import array
+
+try:
+    # 'import fitz' prints a deprecation notice to stdout in newer PyMuPDF,
+    # which would corrupt the JSON result line
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+    print("Warning: PyMuPDF not available", file=sys.stderr)
+
+MAGIC = b"PDFWBOX1"
+VERSION = 1
+SIDECAR_EXTENSION = ".wbx"
+
+_HEADER = struct.Struct("<8sII")
+_PAGE_ENTRY = struct.Struct("<QIIff")
+
+# The file format is little-endian; arrays are swapped on big-endian hosts
+_SWAP = sys.byteorder != "little"
+
+
+def _to_bytes(values):
+    if _SWAP:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if _SWAP:
+        values.byteswap()
+    return values
+
+
+def encode_page(words):
+    """
+    Pack one page of fitz words into a page block
+
+    Args:
+        words: Tuples from page.get_text("words"): x0, y0, x1, y1, text, ...
+
+    Returns:
+        Bytes of the page block
+    """
+    boxes = array("f")
+    offsets = array("I", [0])
+    blob = bytearray()
+    for word in words:
+        boxes.extend(word[:4])
+        blob += word[4].encode("utf-8")
+        offsets.append(len(blob))
+    return _to_bytes(boxes) + _to_bytes(offsets) + bytes(blob)
+
+
+def decode_page(block, word_count):
+    """Unpack a page block into a list of (text, (x0, y0, x1, y1))."""
+    boxes_size = 16 * word_count
+    offsets_size = 4 * (word_count + 1)
+    boxes = _from_bytes("f", block[:boxes_size])
+    offsets = _from_bytes("I", block[boxes_size:boxes_size + offsets_size])
+    blob = block[boxes_size + offsets_size:]
+    return [(blob[offsets[i]:offsets[i + 1]].decode("utf-8"), tuple(boxes[4 * i:4 * i + 4]))
+            for i in range(word_count)]
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def sidecar_path(sidecar_dir, digest):
+    return os.path.join(sidecar_dir, digest + SIDECAR_EXTENSION)
+
+
+def write_sidecar(pdf_path, output_path):
+    """
+    Extract words from every page and write the sidecar file
+
+    Returns:
+        Tuple of (page_count, word_count)
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        entries = []
+        blocks = []
+        offset = _HEADER.size + _PAGE_ENTRY.size * len(doc)
+        total_words = 0
+        for page in doc:
+            words = page.get_text("words")
+            block = encode_page(words)
+            entries.append(_PAGE_ENTRY.pack(offset, len(block), len(words),
+                                            page.rect.width, page.rect.height))
+            blocks.append(block)
+            offset += len(block)
+            total_words += len(words)
+        page_count = len(doc)
+    finally:
+        doc.close()
+
+    # Write to a temporary name first so readers never see a partial sidecar
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, page_count))
+        f.writelines(entries)
+        f.writelines(blocks)
+    os.replace(temp_path, output_path)
+    return page_count, total_words
+
+
+def read_page_table(f):
+    """Read the header and page table from an open sidecar file."""
+    magic, version, page_count = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a word box sidecar (or unsupported version)")
+    return [_PAGE_ENTRY.unpack(f.read(_PAGE_ENTRY.size)) for _ in range(page_count)]
+
+
+def read_page(path, page_number):
+    """Read the words of a single 1-based page, seeking past all others."""
+    with open(path, 'rb') as f:
+        table = read_page_table(f)
+        if not 1 <= page_number <= len(table):
+            raise ValueError(f"Page {page_number} out of range (1-{len(table)})")
+        offset, size, word_count, width, height = table[page_number - 1]
+        f.seek(offset)
+        return {
+            "page": page_number,
+            "width": width,
+            "height": height,
+            "words": decode_page(f.read(size), word_count),
+        }
+
+
+def build_word_boxes(pdf_path, sidecar_dir):
+    """
+    Return the sidecar for a PDF, generating it only if this content hash
+    has not been processed before
+
+    Returns:
+        Dict with the hash, sidecar path, page/word counts and whether the
+        sidecar was already cached
+    """
+    started = time.perf_counter()
+    digest = file_digest(pdf_path)
+    path = sidecar_path(sidecar_dir, digest)
+    result = {"hash": digest, "path": path, "cached": os.path.exists(path)}
+
+    if result["cached"]:
+        with open(path, 'rb') as f:
+            table = read_page_table(f)
+        result["pages"] = len(table)
+        result["words"] = sum(entry[2] for entry in table)
+    else:
+        os.makedirs(sidecar_dir, exist_ok=True)
+        result["pages"], result["words"] = write_sidecar(pdf_path, path)
+
+    result["size"] = os.path.getsize(path)
+    result["elapsed_ms"] = int((time.perf_counter() - started) * 1000)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect a word bounding-box sidecar")
+    parser.add_argument("--dump", action="store_true",
+                        help="Print the words of one page of an existing sidecar")
+    parser.add_argument("source", help="Input PDF, or sidecar file with --dump")
+    parser.add_argument("target", help="Sidecar directory, or page number with --dump")
+    args = parser.parse_args()
+
+    try:
+        if args.dump:
+            page = read_page(args.source, int(args.target))
+            print(json.dumps(page, ensure_ascii=False, indent=2))
+        else:
+            if not HAS_PYMUPDF:
+                print("[WordBoxes] Error: PyMuPDF is required. Install with: pip install PyMuPDF",
+                      file=sys.stderr)
+                sys.exit(1)
+            result = build_word_boxes(args.source, args.target)
+            state = "cached" if result["cached"] else "generated"
+            print(f"[WordBoxes] {result['pages']} pages, {result['words']} words ({state})",
+                  file=sys.stderr)
+            print(json.dumps(result))
+    except Exception as e:
+        print(f"[WordBoxes] Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(0)
@@ -4,7 +4,7 @@ import bodyParser from "body-parser";
 import multer from "multer";
 import path from "path";
 import { promises as fs } from "fs";
-import { spawn } from "child_process";
+import { spawn, ChildProcess } from "child_process";
 import { fileURLToPath } from "url";
 import os from "os";
 
@@ -30,7 +30,8 @@ app.use(
   cors({
     origin: "*",
     methods: ["GET", "POST", "PUT", "DELETE"],
-    allowedHeaders: ["Content-Type", "Authorization"],
+    allowedHeaders: ["Content-Type", "Authorization", "Range"],
+    exposedHeaders: ["X-Conversion-Report", "X-Original-Size", "X-Compressed-Size"],
   })
 );
 
@@ -49,24 +50,118 @@ const storage = multer.diskStorage({
 
 const upload = multer({ storage });
 
+// On-disk full-text index maintained by python/text_index.py
+const textIndexDir = process.env.TEXT_INDEX_DIR || path.join(uploadsBaseDir, 'text-index');
+
+// Word bounding-box sidecars from python/word_boxes.py, named by document hash
+const wordBoxDir = process.env.WORD_BOX_DIR || path.join(uploadsBaseDir, 'word-boxes');
+
+// pdf2docx layouts cached by python/layout_cache.py hold every page's text and
+// images, so caching is opt-in: the converters only cache when LAYOUT_CACHE_DIR
+// names a directory (bounded by LAYOUT_CACHE_MAX_MB and LAYOUT_CACHE_MAX_AGE_DAYS)
+const layoutCacheDir = process.env.LAYOUT_CACHE_DIR;
+// Same for the OCR text cache of python/ocr_pdf.py: opt-in with OCR_CACHE_DIR
+// (bounded by OCR_CACHE_MAX_MB and OCR_CACHE_MAX_AGE_DAYS)
+const ocrCacheDir = process.env.OCR_CACHE_DIR;
+
+// Use full path to Python on Windows to ensure correct environment
+// On Render (production), use 'python3'. On Windows dev, use full path
+const pythonCmd = process.platform === 'win32' ? 'C:\\Python314\\python.exe' : 'python3';
+
+// Latency budget of one conversion (python/deadline.py): converters step down
+// to cheaper strategies page by page to return a valid file within it. A
+// request may ask for less with a "deadline" field, never for more. Past the
+// budget plus the grace period the process is killed as a last resort.
+const conversionDeadlineSeconds = Number(process.env.CONVERSION_DEADLINE_SECONDS) || 300;
+const deadlineGraceSeconds = 30;
+
+function requestDeadline(body: any): number {
+  const requested = Number(body?.deadline);
+  return requested > 0 ? Math.min(requested, conversionDeadlineSeconds) : conversionDeadlineSeconds;
+}
+
+/**
+ * Kill a converter that overruns its deadline by the grace period; onKill
+ * answers the request. Returns the function that disarms the timer.
+ */
+function killAfterDeadline(child: ChildProcess, deadline: number, label: string, onKill: () => void): () => void {
+  const timer = setTimeout(() => {
+    child.kill("SIGKILL");
+    console.error(`[${label}] Killed after ${deadline + deadlineGraceSeconds}s`);
+    onKill();
+  }, (deadline + deadlineGraceSeconds) * 1000);
+  return () => clearTimeout(timer);
+}
+
+/** The '[Deadline] {...}' report a converter prints: which pages were degraded. */
+function deadlineReport(output: string): string | undefined {
+  const match = output.match(/^\[Deadline\] (\{.*\})$/m);
+  return match ? match[1] : undefined;
+}
+
+/**
+ * Index an uploaded PDF in the background. Unchanged files are skipped by
+ * text_index.py, so re-uploads only cost a hash of the file.
+ */
+function indexUpload(filePath: string, name: string) {
+  if (!name.toLowerCase().endsWith(".pdf")) return;
+  const indexer = spawn(pythonCmd, [path.join(pythonDir, "text_index.py"), "add", textIndexDir, filePath, "--name", name], {
+    stdio: ["ignore", "ignore", "pipe"],
+  });
+  indexer.stderr?.on("data", (d) => console.log(`[Index] ${d.toString().trim()}`));
+  indexer.on("error", (err) => console.error(`[Index] Failed to start indexer: ${err.message}`));
+}
+
 app.get("/", (_req, res) => {
   res.send("Backend server is running");
 });
 
 app.post("/api/upload", upload.single("file"), (req, res) => {
   if (!req.file) return res.status(400).json({ error: "No file uploaded" });
+  indexUpload(req.file.path, req.file.originalname);
   return res.json({ message: "File uploaded successfully", filename: req.file.originalname });
 });
 
+/**
+ * Full-text search over indexed uploads
+ *
+ * GET /api/search?q=<query>&limit=<n>
+ *   - q: words, prefixes (foo*) and quoted phrases, all required to match
+ *   - limit: maximum number of documents (optional, default: 20)
+ */
+app.get("/api/search", (req, res) => {
+  const query = String(req.query.q || "").trim();
+  const limit = String(Number(req.query.limit) || 20);
+  if (!query) return res.status(400).json({ error: "Missing q parameter" });
+
+  const python = spawn(pythonCmd, [path.join(pythonDir, "text_index.py"), "search", textIndexDir, query, "--limit", limit]);
+  let stdout = "";
+  let stderr = "";
+  python.stdout?.on("data", (d: Buffer) => { stdout += d.toString(); });
+  python.stderr?.on("data", (d: Buffer) => { stderr += d.toString(); });
+  python.on("error", (err) => {
+    if (!res.headersSent) res.status(500).json({ error: "Failed to start search", details: err.message });
+  });
+  python.on("close", (code) => {
+    if (res.headersSent) return;
+    if (code !== 0) return res.status(500).json({ error: "Search failed", details: stderr });
+    res.type("application/json").send(stdout);
+  });
+});
+
 app.post("/api/convert", upload.single("file"), async (req, res) => {
   try {
     if (!req.file) return res.status(400).json({ error: "No PDF file uploaded" });
 
     const format = String(req.body.format || "").toLowerCase();
     const allowed = ["word", "excel", "ppt", "html", "text"];
+
+    // Several formats ("word,excel,ppt") are converted from one parse and returned as a zip
+    const formats = [...new Set(format.split(",").map((f) => f.trim()).filter(Boolean))];
+    const multiFormat = formats.length > 1;
     
-    if (!allowed.includes(format)) {
-      return res.status(400).json({ error: "Invalid format. Must be word, excel, ppt, html, or text" });
+    if (!formats.length || !formats.every((f) => allowed.includes(f))) {
+      return res.status(400).json({ error: "Invalid format. Must be word, excel, ppt, html, or text (comma-separated for several)" });
     }
 
     // IMPORTANT: req.file.path is the actual uploaded file path
@@ -113,28 +208,41 @@ app.post("/api/convert", upload.single("file"), async (req, res) => {
     // Use unique output filename with timestamp to avoid conflicts
     const timestamp = Date.now();
     const uniqueBaseName = `${baseName}_${timestamp}`;
-    const outputPath = path.join(uploadDir, `${uniqueBaseName}_converted${extensions[format]}`);
+    const outputPath = path.join(uploadDir, `${uniqueBaseName}_converted${multiFormat ? ".zip" : extensions[format]}`);
 
     const pythonConvertScript = path.join(pythonDir, "simple_pdf_converter.py");
     const pythonExcelScript = path.join(pythonDir, "py_word_excel_html_ppt.py");
     const pythonTextScript = path.join(pythonDir, "pdf_to_text.py");
 
-    const scriptToRun = format === "text" ? pythonTextScript : (format === "excel" ? pythonExcelScript : pythonConvertScript);
+    const scriptToRun = multiFormat
+      ? pythonExcelScript
+      : format === "text" ? pythonTextScript : (format === "excel" ? pythonExcelScript : pythonConvertScript);
 
     const pythonArgs =
-      format === "text"
+      multiFormat
+        ? [scriptToRun, formats.join(","), inputPath, outputPath]
+        : format === "text"
         ? [scriptToRun, inputPath, outputPath]
         : [scriptToRun, format, inputPath, outputPath];
+
+    // Optional page selection, e.g. "1-3,10,40-"; only those pages are converted
+    const pages = String(req.body.pages || "").trim();
+    if (pages) {
+      if (!/^[\d\s,-]+$/.test(pages)) {
+        return res.status(400).json({ error: "Invalid pages. Use a selection like 1-3,10,40-" });
+      }
+      pythonArgs.push("--pages", pages);
+    }
+
+    // Every converter degrades gracefully to finish within the deadline
+    const deadline = requestDeadline(req.body);
+    pythonArgs.push("--deadline", String(deadline));
     
     // Log Word conversion when requested
     if (format === "word") {
       console.log(`[Conversion] ENABLED: Word (.docx) conversion requested`);
     }
 
-    // Use full path to Python on Windows to ensure correct environment
-    // On Render (production), use 'python3'. On Windows dev, use full path
-    const pythonCmd = process.platform === 'win32' ? 'C:\\Python314\\python.exe' : 'python3';
-    
     console.log(`[Conversion] Starting ${format} conversion`);
     console.log(`[Conversion] Python command: ${pythonCmd}`);
     console.log(`[Conversion] Script: ${scriptToRun}`);
@@ -160,9 +268,11 @@ app.post("/api/convert", upload.single("file"), async (req, res) => {
     let stdout = "";
     let timedOut = false;
     
-    // No timeout limits - conversions can take as long as needed
-    // This allows complex PDFs and large files to convert properly
-    let timeout: NodeJS.Timeout | undefined = undefined;
+    // Only a converter that overruns the deadline by the grace period is killed
+    const disarm = killAfterDeadline(python, deadline, "Conversion", () => {
+      timedOut = true;
+      if (!res.headersSent) res.status(504).json({ error: "Conversion timed out", details: stderr });
+    });
     
     // Collect stderr for error messages (text only)
     python.stderr?.on("data", (d) => {
@@ -181,13 +291,13 @@ app.post("/api/convert", upload.single("file"), async (req, res) => {
     });
 
     python.on("error", (err) => {
-      clearTimeout(timeout);
+      disarm();
       console.error(`[Spawn error] ${err.message}`);
       if (!res.headersSent) res.status(500).json({ error: "Failed to start conversion", details: err.message });
     });
 
     python.on("close", async (code) => {
-      clearTimeout(timeout);
+      disarm();
       if (timedOut) return;
       
       try {
@@ -207,8 +317,10 @@ app.post("/api/convert", upload.single("file"), async (req, res) => {
           console.log(`[Conversion success] Sending ${combinedBuffer.length} bytes from stdout`);
           
           res.setHeader("Content-Disposition", `attachment; filename="${path.basename(outputPath)}"`);
-          res.setHeader("Content-Type", "application/octet-stream");
+          res.setHeader("Content-Type", multiFormat ? "application/zip" : "application/octet-stream");
           res.setHeader("Content-Length", combinedBuffer.length);
+          const report = deadlineReport(stderr);
+          if (report) res.setHeader("X-Conversion-Report", report);
           res.send(combinedBuffer);
           
           // Clean up input file
@@ -231,6 +343,8 @@ app.post("/api/convert", upload.single("file"), async (req, res) => {
           console.log(`[Conversion success] File size: ${fileData.length} bytes`);
           
           res.setHeader("Content-Disposition", `attachment; filename="${path.basename(outputPath)}"`);
+          const report = deadlineReport(stderr);
+          if (report) res.setHeader("X-Conversion-Report", report);
           res.send(fileData);
 
           // Clean up temp files after response sent
@@ -258,6 +372,174 @@ app.post("/api/convert", upload.single("file"), async (req, res) => {
   }
 });
 
+/**
+ * PDF Compression Endpoint (python/compress_pdf.py)
+ *
+ * POST /api/compress
+ * FormData:
+ *   - file: PDF file (required)
+ *   - quality: low, medium, high or 1-100 (optional, default: medium)
+ *   - deadline: Seconds the compression may take (optional, at most the
+ *     server's budget); images not recompressed by then are kept as they are
+ * Returns: the compressed PDF, with X-Original-Size and X-Compressed-Size headers
+ */
+const compressQualities: Record<string, number> = { low: 40, medium: 60, high: 85 };
+
+app.post("/api/compress", upload.single("file"), (req, res) => {
+  const inputPdf = req.file?.path;
+  if (!inputPdf) return res.status(400).json({ error: "No PDF file uploaded" });
+  const requested = String(req.body?.quality || "medium").toLowerCase();
+  const quality = compressQualities[requested] ?? Math.round(Number(requested));
+  if (!(quality >= 1 && quality <= 100)) {
+    fs.unlink(inputPdf).catch(() => undefined);
+    return res.status(400).json({ error: "Invalid quality. Must be low, medium, high or 1-100" });
+  }
+  const outputPdf = path.join(uploadsBaseDir, `${Date.now()}_compressed_${path.basename(inputPdf)}`);
+
+  const deadline = requestDeadline(req.body);
+  const python = spawn(pythonCmd, [path.join(pythonDir, "compress_pdf.py"), inputPdf, outputPdf, String(quality),
+    "--deadline", String(deadline)]);
+  let stdout = "";
+  let stderr = "";
+  const disarm = killAfterDeadline(python, deadline, "Compress", () => {
+    if (!res.headersSent) res.status(504).json({ error: "Compression timed out", details: stderr || stdout });
+  });
+  python.stdout?.on("data", (d: Buffer) => { stdout += d.toString(); });
+  python.stderr?.on("data", (d: Buffer) => { stderr += d.toString(); });
+  python.on("error", (err) => {
+    disarm();
+    if (!res.headersSent) res.status(500).json({ error: "Failed to start compression", details: err.message });
+  });
+  python.on("close", async (code) => {
+    disarm();
+    try {
+      const result = stdout.match(/^RESULT:(\d+):(\d+)$/m);
+      if (res.headersSent) return;
+      if (code !== 0 || !result) return res.status(500).json({ error: "Compression failed", details: stderr || stdout });
+
+      const fileData = await fs.readFile(outputPdf);
+      res.setHeader("Content-Disposition", `attachment; filename="${path.basename(outputPdf)}"`);
+      res.setHeader("Content-Type", "application/pdf");
+      res.setHeader("X-Original-Size", result[1]);
+      res.setHeader("X-Compressed-Size", result[2]);
+      const report = deadlineReport(stdout);
+      if (report) res.setHeader("X-Conversion-Report", report);
+      res.send(fileData);
+    } catch (err) {
+      if (!res.headersSent) res.status(500).json({ error: "Compression completed but no output received", details: String(err) });
+    } finally {
+      await Promise.all([inputPdf, outputPdf].map((file) => fs.unlink(file).catch(() => undefined)));
+    }
+  });
+});
+
+/**
+ * OCR Text Extraction Endpoint
+ * Reads pages that have a usable text layer directly and OCRs only the
+ * image-only pages, in parallel, with cached results (python/ocr_pdf.py)
+ *
+ * POST /api/ocr/extract
+ * FormData:
+ *   - file: PDF file (required)
+ *   - lang: Tesseract language(s), e.g. eng+deu (optional, default: eng)
+ *   - deadline: Seconds the extraction may take (optional, at most the
+ *     server's budget); pages not OCRed by then are left out and the
+ *     X-Conversion-Report header lists them
+ * Returns: { total_pages, engines, text, pages: [{ page, text, chars, engine, ms }] }
+ */
+app.post("/api/ocr/extract", upload.single("file"), (req, res) => {
+  const inputPdf = req.file?.path;
+  const lang = String(req.body?.lang || "eng");
+  if (!inputPdf) return res.status(400).json({ error: "No PDF file uploaded" });
+
+  const deadline = requestDeadline(req.body);
+  const python = spawn(pythonCmd, [path.join(pythonDir, "ocr_pdf.py"), inputPdf, "--ndjson", "--lang", lang,
+    "--deadline", String(deadline)]);
+  let stdout = "";
+  let stderr = "";
+  const disarm = killAfterDeadline(python, deadline, "OCR", () => {
+    if (!res.headersSent) res.status(504).json({ error: "OCR timed out", details: stderr });
+  });
+  python.stdout?.on("data", (d: Buffer) => { stdout += d.toString(); });
+  python.stderr?.on("data", (d: Buffer) => { stderr += d.toString(); });
+  python.on("error", (err) => {
+    disarm();
+    if (!res.headersSent) res.status(500).json({ error: "Failed to start OCR", details: err.message });
+  });
+  python.on("close", async (code) => {
+    disarm();
+    try {
+      await fs.unlink(inputPdf);
+    } catch (e) {
+      console.error(`[OCR cleanup error] ${String(e)}`);
+    }
+    if (res.headersSent) return;
+    if (code !== 0) return res.status(500).json({ error: "OCR failed", details: stderr });
+
+    try {
+      const pages = stdout.split("\n").filter((line) => line.trim()).map((line) => JSON.parse(line));
+      const engines: Record<string, number> = {};
+      for (const page of pages) engines[page.engine] = (engines[page.engine] || 0) + 1;
+      const report = deadlineReport(stderr);
+      if (report) res.setHeader("X-Conversion-Report", report);
+      return res.json({
+        total_pages: pages.length,
+        engines,
+        text: pages.map((page) => page.text).join("\n"),
+        pages: pages.map(({ total_pages: _total, ...page }) => page),
+      });
+    } catch (err) {
+      return res.status(500).json({ error: "Invalid OCR result", details: String(err) });
+    }
+  });
+});
+
+/**
+ * Word Bounding-Box Sidecar Endpoint
+ * Generates (once per document hash) the binary word box sidecar used by the
+ * viewer for search and hit highlighting
+ *
+ * POST /api/word-boxes
+ * FormData:
+ *   - file: PDF file (required)
+ * Returns: { hash, pages, words, size, cached }
+ *
+ * GET /api/word-boxes/<hash>.wbx serves the sidecar itself with Range
+ * support, so the viewer fetches the page table and then only the pages it
+ * needs.
+ */
+app.post("/api/word-boxes", upload.single("file"), (req, res) => {
+  const inputPdf = req.file?.path;
+  if (!inputPdf) return res.status(400).json({ error: "No PDF file uploaded" });
+
+  const python = spawn(pythonCmd, [path.join(pythonDir, "word_boxes.py"), inputPdf, wordBoxDir]);
+  let stdout = "";
+  let stderr = "";
+  python.stdout?.on("data", (d: Buffer) => { stdout += d.toString(); });
+  python.stderr?.on("data", (d: Buffer) => { stderr += d.toString(); });
+  python.on("error", (err) => {
+    if (!res.headersSent) res.status(500).json({ error: "Failed to start word box extraction", details: err.message });
+  });
+  python.on("close", async (code) => {
+    try {
+      await fs.unlink(inputPdf);
+    } catch (e) {
+      console.error(`[Word boxes cleanup error] ${String(e)}`);
+    }
+    if (res.headersSent) return;
+    if (code !== 0) return res.status(500).json({ error: "Word box extraction failed", details: stderr });
+    try {
+      const { path: _sidecarPath, ...result } = JSON.parse(stdout);
+      return res.json(result);
+    } catch (err) {
+      return res.status(500).json({ error: "Invalid word box result", details: String(err) });
+    }
+  });
+});
+
+// Sidecars are content-addressed, so they never change once written
+app.use("/api/word-boxes", express.static(wordBoxDir, { immutable: true, maxAge: "365d" }));
+
 /**
  * PDF to Image Conversion Endpoint
  * Converts PDF pages to various image formats
@@ -267,19 +549,31 @@ app.post("/api/convert", upload.single("file"), async (req, res) => {
  *   - file: PDF file (required)
  *   - format: Image format - png, jpg, webp, gif, bmp, tiff, svg, psd, avif, heif, etc (required)
  *   - page: Page number (optional, default: 1)
+ *   - pages: Page selection such as 1-3,10,40- (optional); converts all of
+ *     them in one process and returns a zip of the images
  *   - quality: Quality 1-100 (optional, default: 95)
  *   - dpi: DPI resolution (optional, default: 300)
+ *   - deadline: Seconds the conversion may take (optional, at most the
+ *     server's budget); pages of a selection behind it are rendered at a
+ *     lower DPI and the X-Conversion-Report header lists them
  */
 app.post("/api/pdf-to-image", upload.single("file"), async (req, res) => {
   const inputPdf = req.file?.path;
   const format = (req.body.format || "").toLowerCase();
-  const pageNum = req.body.page || "1";
+  const pages = String(req.body.pages || "").trim();
+  const pageNum = pages || req.body.page || "1";
   const quality = req.body.quality || "95";
   const dpi = req.body.dpi || "300";
 
   if (!inputPdf || !format) {
     return res.status(400).json({ error: "Missing file or format parameter" });
   }
+  if (pages && !/^[\d\s,-]+$/.test(pages)) {
+    return res.status(400).json({ error: "Invalid pages. Use a selection like 1-3,10,40-" });
+  }
+  // A multi-page selection is rendered in one process and returned as a zip
+  const asZip = pages !== "" && !/^\d+$/.test(pages);
+  const zipPath = `${inputPdf}_pages.zip`;
 
   try {
     console.log(`[PDF to Image] Converting page ${pageNum} to ${format.toUpperCase()}`);
@@ -289,6 +583,7 @@ app.post("/api/pdf-to-image", upload.single("file"), async (req, res) => {
     // Ensure output directory exists
     await fs.mkdir(uploadsBaseDir, { recursive: true });
 
+    const deadline = requestDeadline(req.body);
     const python = spawn("python", [
       path.join(pythonDir, "pdf_to_images.py"),
       inputPdf,
@@ -297,10 +592,15 @@ app.post("/api/pdf-to-image", upload.single("file"), async (req, res) => {
       pageNum,
       quality,
       dpi,
+      ...(asZip ? ["--zip", zipPath] : []),
+      "--deadline", String(deadline),
     ]);
 
     let stdout = "";
     let stderr = "";
+    const disarm = killAfterDeadline(python, deadline, "PDF to Image", () => {
+      if (!res.headersSent) res.status(504).json({ error: "Conversion timed out", details: stderr || stdout });
+    });
 
     python.stdout?.on("data", (data: Buffer) => {
       stdout += data.toString();
@@ -312,13 +612,19 @@ app.post("/api/pdf-to-image", upload.single("file"), async (req, res) => {
       console.error(`[PDF to Image stderr] ${data.toString().trim()}`);
     });
 
+    python.on("error", (err) => {
+      disarm();
+      if (!res.headersSent) res.status(500).json({ error: "Failed to start conversion", details: err.message });
+    });
+
     python.on("close", async (code: number) => {
+      disarm();
       try {
         if (code === 0) {
           // Find the output file
           const baseName = path.basename(inputPdf, path.extname(inputPdf));
-          const outputFileName = `${baseName}_page${pageNum}.${format}`;
-          const outputPath = path.join(uploadsBaseDir, outputFileName);
+          const outputFileName = asZip ? `${baseName}_pages.zip` : `${baseName}_page${pageNum}.${format}`;
+          const outputPath = asZip ? zipPath : path.join(uploadsBaseDir, outputFileName);
 
           console.log(`[PDF to Image] Looking for output: ${outputPath}`);
 
@@ -330,6 +636,8 @@ app.post("/api/pdf-to-image", upload.single("file"), async (req, res) => {
             res.setHeader("Content-Disposition", `attachment; filename="${outputFileName}"`);
             res.setHeader("Content-Type", "application/octet-stream");
             res.setHeader("Content-Length", stat.size);
+            const report = deadlineReport(stdout);
+            if (report) res.setHeader("X-Conversion-Report", report);
 
             const fileData = await fs.readFile(outputPath);
             res.send(fileData);
@@ -401,4 +709,6 @@ app.post("/api/pdf-to-image", upload.single("file"), async (req, res) => {
 
 app.listen(PORT, "0.0.0.0", () => {
   console.log(`Backend running on port ${PORT}`);
+  console.log(`[Layout cache] ${layoutCacheDir ? layoutCacheDir : "off (set LAYOUT_CACHE_DIR to enable)"}`);
+  console.log(`[OCR cache] ${ocrCacheDir ? ocrCacheDir : "off (set OCR_CACHE_DIR to enable)"}`);
 });
@@ -35,3 +35,13 @@ export const getConvertUrl = (): string => {
   // This ensures requests go to the Render backend in production
   return `${baseUrl}${API_CONVERT_ENDPOINT}`;
 };
+
+export const API_WORD_BOXES_ENDPOINT = '/api/word-boxes';
+
+/**
+ * Get word box sidecar API URL, optionally for one sidecar file
+ */
+export const getWordBoxesUrl = (hash?: string): string => {
+  const url = `${getApiBaseUrl()}${API_WORD_BOXES_ENDPOINT}`;
+  return hash ? `${url}/${hash}.wbx` : url;
+};
@@ -0,0 +1,160 @@
+/**
+ * Word Box Service - Word bounding boxes from the backend sidecar
+ *
+ * The backend extracts every word with its box once per document hash
+ * (python/word_boxes.py). Only the header, the page table and the pages that
+ * are actually searched or highlighted are downloaded, using Range requests.
+ */
+
+import { getWordBoxesUrl } from '@/config/api';
+
+const MAGIC = 'PDFWBOX1';
+const HEADER_SIZE = 16;
+const PAGE_ENTRY_SIZE = 24;
+
+export interface WordBox {
+  text: string;
+  x0: number;
+  y0: number;
+  x1: number;
+  y1: number;
+}
+
+export interface WordBoxPage {
+  page: number;
+  width: number;
+  height: number;
+  words: WordBox[];
+}
+
+interface PageEntry {
+  offset: number;
+  size: number;
+  wordCount: number;
+  width: number;
+  height: number;
+}
+
+export interface WordBoxDocument {
+  hash: string;
+  pages: number;
+  words: number;
+  size: number;
+  cached: boolean;
+}
+
+const pageTables = new Map<string, Promise<PageEntry[]>>();
+const pageCache = new Map<string, Promise<WordBoxPage>>();
+
+async function fetchRange(hash: string, start: number, length: number): Promise<ArrayBuffer> {
+  const response = await fetch(getWordBoxesUrl(hash), {
+    headers: { Range: `bytes=${start}-${start + length - 1}` },
+  });
+  if (!response.ok) {
+    throw new Error(`Word box request failed: ${response.status}`);
+  }
+  const buffer = await response.arrayBuffer();
+  // A server that ignores Range sends the whole file
+  return response.status === 206 ? buffer : buffer.slice(start, start + length);
+}
+
+async function loadPageTable(hash: string): Promise<PageEntry[]> {
+  const header = new DataView(await fetchRange(hash, 0, HEADER_SIZE));
+  const magic = new TextDecoder().decode(new Uint8Array(header.buffer, 0, 8));
+  if (magic !== MAGIC) {
+    throw new Error('Invalid word box sidecar');
+  }
+  const pageCount = header.getUint32(12, true);
+  if (pageCount === 0) return [];
+
+  const table = new DataView(await fetchRange(hash, HEADER_SIZE, pageCount * PAGE_ENTRY_SIZE));
+  const entries: PageEntry[] = [];
+  for (let i = 0; i < pageCount; i++) {
+    const base = i * PAGE_ENTRY_SIZE;
+    entries.push({
+      offset: table.getUint32(base, true) + table.getUint32(base + 4, true) * 2 ** 32,
+      size: table.getUint32(base + 8, true),
+      wordCount: table.getUint32(base + 12, true),
+      width: table.getFloat32(base + 16, true),
+      height: table.getFloat32(base + 20, true),
+    });
+  }
+  return entries;
+}
+
+function decodePage(page: number, entry: PageEntry, block: ArrayBuffer): WordBoxPage {
+  const count = entry.wordCount;
+  const view = new DataView(block);
+  const blobStart = 16 * count + 4 * (count + 1);
+  const blob = new Uint8Array(block, blobStart);
+  const decoder = new TextDecoder();
+
+  const words: WordBox[] = [];
+  for (let i = 0; i < count; i++) {
+    const start = view.getUint32(16 * count + 4 * i, true);
+    const end = view.getUint32(16 * count + 4 * (i + 1), true);
+    words.push({
+      text: decoder.decode(blob.subarray(start, end)),
+      x0: view.getFloat32(16 * i, true),
+      y0: view.getFloat32(16 * i + 4, true),
+      x1: view.getFloat32(16 * i + 8, true),
+      y1: view.getFloat32(16 * i + 12, true),
+    });
+  }
+  return { page, width: entry.width, height: entry.height, words };
+}
+
+export const wordBoxService = {
+  /**
+   * Upload a PDF so the backend generates (or reuses) its sidecar
+   */
+  async prepare(file: File): Promise<WordBoxDocument> {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    const response = await fetch(getWordBoxesUrl(), {
+      method: 'POST',
+      body: formData
+    });
+    if (!response.ok) {
+      throw new Error('Word box extraction failed');
+    }
+    return await response.json();
+  },
+
+  /**
+   * Get the words of one 1-based page, downloading only that page's block
+   */
+  getPage(hash: string, page: number): Promise<WordBoxPage> {
+    const key = `${hash}:${page}`;
+    let cached = pageCache.get(key);
+    if (!cached) {
+      let table = pageTables.get(hash);
+      if (!table) {
+        table = loadPageTable(hash);
+        pageTables.set(hash, table);
+      }
+      cached = table.then(async (entries) => {
+        const entry = entries[page - 1];
+        if (!entry) {
+          throw new Error(`Page ${page} out of range`);
+        }
+        const block = await fetchRange(hash, entry.offset, entry.size);
+        return decodePage(page, entry, block);
+      });
+      cached.catch(() => pageCache.delete(key));
+      pageCache.set(key, cached);
+    }
+    return cached;
+  },
+
+  /**
+   * Find case-insensitive matches of a single word on a page, for highlighting
+   */
+  async findOnPage(hash: string, page: number, query: string): Promise<WordBox[]> {
+    const needle = query.trim().toLowerCase();
+    if (!needle) return [];
+    const { words } = await this.getPage(hash, page);
+    return words.filter((word) => word.text.toLowerCase().includes(needle));
+  }
+};
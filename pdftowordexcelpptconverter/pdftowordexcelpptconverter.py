@@ -1,77 +1,153 @@
 import os
-from pdf2image import convert_from_path
+import argparse
+import tempfile
+from pdf2image import convert_from_path, pdfinfo_from_path
 from docx import Document
 from pptx import Presentation
 from pptx.util import Inches
 from openpyxl import Workbook
-from PIL import Image
 import pytesseract
 
 # ---- Paths - update if necessary ----
 POPPLER_PATH = r"C:\poppler\Library\bin"
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
-# ---- Converters ----
+# ---- Fan-out settings ----
+# Pages rasterised per pdftoppm call; keeps memory and temp disk use bounded
+RENDER_BATCH = 8
 
-def pdf_to_word(pdf_path, output_docx="output.docx"):
-    document = Document()
-    pages = convert_from_path(pdf_path, 300, poppler_path=POPPLER_PATH)
+# ---- Shared page source ----
 
-    for i, page in enumerate(pages, start=1):
-        img_path = f"temp_page_{i}.png"
-        page.save(img_path, "PNG")
+def iter_pages(pdf_path, dpi, ocr=True):
+    """Rasterise every page once at `dpi` and OCR it once.
 
-        document.add_picture(img_path, width=Inches(6.5))
-        text = pytesseract.image_to_string(page)
-        document.add_paragraph(text)
+    Yields one dict per page, in order, while later pages are still to be
+    rendered: {"number", "total", "image_path", "text"}. The PNG is deleted
+    as soon as every writer has consumed the page.
+    """
+    total = pdfinfo_from_path(pdf_path, poppler_path=POPPLER_PATH)["Pages"]
 
-        os.remove(img_path)
-        if i < len(pages):
-            document.add_page_break()
+    with tempfile.TemporaryDirectory(prefix="pdf_fanout_") as work_dir:
+        for first in range(1, total + 1, RENDER_BATCH):
+            last = min(first + RENDER_BATCH - 1, total)
+            image_paths = convert_from_path(pdf_path, dpi, poppler_path=POPPLER_PATH,
+                                            first_page=first, last_page=last,
+                                            output_folder=work_dir, fmt="png", paths_only=True)
 
-    document.save(output_docx)
-    print(f"✅ Word exported → {output_docx}")
+            for number, image_path in enumerate(image_paths, start=first):
+                text = pytesseract.image_to_string(image_path) if ocr else None
+                yield {"number": number, "total": total, "image_path": image_path, "text": text}
+                os.remove(image_path)
 
 
-def pdf_to_excel(pdf_path, output_xlsx="output.xlsx"):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "PDF to Excel"
+# ---- Writers: each consumes the shared per-page artefacts ----
 
-    pages = convert_from_path(pdf_path, 200, poppler_path=POPPLER_PATH)
+class WordWriter:
+    dpi = 300
+    needs_text = True
 
-    for i, page in enumerate(pages, start=1):
-        text = pytesseract.image_to_string(page)
-        for row in text.split("\n"):
-            ws.append([row])
+    def __init__(self, output_docx):
+        self.output = output_docx
+        self.document = Document()
 
-    wb.save(output_xlsx)
-    print(f"✅ Excel exported → {output_xlsx}")
+    def add_page(self, page):
+        self.document.add_picture(page["image_path"], width=Inches(6.5))
+        self.document.add_paragraph(page["text"])
+        if page["number"] < page["total"]:
+            self.document.add_page_break()
 
+    def save(self):
+        self.document.save(self.output)
+        print(f"✅ Word exported → {self.output}")
+
+
+class ExcelWriter:
+    dpi = 200
+    needs_text = True
+
+    def __init__(self, output_xlsx):
+        self.output = output_xlsx
+        self.wb = Workbook()
+        self.ws = self.wb.active
+        self.ws.title = "PDF to Excel"
+
+    def add_page(self, page):
+        for row in page["text"].split("\n"):
+            self.ws.append([row])
+
+    def save(self):
+        self.wb.save(self.output)
+        print(f"✅ Excel exported → {self.output}")
+
+
+class PptWriter:
+    dpi = 300
+    needs_text = False
+
+    def __init__(self, output_ppt):
+        self.output = output_ppt
+        self.prs = Presentation()
+        self.blank_layout = self.prs.slide_layouts[6]
+
+    def add_page(self, page):
+        slide = self.prs.slides.add_slide(self.blank_layout)
+        slide.shapes.add_picture(page["image_path"], Inches(0), Inches(0), width=self.prs.slide_width)
+
+    def save(self):
+        self.prs.save(self.output)
+        print(f"✅ PowerPoint exported → {self.output}")
 
-def pdf_to_ppt(pdf_path, output_ppt="output.pptx"):
-    prs = Presentation()
-    blank_layout = prs.slide_layouts[6]
-    pages = convert_from_path(pdf_path, 300, poppler_path=POPPLER_PATH)
 
-    for i, page in enumerate(pages, start=1):
-        slide = prs.slides.add_slide(blank_layout)
-        img_path = f"temp_page_{i}.png"
-        page.save(img_path, "PNG")
+WRITERS = {"word": WordWriter, "excel": ExcelWriter, "ppt": PptWriter}
+EXTENSIONS = {"word": ".docx", "excel": ".xlsx", "ppt": ".pptx"}
+
+# ---- Converters ----
+
+def convert(pdf_path, outputs):
+    """Produce several formats from one pass over the PDF.
+
+    outputs maps a format ("word", "excel", "ppt") to its output path. Pages
+    are rendered once at the highest DPI any target needs and OCRed once if
+    any target needs text, so three formats cost about one conversion.
+    """
+    writers = [WRITERS[fmt](path) for fmt, path in outputs.items()]
+    dpi = max(writer.dpi for writer in writers)
+    ocr = any(writer.needs_text for writer in writers)
+
+    for page in iter_pages(pdf_path, dpi, ocr):
+        print(f"   Page {page['number']}/{page['total']}")
+        for writer in writers:
+            writer.add_page(page)
+
+    for writer in writers:
+        writer.save()
+
+
+def pdf_to_word(pdf_path, output_docx="output.docx"):
+    convert(pdf_path, {"word": output_docx})
 
-        slide.shapes.add_picture(img_path, Inches(0), Inches(0), width=prs.slide_width)
-        os.remove(img_path)
 
-    prs.save(output_ppt)
-    print(f"✅ PowerPoint exported → {output_ppt}")
+def pdf_to_excel(pdf_path, output_xlsx="output.xlsx"):
+    convert(pdf_path, {"excel": output_xlsx})
+
+
+def pdf_to_ppt(pdf_path, output_ppt="output.pptx"):
+    convert(pdf_path, {"ppt": output_ppt})
 
 
 # ---- Main Execution ----
 if __name__ == "__main__":
-    pdf_file = "sample.pdf"  # Change to your file path
-
-    pdf_to_word(pdf_file, "converted.docx")
-    pdf_to_excel(pdf_file, "converted.xlsx")
-    pdf_to_ppt(pdf_file, "converted.pptx")
+    parser = argparse.ArgumentParser(description="Convert a PDF to Word, Excel and PowerPoint in one pass")
+    parser.add_argument("pdf_file", nargs="?", default="sample.pdf", help="Input PDF")
+    parser.add_argument("--formats", default="word,excel,ppt", help="Comma-separated: word, excel, ppt")
+    parser.add_argument("--output-prefix", default="converted", help="Outputs are <prefix>.docx/.xlsx/.pptx")
+    args = parser.parse_args()
+
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in WRITERS]
+    if not formats or unknown:
+        parser.error(f"unknown format(s): {', '.join(unknown)}")
+
+    convert(args.pdf_file, {fmt: args.output_prefix + EXTENSIONS[fmt] for fmt in formats})
 
     print("✅✅✅ All Conversions Completed Successfully!")